@@ -1,13 +1,22 @@
+import bz2
 import heapq
 from collections import defaultdict, deque
-import copy
+from types import MappingProxyType
 import json
 
+from lsdb import LSDBStore, LSDBView
+from spf import IncrementalSPF, all_pairs_spf, flow_hash, flow_next_hop, parallel_spf, spf_table
+
+# RIPv2 wire sizes (RFC 2453): 4-byte header + 20 bytes per route entry
+RIP_HEADER_BYTES = 4
+RIP_ENTRY_BYTES = 20
+
 class Network:
     """Represents a network topology"""
     def __init__(self):
         self.graph = defaultdict(dict)
         self.routers = set()
+        self.down_links = {}  # frozenset({r1, r2}) -> cost of a failed link
     
     def add_link(self, router1, router2, cost=1):
         self.graph[router1][router2] = cost
@@ -15,6 +24,23 @@ class Network:
         self.routers.add(router1)
         self.routers.add(router2)
     
+    def link_down(self, router1, router2):
+        """Fail a link; its cost is remembered for link_up"""
+        cost = self.graph[router1].pop(router2)
+        del self.graph[router2][router1]
+        self.down_links[frozenset((router1, router2))] = cost
+    
+    def link_up(self, router1, router2, cost=None):
+        """Restore a failed link (with its old cost unless one is given)"""
+        old_cost = self.down_links.pop(frozenset((router1, router2)), 1)
+        self.add_link(router1, router2, old_cost if cost is None else cost)
+    
+    def set_cost(self, router1, router2, cost):
+        if router2 not in self.graph[router1]:
+            raise ValueError(f"No link between {router1} and {router2}")
+        self.graph[router1][router2] = cost
+        self.graph[router2][router1] = cost
+    
     def get_neighbors(self, router):
         return list(self.graph[router].keys())
     
@@ -22,72 +48,341 @@ class Network:
         return self.graph[router1].get(router2, float('inf'))
 
 # ==================== PART 1: RIP ====================
+RIP_INFINITY = 16
+
 class RIPRouter:
-    """RIP Router using Bellman-Ford algorithm"""
-    def __init__(self, router_id, network):
+    """RIP Router using Bellman-Ford algorithm.
+    The defaults model the original static simulator (no metric cap). For
+    dynamic topologies pass infinity=RIP_INFINITY and optionally
+    split_horizon / poison_reverse / hold_down (in simulation ticks)."""
+    def __init__(self, router_id, network, infinity=float('inf'), split_horizon=False,
+                 poison_reverse=False, hold_down=0):
         self.router_id = router_id
         self.network = network
         self.routing_table = {router_id: (0, router_id)}
         self.updates_received = 0
         self.converged = False
+        self.version = 0  # bumped every time a delta is advertised
+        self.pending = {router_id: (0, router_id)}  # changes since last advertisement
+        self.infinity = infinity
+        self.split_horizon = split_horizon
+        self.poison_reverse = poison_reverse
+        self.hold_down = hold_down
+        self.now = 0
+        self.holds = {}       # destination -> tick its hold-down expires
+        self.queries = set()  # destinations whose route got worse; ask neighbors
     
     def send_routing_table(self):
-        """Returns a copy of routing table for broadcasting"""
-        return copy.deepcopy(self.routing_table)
+        """Returns a read-only view of the routing table for broadcasting.
+        Entries are immutable tuples, so nothing has to be copied."""
+        return MappingProxyType(self.routing_table)
+    
+    def send_delta(self):
+        """Returns the entries changed since the last advertisement (triggered
+        update) and starts a new version. The returned dict is never
+        modified again, so it can be shared by every neighbor."""
+        delta = self.pending
+        if delta:
+            self.pending = {}
+            self.version += 1
+        return delta
+    
+    def advertisement_for(self, neighbor_id, entries):
+        """Entries as sent to one neighbor: with split horizon, routes learnt
+        from that neighbor are left out; with poison reverse they are sent
+        back with the infinity metric instead."""
+        if not (self.split_horizon or self.poison_reverse):
+            return entries
+        via = [d for d, (_, hop) in entries.items() if hop == neighbor_id]
+        if not via:
+            return entries
+        ads = dict(entries)
+        for destination in via:
+            if self.poison_reverse:
+                ads[destination] = (self.infinity, neighbor_id)
+            else:
+                del ads[destination]
+        return ads
+    
+    def _install(self, destination, entry):
+        self.routing_table[destination] = entry
+        self.pending[destination] = entry
+    
+    def _route_worse(self, destination, distance):
+        """A route got worse: hold it down if unreachable, then ask neighbors."""
+        if distance >= self.infinity and self.hold_down:
+            self.holds[destination] = self.now + self.hold_down
+        self.queries.add(destination)
     
     def receive_update(self, neighbor_id, neighbor_table):
-        """Receive routing table from neighbor and update local table"""
+        """Receive routing table from neighbor and update local table.
+        A better route is always taken (unless the destination is held
+        down); the current next hop's word is taken even when it is worse."""
         updated = False
         cost_to_neighbor = self.network.get_cost(self.router_id, neighbor_id)
+        infinity = self.infinity
+        table = self.routing_table
         
         for destination, (distance, next_hop) in neighbor_table.items():
             new_distance = distance + cost_to_neighbor
+            if new_distance > infinity:
+                new_distance = infinity
+            current = table.get(destination)
             
-            if destination not in self.routing_table:
-                self.routing_table[destination] = (new_distance, neighbor_id)
-                updated = True
-            elif new_distance < self.routing_table[destination][0]:
-                self.routing_table[destination] = (new_distance, neighbor_id)
-                updated = True
+            if current is None:
+                if new_distance >= infinity:
+                    continue
+            elif current[1] == neighbor_id:
+                if new_distance == current[0]:
+                    continue
+                if new_distance > current[0]:
+                    self._route_worse(destination, new_distance)
+            elif new_distance >= current[0]:
+                continue
+            elif destination in self.holds:
+                if self.holds[destination] > self.now:
+                    continue
+                del self.holds[destination]
+            self._install(destination, (new_distance, neighbor_id))
+            updated = True
         
         self.updates_received += 1
         return updated
+    
+    def neighbor_down(self, neighbor_id):
+        """The link to a neighbor failed: every route through it is unreachable"""
+        for destination, (distance, next_hop) in list(self.routing_table.items()):
+            if next_hop == neighbor_id and destination != self.router_id and \
+               distance < self.infinity:
+                self._install(destination, (self.infinity, neighbor_id))
+                self._route_worse(destination, self.infinity)
+    
+    def take_queries(self):
+        """Destinations to send a RIP Request for now (hold-down expired)"""
+        ready = set()
+        for destination in self.queries:
+            expires = self.holds.get(destination)
+            if expires is None or expires <= self.now:
+                self.holds.pop(destination, None)
+                ready.add(destination)
+        self.queries -= ready
+        return ready
+    
+    def answer_query(self, destinations):
+        """Response to a RIP Request for specific destinations"""
+        table = self.routing_table
+        return {d: table[d] for d in destinations if d in table}
 
 class RIPSimulation:
     """Simulate RIP protocol convergence"""
-    def __init__(self, network):
+    def __init__(self, network, **router_options):
         self.network = network
-        self.routers = {r: RIPRouter(r, network) for r in network.routers}
+        self.routers = {r: RIPRouter(r, network, **router_options) for r in network.routers}
         self.iteration = 0
         self.message_count = 0
+        self.byte_count = 0
+        self.round_stats = []
+        self.clock = 0
+        self._full_due = defaultdict(set)  # router -> neighbors owed a full table
     
-    def simulate(self, max_iterations=10):
-        """Run RIP simulation until convergence"""
-        print("=" * 60)
-        print("RIP (Routing Information Protocol) Simulation")
-        print("=" * 60)
+    def _advertise(self, router_id, entries, neighbors):
+        """Deliver entries from router_id to neighbors (applying split horizon
+        / poison reverse). Returns (changed neighbors, messages, bytes)."""
+        router = self.routers[router_id]
+        changed = []
+        messages = sent_bytes = 0
+        for neighbor_id in neighbors:
+            ads = router.advertisement_for(neighbor_id, entries)
+            if not ads:
+                continue
+            if self.routers[neighbor_id].receive_update(router_id, ads):
+                changed.append(neighbor_id)
+            messages += 1
+            sent_bytes += RIP_HEADER_BYTES + RIP_ENTRY_BYTES * len(ads)
+        return changed, messages, sent_bytes
+    
+    def simulate(self, max_iterations=10, updates="full", verbose=True):
+        """Run RIP simulation until convergence.
+        updates="full" broadcasts whole tables every round; updates="delta"
+        sends only entries changed since a router's last advertisement.
+        Either way the run stops after the first round in which no table
+        changed. round_stats records messages and bytes per round next to
+        what full-table broadcasts would cost."""
+        if updates not in ("full", "delta"):
+            raise ValueError(f"Unknown update mode: {updates}")
+        if verbose:
+            print("=" * 60)
+            print("RIP (Routing Information Protocol) Simulation")
+            print("=" * 60)
         
         for iteration in range(max_iterations):
             self.iteration = iteration
             updated_any = False
+            messages = sent_bytes = full_messages = full_bytes = 0
             
             for router_id, router in self.routers.items():
                 neighbors = self.network.get_neighbors(router_id)
-                routing_table = router.send_routing_table()
+                full_messages += len(neighbors)
+                full_bytes += len(neighbors) * (RIP_HEADER_BYTES + RIP_ENTRY_BYTES * len(router.routing_table))
+                if updates == "full":
+                    routing_table = router.send_routing_table()
+                else:
+                    routing_table = router.send_delta()
+                    if not routing_table:
+                        continue
                 
-                for neighbor_id in neighbors:
-                    self.routers[neighbor_id].receive_update(router_id, routing_table)
-                    self.message_count += 1
-                    updated_any = True
+                changed, sent, size = self._advertise(router_id, routing_table, neighbors)
+                updated_any = updated_any or bool(changed)
+                messages += sent
+                sent_bytes += size
+            
+            self.message_count += messages
+            self.byte_count += sent_bytes
+            self.round_stats.append({
+                'round': iteration + 1,
+                'messages': messages,
+                'bytes': sent_bytes,
+                'messages_saved': full_messages - messages,
+                'bytes_saved': full_bytes - sent_bytes,
+            })
             
-            print(f"\n--- Iteration {iteration + 1} ---")
-            for router_id in sorted(self.routers.keys()):
-                print(f"Router {router_id}: {dict(self.routers[router_id].routing_table)}")
+            if verbose:
+                print(f"\n--- Iteration {iteration + 1} ---")
+                for router_id in sorted(self.routers.keys()):
+                    print(f"Router {router_id}: {dict(self.routers[router_id].routing_table)}")
             
             if not updated_any:
-                print(f"\n✓ Converged after {iteration + 1} iterations")
-                print(f"Total messages exchanged: {self.message_count}")
+                for router in self.routers.values():
+                    router.converged = True
+                if verbose:
+                    print(f"\n✓ Converged after {iteration + 1} iterations")
+                    print(f"Total messages exchanged: {self.message_count}")
+                break
+    
+    def simulate_event_driven(self, max_events=None, verbose=True):
+        """Event-driven RIP: a FIFO worklist holds routers whose table changed.
+        Each event pops one router and sends its delta to every neighbor;
+        neighbors that changed join the worklist. Converged when it empties.
+        Returns True if converged within max_events."""
+        if verbose:
+            print("=" * 60)
+            print("RIP Simulation (event-driven)")
+            print("=" * 60)
+        
+        worklist = deque(self.routers)
+        queued = set(worklist)
+        self.events = 0
+        while worklist:
+            if max_events is not None and self.events >= max_events:
+                break
+            router_id = worklist.popleft()
+            queued.discard(router_id)
+            self.events += 1
+            delta = self.routers[router_id].send_delta()
+            if not delta:
+                continue
+            
+            changed, sent, size = self._advertise(router_id, delta, self.network.get_neighbors(router_id))
+            self.message_count += sent
+            self.byte_count += size
+            for neighbor_id in changed:
+                if neighbor_id not in queued:
+                    worklist.append(neighbor_id)
+                    queued.add(neighbor_id)
+        
+        converged = not worklist
+        for router in self.routers.values():
+            router.converged = converged
+        if verbose:
+            state = "Converged" if converged else "Stopped"
+            print(f"\n✓ {state} after {self.events} events")
+            print(f"Total messages exchanged: {self.message_count}")
+        return converged
+    
+    # ---- dynamic topology ----
+    def link_down(self, router1, router2):
+        self.network.link_down(router1, router2)
+        self._full_due[router1].discard(router2)
+        self._full_due[router2].discard(router1)
+        self.routers[router1].neighbor_down(router2)
+        self.routers[router2].neighbor_down(router1)
+    
+    def link_up(self, router1, router2, cost=None):
+        """Restore a link; both ends exchange full tables on the next tick"""
+        self.network.link_up(router1, router2, cost)
+        self._full_due[router1].add(router2)
+        self._full_due[router2].add(router1)
+    
+    def change_cost(self, router1, router2, cost):
+        """Change a link's cost; both ends re-send full tables to each other
+        so routes through the link pick up the new metric"""
+        self.network.set_cost(router1, router2, cost)
+        self._full_due[router1].add(router2)
+        self._full_due[router2].add(router1)
+    
+    def tick(self):
+        """One update step: every router sends its triggered update (delta),
+        full tables owed after link up / cost change, and RIP Requests for
+        routes that got worse (answered by each neighbor). Returns
+        (changed, messages, bytes)."""
+        self.clock += 1
+        for router in self.routers.values():
+            router.now = self.clock
+        changed_any = False
+        messages = sent_bytes = 0
+        for router_id, router in self.routers.items():
+            neighbors = self.network.get_neighbors(router_id)
+            delta = router.send_delta()
+            if delta:
+                changed, sent, size = self._advertise(router_id, delta, neighbors)
+                changed_any = changed_any or bool(changed)
+                messages += sent
+                sent_bytes += size
+            owed = self._full_due.pop(router_id, None)
+            if owed:
+                changed, sent, size = self._advertise(router_id, router.send_routing_table(), owed)
+                changed_any = changed_any or bool(changed)
+                messages += sent
+                sent_bytes += size
+            if router.queries:
+                wanted = router.take_queries()
+                if wanted:
+                    request_bytes = RIP_HEADER_BYTES + RIP_ENTRY_BYTES * len(wanted)
+                    for neighbor_id in neighbors:
+                        messages += 1
+                        sent_bytes += request_bytes
+                        response = self.routers[neighbor_id].answer_query(wanted)
+                        changed, sent, size = self._advertise(neighbor_id, response, (router_id,))
+                        changed_any = changed_any or bool(changed)
+                        messages += sent
+                        sent_bytes += size
+        self.message_count += messages
+        self.byte_count += sent_bytes
+        return changed_any, messages, sent_bytes
+    
+    def _settled(self):
+        return not self._full_due and all(
+            not (r.pending or r.queries or r.holds) for r in self.routers.values())
+    
+    def run_until_stable(self, max_ticks=10_000):
+        """Tick until no update, request or hold-down is outstanding.
+        Returns ticks run, ticks until the last table change, and the
+        messages / bytes spent."""
+        start_clock, start_messages, start_bytes = self.clock, self.message_count, self.byte_count
+        last_change = self.clock
+        while self.clock - start_clock < max_ticks:
+            changed, _, _ = self.tick()
+            if changed:
+                last_change = self.clock
+            elif self._settled():
                 break
+        return {
+            'ticks': self.clock - start_clock,
+            'converge_ticks': last_change - start_clock,
+            'messages': self.message_count - start_messages,
+            'bytes': self.byte_count - start_bytes,
+            'settled': self._settled(),
+        }
     
     def display_final_tables(self):
         """Display final routing tables"""
@@ -102,20 +397,29 @@ class RIPSimulation:
                 print(f"  {dest}: Distance={dist}, Next Hop={next_hop}")
 
 # ==================== PART 2: OSPF ====================
+# OSPF architectural constants (RFC 2328, Appendix B), in seconds
+LS_REFRESH_TIME = 1800
+MAX_AGE = 3600
+
 class OSPFRouter:
-    """OSPF Router using Dijkstra's algorithm"""
-    def __init__(self, router_id, network):
+    """OSPF Router using Dijkstra's algorithm. With an LSDBStore the
+    link_state_db is a view into it instead of a private dict."""
+    def __init__(self, router_id, network, store=None):
         self.router_id = router_id
         self.network = network
-        self.link_state_db = {}
+        self.link_state_db = store.view() if store is not None else {}
         self.routing_table = {}
+        self.next_hops = {}  # dest -> tuple of equal-cost first hops
+        self.flow_salt = flow_hash(router_id)
         self.flood_queue = []
+        self.seq_num = 0
+        self._spf = None  # IncrementalSPF kept by update_spf
     
     def build_lsa(self):
         """Build Link State Advertisement"""
         lsa = {
             'router': self.router_id,
-            'seq_num': 0,
+            'seq_num': self.seq_num,
             'links': {}
         }
         for neighbor in self.network.get_neighbors(self.router_id):
@@ -126,74 +430,284 @@ class OSPFRouter:
     def receive_lsa(self, lsa):
         """Receive and flood LSA"""
         router = lsa['router']
-        if router not in self.link_state_db or \
-           lsa['seq_num'] > self.link_state_db[router].get('seq_num', -1):
+        current = self.link_state_db.get(router)
+        if current is None or lsa['seq_num'] > current.get('seq_num', -1):
             self.link_state_db[router] = lsa
             return True
         return False
     
+    def receive_lsas(self, lsas):
+        """Receive the LSAs of one Link State Update packet; returns those
+        that were newer and got installed (to be flooded on)"""
+        if isinstance(self.link_state_db, LSDBView):
+            return self.link_state_db.install_newer(lsas)
+        return [lsa for lsa in lsas if self.receive_lsa(lsa)]
+    
     def compute_shortest_paths(self):
-        """Dijkstra's algorithm to compute SPT"""
-        dist = {r: float('inf') for r in self.network.routers}
-        dist[self.router_id] = 0
-        prev = {r: None for r in self.network.routers}
-        visited = set()
-        pq = [(0, self.router_id)]
-        
-        while pq:
-            d, u = heapq.heappop(pq)
-            if u in visited:
+        """Dijkstra's algorithm to compute SPT and the ECMP next hops"""
+        self._spf = None  # the LSDB may have moved on since the tree was built
+        self.next_hops = {}
+        self.routing_table = spf_table(self.router_id, self.link_state_db, 'links', self.network.routers,
+                                       self.next_hops)
+    
+    def next_hop(self, dest, flow):
+        """Forwarding decision: one of the equal-cost first hops towards
+        dest, chosen by hashing the flow (e.g. its 5-tuple)"""
+        return flow_next_hop(self.next_hops.get(dest), flow, self.flow_salt)
+    
+    def update_spf(self, changed_routers):
+        """Incremental SPF after the LSAs of changed_routers changed: only
+        the affected part of the shortest-path tree is recomputed, and only
+        the routing_table entries that moved are rewritten. The first call
+        builds the tree in full, and so does the first call after a full
+        SPF, which drops the tree. The tree keeps one path per destination,
+        so next_hops is cleared until the next compute_shortest_paths."""
+        self.next_hops = {}
+        if self._spf is None:
+            links = {r: lsa['links'] for r, lsa in self.link_state_db.items()}
+            self._spf = IncrementalSPF(self.router_id, links)
+            self.routing_table = {r: self._spf.entry(r) for r in self.network.routers}
+            return
+        for router in changed_routers:
+            lsa = self.link_state_db.get(router)
+            for node in self._spf.update(router, lsa['links'] if lsa else {}):
+                self.routing_table[node] = self._spf.entry(node)
+
+class LSAFlooding:
+    """Hop-by-hop OSPF flooding as a discrete-event simulation.
+    Every directed link has a FIFO queue; whenever the link is free, the
+    queued LSAs (up to max_lsas) leave as one Link State Update packet that
+    takes tx_time per LSA to send and arrives delay later. A router installs
+    an LSA only if its sequence number is newer than its LSDB copy and then
+    floods it on every other link; equal or older copies are duplicates and
+    go no further. An LSA's age is the time since it was originated: the
+    originator refreshes it every LS_REFRESH_TIME, and one that was never
+    refreshed (its router is in `silent`) is flushed from every LSDB at
+    MAX_AGE."""
+    def __init__(self, sim, delay=0.001, tx_time=0.0001, max_lsas=100):
+        self.network = sim.network
+        self.routers = sim.routers
+        self.delay = delay
+        self.tx_time = tx_time
+        self.max_lsas = max_lsas
+        self.now = 0.0
+        self.silent = set()  # routers that stopped refreshing their LSAs
+        self.queues = defaultdict(deque)  # (from, to) -> LSAs waiting for the link
+        self.link_free = {}  # (from, to) -> time the link finishes sending
+        self.scheduled = set()  # links with a send event pending
+        self.events = []  # heap of (time, seq, kind, data)
+        self.seq = 0
+        self.in_flight = 0  # pending send/arrive events
+        self.packets = 0
+        self.transmissions = 0  # LSAs carried by those packets
+        self.duplicates = 0
+        self.installs = 0
+        self.flushed = 0
+        self.last_install = 0.0
+    
+    def _schedule(self, time, kind, data):
+        self.seq += 1
+        heapq.heappush(self.events, (time, self.seq, kind, data))
+    
+    def originate(self, router_id):
+        """router_id builds its LSA with the next sequence number, installs
+        it and starts flooding it"""
+        router = self.routers[router_id]
+        router.seq_num += 1
+        lsa = router.build_lsa()
+        lsa['originated'] = self.now
+        router.link_state_db[router_id] = lsa
+        lsa = router.link_state_db[router_id]  # the stored (possibly shared) instance
+        self.installs += 1
+        self.last_install = self.now
+        self._flood(router_id, lsa, None)
+        self._schedule(self.now + LS_REFRESH_TIME, 'refresh', lsa)
+        return lsa
+    
+    def _flood(self, router_id, lsa, received_from):
+        queues = self.queues
+        for neighbor in self.network.graph[router_id]:
+            if neighbor == received_from:
                 continue
-            visited.add(u)
-            
-            if u in self.link_state_db:
-                for neighbor, cost in self.link_state_db[u]['links'].items():
-                    if neighbor not in visited:
-                        new_dist = dist[u] + cost
-                        if new_dist < dist[neighbor]:
-                            dist[neighbor] = new_dist
-                            prev[neighbor] = u
-                            heapq.heappush(pq, (new_dist, neighbor))
-        
-        self.routing_table = {r: (dist[r], prev[r]) for r in self.network.routers}
+            link = (router_id, neighbor)
+            queues[link].append(lsa)
+            if link not in self.scheduled:
+                self.scheduled.add(link)
+                self.in_flight += 1
+                self._schedule(max(self.now, self.link_free.get(link, 0.0)), 'send', link)
+    
+    def _send(self, link):
+        queue = self.queues[link]
+        batch = [queue.popleft() for _ in range(min(len(queue), self.max_lsas))]
+        done = self.now + self.tx_time * len(batch)
+        self.link_free[link] = done
+        self.packets += 1
+        self.transmissions += len(batch)
+        self.in_flight += 1
+        self._schedule(done + self.delay, 'arrive', (link, batch))
+        if queue:
+            self.in_flight += 1
+            self._schedule(done, 'send', link)
+        else:
+            self.scheduled.discard(link)
+            del self.queues[link]
+    
+    def _arrive(self, link, batch):
+        sender, router_id = link
+        installed = self.routers[router_id].receive_lsas(batch)
+        self.duplicates += len(batch) - len(installed)
+        if installed:
+            self.installs += len(installed)
+            self.last_install = self.now
+        for lsa in installed:
+            self._flood(router_id, lsa, sender)
+    
+    def _age_out(self, lsa):
+        """The LSA was not refreshed: it reaches MAX_AGE everywhere at once"""
+        for router in self.routers.values():
+            if router.link_state_db.get(lsa['router']) is lsa:
+                del router.link_state_db[lsa['router']]
+                self.flushed += 1
+    
+    def run(self, until=None):
+        """Process events up to time `until`, or, without it, until every
+        flood in progress has finished (refresh timers stay queued).
+        Returns stats()."""
+        events = self.events
+        while events:
+            time, _, kind, data = events[0]
+            if until is None and not self.in_flight or until is not None and time > until:
+                break
+            heapq.heappop(events)
+            self.now = time
+            if kind == 'send':
+                self.in_flight -= 1
+                self._send(data)
+            elif kind == 'arrive':
+                self.in_flight -= 1
+                self._arrive(*data)
+            elif kind == 'refresh':
+                if self.routers[data['router']].link_state_db.get(data['router']) is data:
+                    if data['router'] in self.silent:
+                        self._schedule(data['originated'] + MAX_AGE, 'maxage', data)
+                    else:
+                        self.originate(data['router'])
+            else:
+                self._age_out(data)
+        if until is not None:
+            self.now = max(self.now, until)
+        return self.stats()
+    
+    def consistent(self):
+        """True if every router's LSDB holds the same LSA instances"""
+        reference = None
+        for router in self.routers.values():
+            seqs = {r: lsa['seq_num'] for r, lsa in router.link_state_db.items()}
+            if reference is None:
+                reference = seqs
+            elif seqs != reference:
+                return False
+        return True
+    
+    def stats(self):
+        return {
+            'packets': self.packets,
+            'transmissions': self.transmissions,
+            'duplicates': self.duplicates,
+            'installs': self.installs,
+            'flushed': self.flushed,
+            'last_install': self.last_install,
+        }
 
 class OSPFSimulation:
     """Simulate OSPF protocol"""
     def __init__(self, network):
         self.network = network
-        self.routers = {r: OSPFRouter(r, network) for r in network.routers}
+        self.store = LSDBStore()  # every router's link_state_db is a view into it
+        self.routers = {r: OSPFRouter(r, network, self.store) for r in network.routers}
         self.message_count = 0
+        self.flooding = None  # LSAFlooding engine once flooding="hop-by-hop" ran
     
-    def simulate(self):
-        """Run OSPF simulation"""
-        print("\n" + "=" * 60)
-        print("OSPF (Open Shortest Path First) Simulation")
-        print("=" * 60)
+    def simulate(self, spf="dijkstra", verbose=True, workers=None, flooding="hop-by-hop"):
+        """Run OSPF simulation.
+        flooding="hop-by-hop" floods every LSA with LSAFlooding and counts
+        Link State Update packets; flooding="instant" hands every LSA to
+        every router directly (no flooding cost, much faster on big graphs).
+        spf="scipy" fills every router's routing_table from one all_pairs_spf
+        call (compiled Dijkstra over a CSR matrix of the topology) instead of
+        running a Python Dijkstra per router. spf="parallel" runs the
+        per-router Dijkstras on a pool of `workers` processes."""
+        if spf not in ("dijkstra", "scipy", "parallel"):
+            raise ValueError(f"Unknown SPF engine: {spf}")
+        if flooding not in ("hop-by-hop", "instant"):
+            raise ValueError(f"Unknown flooding mode: {flooding}")
+        if verbose:
+            print("\n" + "=" * 60)
+            print("OSPF (Open Shortest Path First) Simulation")
+            print("=" * 60)
         
         # Phase 1: Flood LSAs
-        print("\n--- Phase 1: LSA Flooding ---")
-        all_lsas = {r: self.routers[r].build_lsa() for r in self.network.routers}
-        
-        for router_id, router in self.routers.items():
-            neighbors = self.network.get_neighbors(router_id)
-            own_lsa = all_lsas[router_id]
-            
-            for neighbor_id in neighbors:
-                if self.routers[neighbor_id].receive_lsa(own_lsa):
-                    self.message_count += 1
-        
-        # Propagate all LSAs to all routers
-        for router in self.routers.values():
-            for lsa in all_lsas.values():
-                router.receive_lsa(lsa)
+        if verbose:
+            print("\n--- Phase 1: LSA Flooding ---")
+        if flooding == "hop-by-hop":
+            self.flooding = LSAFlooding(self)
+            self.store.defer_refs()  # one recount in consolidate, not one per install
+            for router_id in self.routers:
+                self.flooding.originate(router_id)
+            stats = self.flooding.run()
+            self.store.consolidate()
+            self.message_count += stats['packets']
+            if verbose:
+                print(f"LSDBs consistent after {stats['last_install'] * 1000:.1f} ms, "
+                      f"{stats['transmissions']} LSA copies sent, {stats['duplicates']} duplicates")
+        else:
+            for router in self.routers.values():
+                router.seq_num += 1
+            for router in self.routers.values():
+                self.store.publish(router.build_lsa())
         
         # Phase 2: Compute shortest paths
-        print("--- Phase 2: Computing Shortest Paths ---")
-        for router in self.routers.values():
-            router.compute_shortest_paths()
+        if verbose:
+            print("--- Phase 2: Computing Shortest Paths ---")
+        if spf != "dijkstra":
+            if spf == "scipy":
+                tables = all_pairs_spf(self.network.graph, sorted(self.network.routers))
+            else:
+                tables = parallel_spf(self.network.graph, sorted(self.network.routers), workers=workers)
+            for router_id, router in self.routers.items():
+                router.routing_table = tables[router_id]
+                router._spf = None
+        else:
+            for router in self.routers.values():
+                router.compute_shortest_paths()
         
-        print(f"Total LSA messages: {self.message_count}")
-        self.display_final_tables()
+        if verbose:
+            print(f"Total LSA messages: {self.message_count}")
+            self.display_final_tables()
+    
+    def reoriginate(self, router_ids, incremental=True):
+        """Routers in router_ids saw their links change: each originates a new
+        LSA (next sequence number), which is flooded hop by hop if simulate
+        used LSAFlooding and installed everywhere directly otherwise. Every
+        router then reruns SPF incrementally or in full."""
+        if self.flooding is not None:
+            before = self.flooding.packets
+            self.store.defer_refs()
+            for router_id in router_ids:
+                self.flooding.originate(router_id)
+            self.flooding.run()
+            self.store.consolidate()
+            self.message_count += self.flooding.packets - before
+        else:
+            for router_id in router_ids:
+                origin = self.routers[router_id]
+                origin.seq_num += 1
+                self.store.publish(origin.build_lsa())
+        for router in self.routers.values():
+            if incremental:
+                router.update_spf(router_ids)
+            else:
+                router.compute_shortest_paths()
     
     def display_final_tables(self):
         """Display final routing tables and SPT"""
@@ -203,101 +717,265 @@ class OSPFSimulation:
         for router_id in sorted(self.routers.keys()):
             print(f"\nRouter {router_id}:")
             table = self.routers[router_id].routing_table
+            next_hops = self.routers[router_id].next_hops
             for dest in sorted(table.keys()):
-                dist, next_hop = table[dest]
+                dist, prev_hop = table[dest]
                 if dist != float('inf'):
-                    print(f"  {dest}: Distance={dist}, Previous Hop={next_hop}")
+                    hops = f", Next Hops={','.join(next_hops[dest])}" if dest in next_hops else ""
+                    print(f"  {dest}: Distance={dist}, Previous Hop={prev_hop}{hops}")
 
 # ==================== PART 3: BGP ====================
+# Gao-Rexford import policy: prefer routes from customers, then peers,
+# then providers (relationship of the neighbor as seen from this AS)
+BGP_LOCAL_PREF = {'customer': 200, 'peer': 100, 'provider': 50}
+BGP_DEFAULT_LOCAL_PREF = 100
+
 class BGPRouter:
-    """BGP Router with AS path vector"""
-    def __init__(self, router_id, as_id, network):
+    """BGP speaker of one AS. AS paths are tuples listed from the origin AS.
+    Adj-RIB-In keeps, per destination, the path each neighbor advertised
+    (as received: without this AS, and shared with the sender's copy),
+    the Loc-RIB the selected (path, neighbor) and the Adj-RIB-Out the path
+    last advertised and whether it went to customers only. routing_table
+    gives the Loc-RIB as {dest: (length, path ending in this AS)}."""
+    def __init__(self, router_id, as_id, network, relationships=None, local_pref=None,
+                 always_compare_med=False):
         self.router_id = router_id
         self.as_id = as_id
         self.network = network
-        self.routing_table = {}
-        self.as_path_db = {}
-    
-    def advertise_routes(self):
-        """Send UPDATE messages to neighbors"""
-        updates = {}
-        for destination, (path_length, path) in self.as_path_db.items():
-            updates[destination] = {
-                'as_path': path,
-                'path_length': path_length
-            }
-        return updates
-    
-    def receive_update(self, neighbor_as, updates):
-        """Receive UPDATE from neighbor"""
-        updated = False
-        for destination, update in updates.items():
-            neighbor_path = update['as_path']
-            
-            # Loop prevention: ignore if local AS in path
-            if self.as_id in neighbor_path:
-                continue
-            
-            new_path = neighbor_path + [self.as_id]
-            new_length = len(new_path)
-            
-            if destination not in self.routing_table or \
-               new_length < self.routing_table[destination][0]:
-                self.routing_table[destination] = (new_length, new_path)
-                self.as_path_db[destination] = (new_length, new_path)
-                updated = True
-        
-        return updated
+        self.relationships = relationships or {}  # neighbor -> 'customer' / 'peer' / 'provider'
+        self.policy = bool(self.relationships)  # Gao-Rexford export rules apply
+        self.customers = {n for n, rel in self.relationships.items() if rel == 'customer'}
+        self.import_pref = {n: BGP_LOCAL_PREF[rel] for n, rel in self.relationships.items()}
+        self.import_pref.update(local_pref or {})
+        self.always_compare_med = always_compare_med
+        self.originated = set()
+        self.adj_rib_in = {}   # dest -> {neighbor: path}
+        self.med_in = {}       # (dest, neighbor) -> MED, if not 0
+        self.loc_rib = {}      # dest -> (path, neighbor); neighbor None if originated here
+        self.adj_rib_out = {}  # dest -> (advertised path, customers only)
+    
+    @property
+    def routing_table(self):
+        return {dest: (len(path) + 1, list(path) + [self.as_id]) for dest, (path, _) in self.loc_rib.items()}
+    
+    def originate(self, dest):
+        """Announce dest (a prefix of this AS); returns True if the Loc-RIB changed"""
+        self.originated.add(dest)
+        return self._select(dest)
+    
+    def withdraw(self, dest):
+        self.originated.discard(dest)
+        return self._select(dest)
+    
+    def _select(self, dest):
+        """BGP decision process for dest: highest LOCAL_PREF, shortest AS
+        path, lowest MED (only across neighbors if always_compare_med: one
+        session per neighbor AS), lowest neighbor AS. Returns True if the
+        Loc-RIB entry changed."""
+        old = self.loc_rib.get(dest)
+        if dest in self.originated:
+            best = ((), None)
+        else:
+            best = best_key = None
+            pref = self.import_pref.get
+            med = self.med_in.get if self.always_compare_med else None
+            for neighbor, path in self.adj_rib_in.get(dest, {}).items():
+                key = (-pref(neighbor, BGP_DEFAULT_LOCAL_PREF), len(path),
+                       med((dest, neighbor), 0) if med else 0, neighbor)
+                if best_key is None or key < best_key:
+                    best, best_key = (path, neighbor), key
+        if best is None:
+            if old is None:
+                return False
+            del self.loc_rib[dest]
+            return True
+        if old is not None and old[0] is best[0] and old[1] == best[1]:
+            return False
+        self.loc_rib[dest] = best
+        return True
+    
+    def receive_update(self, neighbor_as, updates, med=0):
+        """Process one UPDATE from neighbor_as: updates maps dest -> AS path,
+        or None for a withdrawal. Paths containing this AS are treated as
+        withdrawals (loop prevention). Returns the dests whose Loc-RIB entry
+        changed."""
+        changed = []
+        for dest, path in updates.items():
+            routes = self.adj_rib_in.get(dest)
+            if path is None or self.as_id in path:
+                if routes is None or neighbor_as not in routes:
+                    continue
+                del routes[neighbor_as]
+                if not routes:
+                    del self.adj_rib_in[dest]
+                self.med_in.pop((dest, neighbor_as), None)
+            else:
+                if routes is None:
+                    routes = self.adj_rib_in[dest] = {}
+                routes[neighbor_as] = path
+                if med:
+                    self.med_in[dest, neighbor_as] = med
+                elif self.med_in:
+                    self.med_in.pop((dest, neighbor_as), None)
+            if self._select(dest):
+                changed.append(dest)
+        return changed
+    
+    def drop_neighbor(self, neighbor_as):
+        """Session to neighbor_as went down: implicitly withdraw all its
+        routes and forget its role. Returns the dests whose Loc-RIB entry
+        changed."""
+        lost = [dest for dest, routes in self.adj_rib_in.items() if neighbor_as in routes]
+        changed = self.receive_update(neighbor_as, dict.fromkeys(lost))
+        self.relationships.pop(neighbor_as, None)
+        self.customers.discard(neighbor_as)
+        self.import_pref.pop(neighbor_as, None)
+        return changed
 
 class BGPSimulation:
-    """Simulate BGP protocol"""
-    def __init__(self, as_topology):
-        # as_topology: list of (as_id, neighbors)
-        self.routers = {}
+    """Simulate BGP protocol. as_topology is a list of (as_id, neighbors).
+    With relationships ({(a, b): role of b for a}, roles 'customer', 'peer',
+    'provider') routers apply Gao-Rexford policy: LOCAL_PREF by role, and
+    routes from peers and providers are exported to customers only.
+    local_pref ({(a, b): value}) overrides a's preference for b's routes and
+    med ({(a, b): value}) is the MED a sends to b. Each AS in origins (all
+    by default) originates itself as a destination.
+    UPDATEs are incremental: only changed routes and withdrawals are sent,
+    batched per session, and every round delivers the UPDATEs the previous
+    round produced."""
+    def __init__(self, as_topology, relationships=None, local_pref=None, med=None,
+                 always_compare_med=False, origins=None):
+        self.neighbors = {as_id: list(neighbors) for as_id, neighbors in as_topology}
         self.as_topology = as_topology
+        self.med = med or {}
+        per_router = {as_id: ({}, {}) for as_id in self.neighbors}
+        for (a, b), role in (relationships or {}).items():
+            per_router[a][0][b] = role
+        for (a, b), value in (local_pref or {}).items():
+            per_router[a][1][b] = value
+        self.routers = {
+            as_id: BGPRouter(as_id, as_id, None, rels, prefs, always_compare_med)
+            for as_id, (rels, prefs) in per_router.items()
+        }
+        self.origins = list(self.neighbors) if origins is None else list(origins)
+        self.paths = {}   # interned AS paths
+        self.outbox = {}  # (sender, receiver) -> {dest: path or None}
+        self.started = False
+        self.iteration = 0
         self.message_count = 0
-        
-        for as_id, neighbors in as_topology:
-            router = BGPRouter(as_id, as_id, None)
-            router.routing_table[as_id] = (1, [as_id])
-            router.as_path_db[as_id] = (1, [as_id])
-            self.routers[as_id] = router
+        self.announcements = 0
+        self.withdrawals = 0
     
     def get_neighbors(self, as_id):
-        for aid, neighbors in self.as_topology:
-            if aid == as_id:
-                return neighbors
-        return []
+        return self.neighbors.get(as_id, [])
     
-    def simulate(self, iterations=10):
-        """Run BGP simulation"""
-        print("\n" + "=" * 60)
-        print("BGP (Border Gateway Protocol) Simulation")
-        print("=" * 60)
+    def _export(self, as_id, dest):
+        """Queue what changed in as_id's advertisement of dest for each
+        neighbor, after its Loc-RIB entry changed"""
+        router = self.routers[as_id]
+        old_path, old_customers = router.adj_rib_out.get(dest, (None, True))
+        entry = router.loc_rib.get(dest)
+        if entry is None:
+            if old_path is None:
+                return
+            new_path, new_customers = None, True
+            del router.adj_rib_out[dest]
+        else:
+            path, learned_from = entry
+            new_path = path + (as_id,)
+            new_path = self.paths.setdefault(new_path, new_path)
+            new_customers = learned_from is not None and router.policy and \
+                router.relationships.get(learned_from) != 'customer'
+            if new_path is old_path and new_customers == old_customers:
+                return
+            router.adj_rib_out[dest] = (new_path, new_customers)
+        customers = router.customers
+        targets = customers if old_customers and new_customers and router.policy else self.neighbors[as_id]
+        outbox = self.outbox
+        for neighbor in targets:
+            is_customer = neighbor in customers
+            old = old_path if old_path is not None and (is_customer or not old_customers) \
+                and neighbor not in old_path else None
+            new = new_path if new_path is not None and (is_customer or not new_customers) \
+                and neighbor not in new_path else None
+            if old is not new:
+                box = outbox.get((as_id, neighbor))
+                if box is None:
+                    box = outbox[as_id, neighbor] = {}
+                box[dest] = new
+    
+    def _start(self):
+        self.started = True
+        for as_id in self.origins:
+            if self.routers[as_id].originate(as_id):
+                self._export(as_id, as_id)
+    
+    def step(self):
+        """Deliver every queued UPDATE once; returns the number delivered"""
+        batch, self.outbox = self.outbox, {}
+        routers, med = self.routers, self.med
+        for (sender, receiver), updates in batch.items():
+            self.message_count += 1
+            for path in updates.values():
+                if path is None:
+                    self.withdrawals += 1
+                else:
+                    self.announcements += 1
+            for dest in routers[receiver].receive_update(sender, updates, med.get((sender, receiver), 0)):
+                self._export(receiver, dest)
+        return len(batch)
+    
+    def simulate(self, iterations=10, verbose=True):
+        """Run BGP simulation for up to `iterations` rounds; returns True
+        once no UPDATEs are left in flight"""
+        if verbose:
+            print("\n" + "=" * 60)
+            print("BGP (Border Gateway Protocol) Simulation")
+            print("=" * 60)
+        if not self.started:
+            self._start()
         
-        for iteration in range(iterations):
-            updated_any = False
-            
-            for as_id, router in self.routers.items():
-                neighbors = self.get_neighbors(as_id)
-                updates = router.advertise_routes()
-                
-                for neighbor_as in neighbors:
-                    if neighbor_as in self.routers:
-                        if self.routers[neighbor_as].receive_update(as_id, updates):
-                            updated_any = True
-                            self.message_count += 1
-            
-            print(f"\n--- Iteration {iteration + 1} ---")
-            for as_id in sorted(self.routers.keys()):
-                print(f"AS {as_id}: {self.routers[as_id].routing_table}")
-            
-            if not updated_any:
-                print(f"\n✓ Converged after {iteration + 1} iterations")
-                print(f"Total UPDATE messages: {self.message_count}")
+        for _ in range(iterations):
+            if not self.outbox:
                 break
+            self.step()
+            self.iteration += 1
+            if verbose:
+                print(f"\n--- Iteration {self.iteration} ---")
+                for as_id in sorted(self.routers.keys()):
+                    print(f"AS {as_id}: {self.routers[as_id].routing_table}")
         
-        self.display_final_tables()
+        converged = not self.outbox
+        if verbose:
+            if converged:
+                print(f"\n✓ Converged after {self.iteration} iterations")
+            print(f"Total UPDATE messages: {self.message_count} "
+                  f"({self.announcements} routes announced, {self.withdrawals} withdrawn)")
+            self.display_final_tables()
+        return converged
+    
+    def link_down(self, as1, as2):
+        """Tear down the session between as1 and as2; both withdraw what
+        they learned over it. Run simulate() to reconverge."""
+        for a, b in ((as1, as2), (as2, as1)):
+            self.neighbors[a].remove(b)
+            for dest in self.routers[a].drop_neighbor(b):
+                self._export(a, dest)
+            self.outbox.pop((a, b), None)
+    
+    def withdraw(self, as_id):
+        """as_id stops originating its destination"""
+        self.origins.remove(as_id)
+        if self.routers[as_id].withdraw(as_id):
+            self._export(as_id, as_id)
+    
+    def rib_sizes(self):
+        """Totals of Adj-RIB-In routes, Loc-RIB entries and interned paths"""
+        return {
+            'adj_rib_in': sum(len(routes) for r in self.routers.values() for routes in r.adj_rib_in.values()),
+            'loc_rib': sum(len(r.loc_rib) for r in self.routers.values()),
+            'paths': len(self.paths),
+        }
     
     def display_final_tables(self):
         """Display final BGP routing tables"""
@@ -311,20 +989,47 @@ class BGPSimulation:
                 path_len, path = table[dest]
                 print(f"  Destination AS {dest}: AS Path={path}, Length={path_len}")
 
+def load_as_relationships(path):
+    """Read a CAIDA AS-relationship file ("a|b|-1": a is b's provider,
+    "a|b|0": a and b peer; '#' starts a comment; .bz2 is read compressed).
+    Returns (as_topology, relationships) for BGPSimulation."""
+    opener = bz2.open if path.endswith(".bz2") else open
+    neighbors = defaultdict(list)
+    relationships = {}
+    with opener(path, "rt") as f:
+        for line in f:
+            if line.startswith("#"):
+                continue
+            a, b, rel = line.strip().split("|")[:3]
+            a, b = int(a), int(b)
+            neighbors[a].append(b)
+            neighbors[b].append(a)
+            if rel == "-1":
+                relationships[a, b] = 'customer'
+                relationships[b, a] = 'provider'
+            else:
+                relationships[a, b] = relationships[b, a] = 'peer'
+    return list(neighbors.items()), relationships
+
 # ==================== PART 4: IS-IS ====================
 class ISISRouter:
-    """IS-IS Router using link-state approach"""
-    def __init__(self, router_id, network):
+    """IS-IS Router using link-state approach. With an LSDBStore the lsdb
+    is a view into it instead of a private dict."""
+    def __init__(self, router_id, network, store=None):
         self.router_id = router_id
         self.network = network
-        self.lsdb = {}  # Link State Database
+        self.lsdb = store.view() if store is not None else {}  # Link State Database
         self.routing_table = {}
+        self.next_hops = {}  # dest -> tuple of equal-cost first hops
+        self.flow_salt = flow_hash(router_id)
+        self.seq_num = 0
+        self._spf = None  # IncrementalSPF kept by update_spf
     
     def build_pdu(self):
         """Build PDU (Protocol Data Unit)"""
         pdu = {
             'router': self.router_id,
-            'seq_num': 0,
+            'seq_num': self.seq_num,
             'adjacencies': {}
         }
         for neighbor in self.network.get_neighbors(self.router_id):
@@ -335,52 +1040,61 @@ class ISISRouter:
     def receive_pdu(self, pdu):
         """Receive and process PDU"""
         router = pdu['router']
-        if router not in self.lsdb or \
-           pdu['seq_num'] > self.lsdb[router].get('seq_num', -1):
+        current = self.lsdb.get(router)
+        if current is None or pdu['seq_num'] > current.get('seq_num', -1):
             self.lsdb[router] = pdu
             return True
         return False
     
     def compute_spf(self):
-        """SPF computation (Dijkstra)"""
-        dist = {r: float('inf') for r in self.network.routers}
-        dist[self.router_id] = 0
-        prev = {r: None for r in self.network.routers}
-        visited = set()
-        pq = [(0, self.router_id)]
-        
-        while pq:
-            d, u = heapq.heappop(pq)
-            if u in visited:
-                continue
-            visited.add(u)
-            
-            if u in self.lsdb:
-                for neighbor, metric in self.lsdb[u]['adjacencies'].items():
-                    if neighbor not in visited:
-                        new_dist = dist[u] + metric
-                        if new_dist < dist[neighbor]:
-                            dist[neighbor] = new_dist
-                            prev[neighbor] = u
-                            heapq.heappush(pq, (new_dist, neighbor))
-        
-        self.routing_table = {r: (dist[r], prev[r]) for r in self.network.routers}
+        """SPF computation (Dijkstra) with ECMP next hops"""
+        self._spf = None  # see OSPFRouter.compute_shortest_paths
+        self.next_hops = {}
+        self.routing_table = spf_table(self.router_id, self.lsdb, 'adjacencies', self.network.routers,
+                                       self.next_hops)
+    
+    def next_hop(self, dest, flow):
+        """One of the equal-cost first hops towards dest, by flow hash"""
+        return flow_next_hop(self.next_hops.get(dest), flow, self.flow_salt)
+    
+    def update_spf(self, changed_routers):
+        """Incremental SPF (partial route calculation) after the PDUs of
+        changed_routers changed; see OSPFRouter.update_spf"""
+        self.next_hops = {}
+        if self._spf is None:
+            links = {r: pdu['adjacencies'] for r, pdu in self.lsdb.items()}
+            self._spf = IncrementalSPF(self.router_id, links)
+            self.routing_table = {r: self._spf.entry(r) for r in self.network.routers}
+            return
+        for router in changed_routers:
+            pdu = self.lsdb.get(router)
+            for node in self._spf.update(router, pdu['adjacencies'] if pdu else {}):
+                self.routing_table[node] = self._spf.entry(node)
 
 class ISISSimulation:
     """Simulate IS-IS protocol"""
     def __init__(self, network):
         self.network = network
-        self.routers = {r: ISISRouter(r, network) for r in network.routers}
+        self.store = LSDBStore()  # every router's lsdb is a view into it
+        self.routers = {r: ISISRouter(r, network, self.store) for r in network.routers}
         self.message_count = 0
     
-    def simulate(self):
-        """Run IS-IS simulation"""
-        print("\n" + "=" * 60)
-        print("IS-IS (Intermediate System to Intermediate System) Simulation")
-        print("=" * 60)
+    def simulate(self, spf="dijkstra", verbose=True, workers=None):
+        """Run IS-IS simulation.
+        spf="scipy" fills every router's routing_table from one all_pairs_spf
+        call (compiled Dijkstra over a CSR matrix of the topology) instead of
+        running a Python Dijkstra per router. spf="parallel" runs the
+        per-router Dijkstras on a pool of `workers` processes."""
+        if spf not in ("dijkstra", "scipy", "parallel"):
+            raise ValueError(f"Unknown SPF engine: {spf}")
+        if verbose:
+            print("\n" + "=" * 60)
+            print("IS-IS (Intermediate System to Intermediate System) Simulation")
+            print("=" * 60)
         
         # Phase 1: PDU Flooding
-        print("\n--- Phase 1: PDU Flooding ---")
+        if verbose:
+            print("\n--- Phase 1: PDU Flooding ---")
         all_pdus = {r: self.routers[r].build_pdu() for r in self.network.routers}
         
         for router_id, router in self.routers.items():
@@ -391,18 +1105,42 @@ class ISISSimulation:
                 if self.routers[neighbor_id].receive_pdu(own_pdu):
                     self.message_count += 1
         
-        # Propagate all PDUs
-        for router in self.routers.values():
-            for pdu in all_pdus.values():
-                router.receive_pdu(pdu)
+        # Propagate all PDUs: one shared copy in the store
+        for pdu in all_pdus.values():
+            self.store.publish(pdu)
         
         # Phase 2: SPF Computation
-        print("--- Phase 2: SPF Computation ---")
-        for router in self.routers.values():
-            router.compute_spf()
+        if verbose:
+            print("--- Phase 2: SPF Computation ---")
+        if spf != "dijkstra":
+            if spf == "scipy":
+                tables = all_pairs_spf(self.network.graph, sorted(self.network.routers))
+            else:
+                tables = parallel_spf(self.network.graph, sorted(self.network.routers), workers=workers)
+            for router_id, router in self.routers.items():
+                router.routing_table = tables[router_id]
+                router._spf = None
+        else:
+            for router in self.routers.values():
+                router.compute_spf()
         
-        print(f"Total PDU messages: {self.message_count}")
-        self.display_final_tables()
+        if verbose:
+            print(f"Total PDU messages: {self.message_count}")
+            self.display_final_tables()
+    
+    def reoriginate(self, router_ids, incremental=True):
+        """Routers in router_ids saw their adjacencies change: each issues a
+        new PDU, every router installs it, then reruns SPF incrementally or
+        in full"""
+        for router_id in router_ids:
+            origin = self.routers[router_id]
+            origin.seq_num += 1
+            self.store.publish(origin.build_pdu())
+        for router in self.routers.values():
+            if incremental:
+                router.update_spf(router_ids)
+            else:
+                router.compute_spf()
     
     def display_final_tables(self):
         """Display final routing tables"""
@@ -412,10 +1150,12 @@ class ISISSimulation:
         for router_id in sorted(self.routers.keys()):
             print(f"\nRouter {router_id}:")
             table = self.routers[router_id].routing_table
+            next_hops = self.routers[router_id].next_hops
             for dest in sorted(table.keys()):
                 dist, prev_hop = table[dest]
                 if dist != float('inf'):
-                    print(f"  {dest}: Distance={dist}, Previous Hop={prev_hop}")
+                    hops = f", Next Hops={','.join(next_hops[dest])}" if dest in next_hops else ""
+                    print(f"  {dest}: Distance={dist}, Previous Hop={prev_hop}{hops}")
 
 # ==================== MAIN SIMULATION ====================
 if __name__ == "__main__":
@@ -443,6 +1183,33 @@ if __name__ == "__main__":
     rip_sim.simulate(max_iterations=10)
     rip_sim.display_final_tables()
     
+    rip_delta = RIPSimulation(network)
+    rip_delta.simulate(max_iterations=10, updates="delta", verbose=False)
+    assert all(rip_delta.routers[r].routing_table == rip_sim.routers[r].routing_table
+               for r in network.routers)
+    print(f"\nDelta updates: same tables after {rip_delta.iteration + 1} rounds, "
+          f"{rip_delta.message_count} messages / {rip_delta.byte_count} bytes "
+          f"vs {rip_sim.message_count} / {rip_sim.byte_count} with full tables")
+    
+    rip_events = RIPSimulation(network)
+    rip_events.simulate_event_driven(verbose=False)
+    assert all(rip_events.routers[r].routing_table == rip_sim.routers[r].routing_table
+               for r in network.routers)
+    print(f"Event-driven: same tables after {rip_events.events} events, "
+          f"{rip_events.message_count} messages / {rip_events.byte_count} bytes")
+    
+    # Link failure with hop-count infinity, poison reverse and hold-down
+    dynamic_net = Network()
+    for r1, r2, cost in [('A', 'B', 1), ('A', 'C', 4), ('B', 'C', 2), ('B', 'D', 5),
+                         ('C', 'D', 1), ('D', 'E', 3)]:
+        dynamic_net.add_link(r1, r2, cost)
+    rip_dynamic = RIPSimulation(dynamic_net, infinity=RIP_INFINITY, poison_reverse=True, hold_down=2)
+    rip_dynamic.simulate_event_driven(verbose=False)
+    rip_dynamic.link_down('C', 'D')
+    result = rip_dynamic.run_until_stable()
+    print(f"Link C-D down: reconverged in {result['converge_ticks']} ticks, "
+          f"{result['messages']} messages; A->E now {rip_dynamic.routers['A'].routing_table['E']}")
+    
     # Part 2: OSPF
     ospf_sim = OSPFSimulation(network)
     ospf_sim.simulate()
@@ -0,0 +1,624 @@
+# benchmarks.py
+import argparse
+import os
+import resource
+import random
+import time
+import tracemalloc
+
+from asst import (RIP_INFINITY, BGPSimulation, LSAFlooding, Network, OSPFRouter, OSPFSimulation, RIPSimulation,
+                  load_as_relationships)
+from hierarchy import BACKBONE, ISISLevelSimulation, OSPFAreaSimulation
+from spf import all_pairs_spf, parallel_spf, spf_table
+
+
+def random_network(n, avg_degree=4, max_cost=10, seed=1, prefix="R", network=None):
+    """Connected random topology: a random spanning tree plus extra links
+    until the average degree is reached. Routers are named R0..R{n-1}
+    (prefix0.. with another prefix); links are added to network if given."""
+    rng = random.Random(seed)
+    names = [f"{prefix}{i}" for i in range(n)]
+    network = Network() if network is None else network
+    for i in range(1, n):
+        network.add_link(names[i], names[rng.randrange(i)], rng.randint(1, max_cost))
+    extra = max(0, n * avg_degree // 2 - (n - 1))
+    while extra:
+        a, b = rng.sample(names, 2)
+        if b not in network.graph[a]:
+            network.add_link(a, b, rng.randint(1, max_cost))
+            extra -= 1
+    return network
+
+
+def bench_rip_updates(sizes=(200, 1_000, 2_000)):
+    """Full-table broadcasts vs triggered delta updates: messages, bytes,
+    runtime, and what the delta mode saves per round."""
+    print("=" * 72)
+    print("RIP: full-table broadcast vs versioned delta updates")
+    print("=" * 72)
+    for n in sizes:
+        network = random_network(n)
+        delta = RIPSimulation(network)
+        start = time.perf_counter()
+        delta.simulate(max_iterations=10 * n, updates="delta", verbose=False)
+        delta_time = time.perf_counter() - start
+        rounds = delta.iteration + 1
+
+        full = RIPSimulation(network)
+        start = time.perf_counter()
+        full.simulate(max_iterations=rounds, updates="full", verbose=False)
+        full_time = time.perf_counter() - start
+        assert all(full.routers[r].routing_table == delta.routers[r].routing_table
+                   for r in network.routers)
+
+        print(f"\n{n} routers, {sum(map(len, network.graph.values())) // 2} links, {rounds} rounds")
+        print(f"  full : {full.message_count:>10,} msgs {full.byte_count / 1e6:>10.1f} MB {full_time:>8.2f} s")
+        print(f"  delta: {delta.message_count:>10,} msgs {delta.byte_count / 1e6:>10.1f} MB {delta_time:>8.2f} s")
+        print(f"  {'round':>5} {'msgs':>9} {'msgs saved':>11} {'KB':>9} {'KB saved':>10}")
+        for st in delta.round_stats:
+            print(f"  {st['round']:>5} {st['messages']:>9,} {st['messages_saved']:>11,} "
+                  f"{st['bytes'] / 1e3:>9,.0f} {st['bytes_saved'] / 1e3:>10,.0f}")
+
+
+def bench_rip_convergence(sizes=(1_000, 2_000, 5_000), full_limit=2_000):
+    """Round-based loop (full tables, then deltas) vs the event-driven
+    worklist engine: messages, bytes and wall time to convergence. Full-table
+    rounds are skipped above full_limit routers."""
+    print("=" * 72)
+    print("RIP convergence: round-based loop vs event-driven worklist")
+    print("=" * 72)
+    for n in sizes:
+        network = random_network(n)
+        print(f"\n{n} routers, {sum(map(len, network.graph.values())) // 2} links")
+        print(f"  {'engine':<22}{'rounds/events':>14}{'messages':>12}{'MB':>9}{'time (s)':>10}")
+        runs = [("rounds, delta", "delta")]
+        if n <= full_limit:
+            runs.insert(0, ("rounds, full tables", "full"))
+        reference = None
+        for name, updates in runs:
+            sim = RIPSimulation(network)
+            start = time.perf_counter()
+            sim.simulate(max_iterations=10 * n, updates=updates, verbose=False)
+            elapsed = time.perf_counter() - start
+            reference = reference or sim
+            print(f"  {name:<22}{sim.iteration + 1:>14,}{sim.message_count:>12,}"
+                  f"{sim.byte_count / 1e6:>9.1f}{elapsed:>10.2f}")
+        sim = RIPSimulation(network)
+        start = time.perf_counter()
+        sim.simulate_event_driven(verbose=False)
+        elapsed = time.perf_counter() - start
+        assert all(sim.routers[r].routing_table[d][0] == reference.routers[r].routing_table[d][0]
+                   for r in network.routers for d in network.routers)  # ties may pick other hops
+        print(f"  {'event-driven worklist':<22}{sim.events:>14,}{sim.message_count:>12,}"
+              f"{sim.byte_count / 1e6:>9.1f}{elapsed:>10.2f}")
+
+
+def bench_rip_failures(sizes=(1_000, 2_000), failures=10, avg_degree=3, seed=2):
+    """Fail random links on a converged hop-count network (infinity 16), then
+    restore them; ticks to reconverge and messages/bytes spent, for plain
+    RIP, split horizon, poison reverse, and poison reverse + hold-down."""
+    configs = [
+        ("plain", {}),
+        ("split horizon", {"split_horizon": True}),
+        ("poison reverse", {"poison_reverse": True}),
+        ("poison + hold-down 5", {"poison_reverse": True, "hold_down": 5}),
+    ]
+    print("=" * 72)
+    print(f"RIP reconvergence after {failures} link failures (infinity {RIP_INFINITY})")
+    print("=" * 72)
+    for n in sizes:
+        print(f"\n{n} routers, avg degree {avg_degree}, unit costs")
+        print(f"  {'variant':<22}{'event':>8}{'ticks':>7}{'messages':>11}{'MB':>8}{'time (s)':>10}")
+        for name, options in configs:
+            network = random_network(n, avg_degree=avg_degree, max_cost=1, seed=seed)
+            sim = RIPSimulation(network, infinity=RIP_INFINITY, **options)
+            sim.simulate_event_driven(verbose=False)
+            links = sorted({tuple(sorted((a, b))) for a in network.graph for b in network.graph[a]})
+            failed = random.Random(seed).sample(links, failures)
+            for event in ("down", "up"):
+                for a, b in failed:
+                    if event == "down":
+                        sim.link_down(a, b)
+                    else:
+                        sim.link_up(a, b)
+                start = time.perf_counter()
+                result = sim.run_until_stable()
+                elapsed = time.perf_counter() - start
+                print(f"  {name:<22}{event:>8}{result['converge_ticks']:>7}{result['messages']:>11,}"
+                      f"{result['bytes'] / 1e6:>8.1f}{elapsed:>10.2f}")
+
+
+def hierarchical_network(n_areas, area_size, abrs=2, avg_degree=4, seed=1):
+    """n_areas random areas of area_size routers (A<area>R<i>, areas 1..n)
+    whose first `abrs` routers are ABRs / L1L2 routers, joined by a random
+    connected backbone of links between ABRs of different areas. Returns
+    (network, OSPF areas, IS-IS areas, IS-IS levels)."""
+    rng = random.Random(seed)
+    network = Network()
+    ospf_areas, isis_areas, levels = {}, {}, {}
+    borders = []
+    for area in range(1, n_areas + 1):
+        random_network(area_size, avg_degree, seed=seed * 7919 + area, prefix=f"A{area}R", network=network)
+        for i in range(area_size):
+            name = f"A{area}R{i}"
+            border = i < abrs
+            ospf_areas[name] = (area, BACKBONE) if border else area
+            isis_areas[name] = area
+            levels[name] = "L1L2" if border else "L1"
+            if border:
+                borders.append(name)
+    # each ABR links to a random ABR of an earlier area (a spanning tree),
+    # plus extra backbone links up to about three per ABR
+    for i in range(abrs, len(borders)):
+        network.add_link(borders[i], borders[rng.randrange(i - i % abrs)], rng.randint(1, 10))
+    for _ in range(len(borders)):
+        a, b = rng.sample(borders, 2)
+        if ospf_areas[a][0] != ospf_areas[b][0]:
+            network.add_link(a, b, rng.randint(1, 10))
+    return network, ospf_areas, isis_areas, levels
+
+
+def fat_tree(k):
+    """k-ary fat-tree of switches (k even): (k/2)^2 cores C<i>, and k pods
+    of k/2 aggregation P<p>A<j> and k/2 edge P<p>E<j> switches, every link
+    cost 1. 5k^2/4 switches, k^3/2 links."""
+    half = k // 2
+    network = Network()
+    for p in range(k):
+        for j in range(half):
+            for e in range(half):
+                network.add_link(f"P{p}E{e}", f"P{p}A{j}")
+            for c in range(half):
+                network.add_link(f"P{p}A{j}", f"C{j * half + c}")
+    return network
+
+
+def caida_like_topology(n, tier1=15, transit_fraction=0.15, transit_peers=10, seed=1):
+    """Synthetic AS graph shaped like CAIDA's AS-relationship data: a
+    peering clique of tier-1 ASes, transit ASes with 1-3 providers picked
+    by preferential attachment and about transit_peers peers each, and
+    stub ASes (the rest) with 1-3 providers. ASes are numbered 1..n.
+    Returns (as_topology, relationships) for BGPSimulation."""
+    rng = random.Random(seed)
+    neighbors = {a: [] for a in range(1, n + 1)}
+    relationships = {}
+
+    def link(a, b, role):  # role of b as seen from a
+        neighbors[a].append(b)
+        neighbors[b].append(a)
+        relationships[a, b] = role
+        relationships[b, a] = {'customer': 'provider', 'provider': 'customer', 'peer': 'peer'}[role]
+
+    transit_end = tier1 + int(n * transit_fraction)
+    for a in range(1, tier1 + 1):
+        for b in range(a + 1, tier1 + 1):
+            link(a, b, 'peer')
+    attach = list(range(1, tier1 + 1))  # one entry per customer (+1), for preferential attachment
+    for a in range(tier1 + 1, n + 1):
+        providers = set()
+        for _ in range(rng.choice((1, 1, 2, 2, 3))):
+            providers.add(rng.choice(attach))
+        for p in providers:
+            link(p, a, 'customer')
+            attach.append(p)
+        if a <= transit_end:
+            attach.append(a)
+    transit = list(range(tier1 + 1, transit_end + 1))
+    for _ in range(len(transit) * transit_peers // 2):
+        a, b = rng.sample(transit, 2)
+        if (a, b) not in relationships:
+            link(a, b, 'peer')
+    return list(neighbors.items()), relationships
+
+
+def bench_spf_flaps(sizes=(1_000, 10_000), flaps=200, full_runs=10, seed=3):
+    """Per-flap SPF cost at one OSPF router: a random link goes down and
+    comes back (two LSA changes each way); incremental update_spf vs a
+    full compute_shortest_paths."""
+    print("=" * 72)
+    print(f"SPF per link flap: incremental vs full Dijkstra ({flaps} flaps)")
+    print("=" * 72)
+    for n in sizes:
+        network = random_network(n, seed=seed)
+        router = OSPFRouter("R0", network)
+        for r in network.routers:
+            router.receive_lsa(OSPFRouter(r, network).build_lsa())
+        router.update_spf(())
+        rng = random.Random(seed)
+        links = sorted({tuple(sorted((a, b))) for a in network.graph for b in network.graph[a]})
+        seq = 0
+
+        def flap_lsas(a, b):
+            nonlocal seq
+            seq += 1
+            for r in (a, b):
+                lsa = OSPFRouter(r, network).build_lsa()
+                lsa['seq_num'] = seq
+                router.receive_lsa(lsa)
+
+        incremental = 0.0
+        for a, b in rng.sample(links, flaps):
+            for change in (network.link_down, network.link_up):
+                change(a, b)
+                flap_lsas(a, b)
+                start = time.perf_counter()
+                router.update_spf((a, b))
+                incremental += time.perf_counter() - start
+        touched = router._spf.touched
+        incremental /= 2 * flaps
+
+        start = time.perf_counter()
+        for _ in range(full_runs):
+            router.compute_shortest_paths()
+        full = (time.perf_counter() - start) / full_runs
+
+        # mixing full and incremental runs: update_spf must not patch a tree
+        # built before LSA changes that only a full SPF saw
+        for i, (a, b) in enumerate(rng.sample(links, 20)):
+            network.link_down(a, b) if i % 2 else network.set_cost(a, b, rng.randint(1, 10))
+            flap_lsas(a, b)
+            if i % 3:
+                router.update_spf((a, b))
+            else:
+                router.compute_shortest_paths()
+            expected = spf_table(router.router_id, router.link_state_db, 'links', network.routers)
+            assert all(router.routing_table[d][0] == expected[d][0] for d in network.routers)
+
+        print(f"\n{n} routers, {len(links)} links")
+        print(f"  full Dijkstra : {full * 1000:>9.3f} ms per LSA change")
+        print(f"  incremental   : {incremental * 1000:>9.3f} ms per LSA change "
+              f"({full / incremental:,.0f}x faster, {touched / (2 * flaps):.1f} nodes touched on average)")
+
+
+def bench_all_pairs(sizes=(1_000, 5_000), sample=50, seed=3):
+    """Every router's routing table: Python Dijkstra per router (timed on a
+    sample and extrapolated) vs one all_pairs_spf call over a CSR matrix,
+    then a whole OSPFSimulation.simulate(spf="scipy", flooding="instant")."""
+    print("=" * 72)
+    print("All-routers SPF: per-router Python Dijkstra vs SciPy csgraph")
+    print("=" * 72)
+    for n in sizes:
+        network = random_network(n, seed=seed)
+        lsdb = {r: OSPFRouter(r, network).build_lsa() for r in network.routers}
+        routers = sorted(network.routers)
+        sampled = random.Random(seed).sample(routers, min(sample, n))
+        start = time.perf_counter()
+        for r in sampled:
+            router = OSPFRouter(r, network)
+            router.link_state_db = lsdb
+            router.compute_shortest_paths()
+        python_total = (time.perf_counter() - start) / len(sampled) * n
+
+        start = time.perf_counter()
+        tables = all_pairs_spf(network.graph, routers)
+        scipy_total = time.perf_counter() - start
+        assert tables[sampled[-1]].keys() == router.routing_table.keys()
+        assert all(tables[sampled[-1]][d][0] == router.routing_table[d][0] for d in routers)
+
+        sim = OSPFSimulation(network)
+        start = time.perf_counter()
+        sim.simulate(spf="scipy", verbose=False, flooding="instant")
+        simulate_total = time.perf_counter() - start
+        print(f"\n{n} routers, {sum(map(len, network.graph.values())) // 2} links")
+        print(f"  Python Dijkstra per router : {python_total:>8.2f} s (extrapolated from {len(sampled)})")
+        print(f"  all_pairs_spf (SciPy)      : {scipy_total:>8.2f} s ({python_total / scipy_total:.0f}x)")
+        print(f"  OSPFSimulation, spf=scipy  : {simulate_total:>8.2f} s including LSA distribution")
+
+
+def bench_flooding(sizes=(1_000, 10_000), full_limit=2_000, flaps=20, seed=4):
+    """Hop-by-hop LSA flooding with LSAFlooding (1 ms links). Networks up
+    to full_limit routers flood every router's LSA from empty LSDBs; every
+    size then floods the two new LSAs of each link going down and back up.
+    Reports Link State Update packets, LSA copies, duplicates and the
+    simulated time until the last LSDB changed."""
+    print("=" * 72)
+    print("LSA flooding: messages and time to LSDB consistency")
+    print("=" * 72)
+    for n in sizes:
+        network = random_network(n, seed=seed)
+        links = sorted({tuple(sorted((a, b))) for a in network.graph for b in network.graph[a]})
+        print(f"\n{n} routers, {len(links)} links")
+        print(f"  {'flood':<24}{'packets':>11}{'LSA copies':>13}{'duplicates':>13}{'sync (ms)':>11}{'time (s)':>10}")
+        if n <= full_limit:
+            flooding = LSAFlooding(OSPFSimulation(network))
+            start = time.perf_counter()
+            for r in network.routers:
+                flooding.originate(r)
+            stats = flooding.run()
+            elapsed = time.perf_counter() - start
+            assert flooding.consistent()
+            print(f"  {'all LSAs, empty LSDBs':<24}{stats['packets']:>11,}{stats['transmissions']:>13,}"
+                  f"{stats['duplicates']:>13,}{stats['last_install'] * 1000:>11.1f}{elapsed:>10.2f}")
+
+        # LSDBs start out holding only the LSAs being flooded, which keeps
+        # 10k-router runs small; flooding a change does not read the rest.
+        flooding = LSAFlooding(OSPFSimulation(network))
+        rng = random.Random(seed)
+        packets = transmissions = duplicates = 0
+        sync = elapsed = 0.0
+        for a, b in rng.sample(links, flaps):
+            for change in (network.link_down, network.link_up):
+                change(a, b)
+                before = flooding.stats()
+                start = time.perf_counter()
+                began = flooding.now
+                flooding.originate(a)
+                flooding.originate(b)
+                stats = flooding.run()
+                elapsed += time.perf_counter() - start
+                packets += stats['packets'] - before['packets']
+                transmissions += stats['transmissions'] - before['transmissions']
+                duplicates += stats['duplicates'] - before['duplicates']
+                sync += stats['last_install'] - began
+        assert flooding.consistent()
+        events = 2 * flaps
+        print(f"  {'per link change':<24}{packets / events:>11,.0f}{transmissions / events:>13,.0f}"
+              f"{duplicates / events:>13,.0f}{sync / events * 1000:>11.1f}{elapsed / events:>10.3f}")
+
+
+def bench_lsdb_memory(sizes=(250, 500, 1_000, 2_000), flood_limit=1_000, sample=20, seed=5):
+    """LSDB memory (tracemalloc) for n routers holding all n LSAs: a private
+    dict per router vs views into one LSDBStore, after publish() and, up to
+    flood_limit routers, at the peak of a hop-by-hop flood and after
+    consolidate(). Also times the shared spf_table kernel on both."""
+    print("=" * 72)
+    print("LSDB memory: private dict per router vs shared LSDBStore")
+    print("=" * 72)
+    print(f"  {'routers':>8}{'private MB':>12}{'shared MB':>11}{'flood peak MB':>15}"
+          f"{'consolidated MB':>17}{'SPF ms private/shared':>24}")
+    for n in sizes:
+        network = random_network(n, seed=seed)
+        names = sorted(network.routers)
+        lsas = [OSPFRouter(r, network).build_lsa() for r in names]
+
+        tracemalloc.start()
+        private = [OSPFRouter(r, network) for r in names]
+        for router in private:
+            for lsa in lsas:
+                router.receive_lsa(lsa)
+        private_mb = tracemalloc.get_traced_memory()[0] / 1e6
+        tracemalloc.stop()
+
+        tracemalloc.start()
+        sim = OSPFSimulation(network)
+        for lsa in lsas:
+            sim.store.publish(lsa)
+        shared_mb = tracemalloc.get_traced_memory()[0] / 1e6
+        tracemalloc.stop()
+
+        flood = "-"
+        consolidated = "-"
+        if n <= flood_limit:
+            tracemalloc.start()
+            flooded = OSPFSimulation(network)
+            flooding = LSAFlooding(flooded)
+            for r in names:
+                flooding.originate(r)
+            flooding.run()
+            flooding = None
+            flood = f"{tracemalloc.get_traced_memory()[1] / 1e6:.1f}"
+            flooded.store.consolidate()
+            consolidated = f"{tracemalloc.get_traced_memory()[0] / 1e6:.1f}"
+            tracemalloc.stop()
+            flooded = None
+
+        timings = []
+        for routers in (private, [sim.routers[r] for r in names]):
+            start = time.perf_counter()
+            for router in routers[:sample]:
+                router.compute_shortest_paths()
+            timings.append((time.perf_counter() - start) / sample * 1000)
+        assert private[0].routing_table == sim.routers[names[0]].routing_table
+        private = None
+        print(f"  {n:>8}{private_mb:>12.1f}{shared_mb:>11.1f}{flood:>15}{consolidated:>17}"
+              f"{timings[0]:>14.2f} / {timings[1]:<7.2f}")
+
+
+def bench_hierarchy(sizes=(2_000, 10_000), area_size=200, abrs=2, sample=20, seed=6):
+    """SPF time and LSDB size per router: flat OSPF (every router's SPF
+    over all routers) vs OSPF areas and IS-IS levels, each with per-router
+    summaries and with one summary per area. Per-router times are averaged
+    over `sample` non-border routers; the total adds the ABR / L1L2 work
+    done in originate() and for the border routers' own tables."""
+    print("=" * 72)
+    print(f"Hierarchical link state: {area_size}-router areas, {abrs} border routers each")
+    print("=" * 72)
+    for n in sizes:
+        network, ospf_areas, isis_areas, levels = hierarchical_network(n // area_size, area_size, abrs, seed=seed)
+        names = sorted(network.routers)
+        border_routers = [r for r in names if levels[r] != "L1"]
+        internal = random.Random(seed).sample([r for r in names if levels[r] == "L1"], sample)
+        print(f"\n{n} routers, {sum(map(len, network.graph.values())) // 2} links, {n // area_size} areas")
+        print(f"  {'mode':<26}{'LSDB entries/router':>20}{'SPF ms/router':>15}{'total SPF s':>13}")
+
+        lsdb = {r: OSPFRouter(r, network).build_lsa() for r in names}
+        start = time.perf_counter()
+        for r in internal:
+            spf_table(r, lsdb, 'links', names)
+        per_router = (time.perf_counter() - start) / sample
+        print(f"  {'flat':<26}{n:>20,.0f}{per_router * 1000:>15.2f}{per_router * n:>13.2f}")
+
+        for label, make in (("OSPF areas", lambda s: OSPFAreaSimulation(network, ospf_areas, summarize=s)),
+                            ("IS-IS levels", lambda s: ISISLevelSimulation(network, isis_areas, levels,
+                                                                            summarize=s))):
+            for summarize in (False, True):
+                sim = make(summarize)
+                start = time.perf_counter()
+                sim.originate()
+                for r in border_routers:
+                    sim.compute_routes(r)
+                border_time = time.perf_counter() - start
+                start = time.perf_counter()
+                for r in internal:
+                    sim.compute_routes(r)
+                per_router = (time.perf_counter() - start) / sample
+                entries = sum(router.lsdb_size() for router in sim.routers.values()) / n
+                total = border_time + per_router * (n - len(border_routers))
+                mode = f"{label}{', summarized' if summarize else ''}"
+                print(f"  {mode:<26}{entries:>20,.0f}{per_router * 1000:>15.2f}{total:>13.2f}")
+                sim = None
+
+
+def bench_ecmp(ks=(16, 40, 88), flows=200_000, seed=7):
+    """ECMP on k-ary fat-trees (k=88 is ~9.7k switches): one edge switch's
+    SPF with and without next-hop sets, then flow-hash load balancing of
+    random 5-tuples to edge switches in other pods, over the edge's uplinks
+    and, for the flows sent to one aggregation switch, over its core links.
+    Spread is the busiest hop's share relative to a perfect split."""
+    print("=" * 72)
+    print("ECMP next-hop sets and flow hashing on fat-trees")
+    print("=" * 72)
+    for k in ks:
+        network = fat_tree(k)
+        routers = sorted(network.routers)
+        print(f"\nk={k}: {len(routers)} switches, {sum(map(len, network.graph.values())) // 2} links")
+        source = OSPFRouter("P0E0", network)
+        source.link_state_db = {r: {'links': network.graph[r]} for r in routers}
+        start = time.perf_counter()
+        spf_table(source.router_id, source.link_state_db, 'links', routers)
+        plain = time.perf_counter() - start
+        start = time.perf_counter()
+        source.compute_shortest_paths()
+        ecmp = time.perf_counter() - start
+        edges = [r for r in routers if "E" in r and not r.startswith("P0")]
+        widths = [len(source.next_hops[r]) for r in edges]
+        print(f"  SPF without / with next hops : {plain * 1000:8.1f} / {ecmp * 1000:.1f} ms "
+              f"({len(set(map(id, source.next_hops.values())))} distinct next-hop sets, "
+              f"{sum(widths) / len(widths):.0f} hops per remote edge)")
+
+        rng = random.Random(seed)
+        batch = [(f"10.0.{rng.randrange(256)}.{rng.randrange(256)}", f"10.{rng.randrange(256)}.{rng.randrange(256)}.1",
+                  rng.randrange(1024, 65536), 443, 6, rng.choice(edges)) for _ in range(flows)]
+        start = time.perf_counter()
+        chosen = [source.next_hop(flow[5], flow) for flow in batch]
+        per_flow = (time.perf_counter() - start) / flows
+        agg = OSPFRouter(chosen[0], network)
+        agg.link_state_db = source.link_state_db
+        agg.compute_shortest_paths()
+        through = [flow for flow, hop in zip(batch, chosen) if hop == agg.router_id]
+        for name, router, subset in (("edge uplinks", source, batch), ("agg core links", agg, through)):
+            counts = {}
+            for flow in subset:
+                hop = router.next_hop(flow[5], flow)
+                counts[hop] = counts.get(hop, 0) + 1
+            print(f"  {name:<15}: {len(subset):>7,} flows over {len(counts):>4} hops, "
+                  f"spread {max(counts.values()) * len(counts) / len(subset):.2f}x")
+        print(f"  flow hash + pick             : {per_flow * 1e6:8.2f} us per flow")
+
+
+def bench_bgp(sizes=(10_000, 75_000), prefixes=20, seed=8, as_rel=None):
+    """BGP with Gao-Rexford policies on Internet-sized AS graphs (a CAIDA
+    as-rel file, or caida_like_topology of each size): convergence for
+    a sample of originating ASes, RIB sizes and peak memory, then the
+    reconvergence after a multihomed origin loses one of its providers."""
+    print("=" * 72)
+    print("BGP convergence on AS-level topologies")
+    print("=" * 72)
+    graphs = [load_as_relationships(as_rel)] if as_rel else [caida_like_topology(n, seed=seed) for n in sizes]
+    for as_topology, relationships in graphs:
+        rng = random.Random(seed)
+        origins = rng.sample([as_id for as_id, _ in as_topology], prefixes)
+        print(f"\n{len(as_topology):,} ASes, {len(relationships) // 2:,} links, {prefixes} originating ASes")
+        start = time.perf_counter()
+        sim = BGPSimulation(as_topology, relationships, origins=origins)
+        converged = sim.simulate(iterations=1_000, verbose=False)
+        elapsed = time.perf_counter() - start
+        sizes_ = sim.rib_sizes()
+        print(f"  initial convergence : {elapsed:8.2f} s, {sim.iteration} rounds, {sim.message_count:,} UPDATEs "
+              f"({sim.announcements:,} routes, {sim.withdrawals:,} withdrawals){'' if converged else ' NOT CONVERGED'}")
+        print(f"  RIBs                : {sizes_['adj_rib_in']:,} Adj-RIB-In, {sizes_['loc_rib']:,} Loc-RIB routes, "
+              f"{sizes_['paths']:,} distinct AS paths")
+        multihomed = [o for o in origins if sum(relationships[o, n] == 'provider' for n in sim.neighbors[o]) > 1]
+        if multihomed:
+            origin = multihomed[0]
+            provider = next(n for n in sim.neighbors[origin] if relationships[origin, n] == 'provider')
+            messages, rounds = sim.message_count, sim.iteration
+            start = time.perf_counter()
+            sim.link_down(origin, provider)
+            sim.simulate(iterations=1_000, verbose=False)
+            # nothing may still be learned or sent over the torn-down session
+            down = {(origin, provider), (provider, origin)}
+            for as_id, router in sim.routers.items():
+                for path, _ in router.loc_rib.values():
+                    full = path + (as_id,)
+                    assert not down & set(zip(full, full[1:])), (as_id, full)
+            for a, b in down:
+                assert not any(b in routes for routes in sim.routers[a].adj_rib_in.values())
+                assert b not in sim.routers[a].customers and b not in sim.routers[a].import_pref
+            print(f"  {f'link {origin}-{provider} down':<20}: {time.perf_counter() - start:8.2f} s, "
+                  f"{sim.iteration - rounds} rounds, {sim.message_count - messages:,} UPDATEs")
+        print(f"  peak RSS            : {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:8.0f} MB")
+
+
+def bench_parallel_spf(sizes=(1_000, 3_000), max_workers=None, seed=3):
+    """Every router's SPF: the sequential compute_shortest_paths loop vs
+    parallel_spf with 1..max_workers processes (default: all CPUs)."""
+    max_workers = max_workers or os.cpu_count() or 1
+    counts = sorted({1, max_workers} | {w for w in (2, 4, 8, 16, 32) if w < max_workers})
+    print("=" * 72)
+    print(f"Parallel per-router SPF ({os.cpu_count()} CPUs)")
+    print("=" * 72)
+    lone = Network()
+    lone.routers.add("R0")
+    for network in (Network(), lone):  # degenerate topologies: no routers, one isolated router
+        routers = sorted(network.routers)
+        lsdb = {r: OSPFRouter(r, network).build_lsa() for r in routers}
+        for r in routers:
+            router = OSPFRouter(r, network)
+            router.link_state_db = lsdb
+            router.compute_shortest_paths()
+            assert parallel_spf(network.graph, routers, workers=1)[r] == router.routing_table
+        assert len(parallel_spf(network.graph, routers, workers=1)) == len(routers)
+    for n in sizes:
+        network = random_network(n, seed=seed)
+        routers = sorted(network.routers)
+        lsdb = {r: OSPFRouter(r, network).build_lsa() for r in routers}
+        start = time.perf_counter()
+        for r in routers:
+            router = OSPFRouter(r, network)
+            router.link_state_db = lsdb
+            router.compute_shortest_paths()
+        sequential = time.perf_counter() - start
+        print(f"\n{n} routers, {sum(map(len, network.graph.values())) // 2} links")
+        print(f"  sequential        : {sequential:>8.2f} s")
+        for workers in counts:
+            start = time.perf_counter()
+            tables = parallel_spf(network.graph, routers, workers=workers)
+            elapsed = time.perf_counter() - start
+            assert all(tables[r][d][0] == router.routing_table[d][0] for d in routers)
+            print(f"  {workers:>3} worker{'s' if workers > 1 else ' '}       : {elapsed:>8.2f} s "
+                  f"({sequential / elapsed:.2f}x)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="asst_7 routing protocol benchmarks")
+    parser.add_argument("bench", choices=["rip-updates", "rip-convergence", "rip-failures", "spf-flaps",
+                                          "all-pairs", "parallel-spf", "flooding",
+                                          "lsdb-memory", "hierarchy", "ecmp", "bgp"])
+    parser.add_argument("--sizes", type=int, nargs="+", default=None)
+    parser.add_argument("--workers", type=int, default=None, help="max worker processes (parallel-spf)")
+    parser.add_argument("--as-rel", default=None, help="CAIDA as-rel file, optionally .bz2 (bgp)")
+    args = parser.parse_args()
+
+    if args.bench == "rip-updates":
+        bench_rip_updates(*([args.sizes] if args.sizes else []))
+    elif args.bench == "rip-convergence":
+        bench_rip_convergence(*([args.sizes] if args.sizes else []))
+    elif args.bench == "rip-failures":
+        bench_rip_failures(*([args.sizes] if args.sizes else []))
+    elif args.bench == "spf-flaps":
+        bench_spf_flaps(*([args.sizes] if args.sizes else []))
+    elif args.bench == "all-pairs":
+        bench_all_pairs(*([args.sizes] if args.sizes else []))
+    elif args.bench == "parallel-spf":
+        bench_parallel_spf(*([args.sizes] if args.sizes else []), max_workers=args.workers)
+    elif args.bench == "flooding":
+        bench_flooding(*([args.sizes] if args.sizes else []))
+    elif args.bench == "lsdb-memory":
+        bench_lsdb_memory(*([args.sizes] if args.sizes else []))
+    elif args.bench == "hierarchy":
+        bench_hierarchy(*([args.sizes] if args.sizes else []))
+    elif args.bench == "ecmp":
+        bench_ecmp(*([args.sizes] if args.sizes else []))
+    elif args.bench == "bgp":
+        bench_bgp(*([args.sizes] if args.sizes else []), as_rel=args.as_rel)
@@ -0,0 +1,262 @@
+from lsdb import LSDBStore
+from spf import INF, spf_table
+
+BACKBONE = 0
+LEVELS = ("L1", "L2", "L1L2")
+
+def area_range(area):
+    """Destination name of an area's summarized address range"""
+    return f"area {area}"
+
+class AreaRouter:
+    """Router in a hierarchical link-state domain. lsdbs holds one LSDB (a
+    view into that area's or level's LSDBStore) per area or level the
+    router takes part in."""
+    def __init__(self, router_id, areas):
+        self.router_id = router_id
+        self.areas = areas
+        self.lsdbs = {}
+        self.routing_table = {}
+
+    def lsdb_size(self):
+        return sum(len(lsdb) for lsdb in self.lsdbs.values())
+
+def _best(table, dest, dist, via):
+    if dist < table.get(dest, (INF, None))[0]:
+        table[dest] = (dist, via)
+
+class OSPFAreaSimulation:
+    """OSPF with areas. areas maps each router to its area id, or to a
+    tuple of area ids for an area border router (ABR), which must include
+    the BACKBONE. A link belongs to the area its two routers share (the
+    lowest non-backbone one if several). Routers run SPF over their own
+    area only: ABRs originate summary LSAs for what they reach into their
+    other areas (per destination, or one per area range with summarize),
+    and inter-area routes are learned over the backbone. In routing_table,
+    inter-area entries hold the ABR used instead of the previous hop."""
+    def __init__(self, network, areas, summarize=False):
+        self.network = network
+        self.summarize = summarize
+        self.routers = {}
+        self.area_routers = {}
+        for router_id in network.routers:
+            attached = areas[router_id]
+            attached = tuple(attached) if isinstance(attached, (tuple, list, set, frozenset)) else (attached,)
+            if len(attached) > 1 and BACKBONE not in attached:
+                raise ValueError(f"ABR {router_id} is not attached to the backbone")
+            self.routers[router_id] = AreaRouter(router_id, attached)
+            for area in attached:
+                self.area_routers.setdefault(area, set()).add(router_id)
+        self.area_links = {area: {} for area in self.area_routers}
+        for u, adj in network.graph.items():
+            for v, cost in adj.items():
+                shared = set(self.routers[u].areas) & set(self.routers[v].areas)
+                if not shared:
+                    raise ValueError(f"Link {u}-{v} joins routers with no area in common")
+                area = min(shared - {BACKBONE}, default=BACKBONE)
+                self.area_links[area].setdefault(u, {})[v] = cost
+        self.stores = {area: LSDBStore() for area in self.area_routers}
+        for router in self.routers.values():
+            for area in router.areas:
+                router.lsdbs[area] = self.stores[area].view()
+        # only routers with a backbone link act as ABRs (RFC 3509); others
+        # attached to several areas route like internal routers of each
+        self.abrs = [r for r in self.routers.values()
+                     if len(r.areas) > 1 and r.router_id in self.area_links[BACKBONE]]
+        self.ranges = {area_range(area) for area in self.area_routers}
+        self.summary_count = 0
+
+    def home_area(self, router_id):
+        """The area whose range covers router_id (ABRs: their non-backbone area)"""
+        areas = self.routers[router_id].areas
+        return min(set(areas) - {BACKBONE}, default=BACKBONE)
+
+    def _intra(self, router, area):
+        return spf_table(router.router_id, router.lsdbs[area], 'links', self.area_routers[area])
+
+    def _publish_summaries(self, abr, area, table, skip):
+        """abr's summary LSAs into area for every reachable destination in
+        table except those in skip"""
+        summaries = {}
+        for dest, (dist, _) in table.items():
+            if dist == INF or dest in skip or dest == abr.router_id:
+                continue
+            if self.summarize:
+                dest = dest if dest in self.ranges else area_range(self.home_area(dest))
+                if dest in skip:
+                    continue
+                dist = max(dist, summaries.get(dest, 0))  # a range costs its farthest member
+            summaries[dest] = dist
+        store = self.stores[area]
+        for dest, cost in summaries.items():
+            store.publish({'router': (abr.router_id, dest), 'seq_num': 1, 'summary': dest, 'cost': cost})
+        self.summary_count += len(summaries)
+
+    def _inter(self, router, area, intra, table):
+        """Add inter-area routes to table from the summary LSAs in router's
+        LSDB of area; intra is router's SPF table of that area"""
+        skip = set(table) | {area_range(a) for a in router.areas}
+        for origin, lsa in router.lsdbs[area].items():
+            if type(origin) is not tuple:
+                continue
+            abr, dest = origin
+            if abr == router.router_id or dest in skip:
+                continue
+            _best(table, dest, intra.get(abr, (INF, None))[0] + lsa['cost'], abr)
+
+    def originate(self):
+        """Install every area's router LSAs, then let the ABRs originate
+        summaries: their areas into the backbone, and then the backbone
+        and the other areas into each non-backbone area they attach to"""
+        for area, links in self.area_links.items():
+            store = self.stores[area]
+            for router_id in self.area_routers[area]:
+                store.publish({'router': router_id, 'seq_num': 1, 'links': dict(links.get(router_id, {}))})
+        intra = {}
+        for abr in self.abrs:
+            for area in abr.areas:
+                intra[abr.router_id, area] = self._intra(abr, area)
+                if area != BACKBONE:
+                    self._publish_summaries(abr, BACKBONE, intra[abr.router_id, area], {area_range(BACKBONE)})
+        for abr in self.abrs:
+            table = {}
+            for area in abr.areas:
+                for dest, entry in intra[abr.router_id, area].items():
+                    _best(table, dest, *entry)
+            self._inter(abr, BACKBONE, intra[abr.router_id, BACKBONE], table)
+            abr.routing_table = table
+            for area in abr.areas:
+                if area != BACKBONE:
+                    self._publish_summaries(abr, area, table, self.area_routers[area] | {area_range(area)})
+
+    def compute_routes(self, router_id):
+        """routing_table of a non-ABR router: SPF over its area plus the
+        summaries its ABRs originated into it (ABRs get theirs in originate)"""
+        router = self.routers[router_id]
+        if router in self.abrs:
+            return router.routing_table
+        table = {}
+        intra = {area: self._intra(router, area) for area in router.areas}
+        for area_table in intra.values():
+            for dest, entry in area_table.items():
+                if dest not in table or entry[0] < table[dest][0]:
+                    table[dest] = entry
+        for area in router.areas:
+            self._inter(router, area, intra[area], table)
+        router.routing_table = table
+        return table
+
+    def simulate(self, verbose=True):
+        self.originate()
+        for router_id in self.routers:
+            self.compute_routes(router_id)
+        if verbose:
+            sizes = [router.lsdb_size() for router in self.routers.values()]
+            print(f"{len(self.area_routers)} areas, {len(self.abrs)} ABRs, {self.summary_count} summary LSAs; "
+                  f"LSDB entries per router: {sum(sizes) / len(sizes):.0f} on average, {max(sizes)} at most")
+
+class ISISLevelSimulation:
+    """IS-IS with levels. areas maps each router to its area and levels to
+    "L1", "L2" or "L1L2". L1 adjacencies join L1-capable routers of the same
+    area, L2 adjacencies any two L2-capable routers. Each area has its own
+    L1 LSDB and there is one L2 LSDB. L1L2 routers advertise the routes of
+    their area into L2 (one prefix per area with summarize); L1-only routers
+    know their area and a 'default' route to the nearest attached L1L2
+    router."""
+    def __init__(self, network, areas, levels, summarize=False):
+        self.network = network
+        self.summarize = summarize
+        self.areas = areas
+        self.levels = levels
+        self.routers = {}
+        self.l1_routers = {}
+        self.l2_routers = set()
+        for router_id in network.routers:
+            level = levels[router_id]
+            if level not in LEVELS:
+                raise ValueError(f"Unknown IS-IS level for {router_id}: {level}")
+            self.routers[router_id] = AreaRouter(router_id, (areas[router_id],))
+            if level != "L2":
+                self.l1_routers.setdefault(areas[router_id], set()).add(router_id)
+            if level != "L1":
+                self.l2_routers.add(router_id)
+        self.l1_stores = {area: LSDBStore() for area in self.l1_routers}
+        self.l2_store = LSDBStore()
+        for router_id, router in self.routers.items():
+            if levels[router_id] != "L2":
+                router.lsdbs["L1"] = self.l1_stores[areas[router_id]].view()
+            if levels[router_id] != "L1":
+                router.lsdbs["L2"] = self.l2_store.view()
+
+    def _adjacencies(self, router_id, level):
+        areas, levels = self.areas, self.levels
+        adjacencies = {}
+        for neighbor, metric in self.network.graph[router_id].items():
+            if level == "L1":
+                if levels[neighbor] != "L2" and areas[neighbor] == areas[router_id]:
+                    adjacencies[neighbor] = metric
+            elif levels[neighbor] != "L1":
+                adjacencies[neighbor] = metric
+        return adjacencies
+
+    def originate(self):
+        """L1 LSPs per area, then L2 LSPs, where L1L2 routers carry their
+        area's L1 routes as prefixes"""
+        for area, members in self.l1_routers.items():
+            store = self.l1_stores[area]
+            for router_id in members:
+                attached = self.levels[router_id] == "L1L2" and bool(self._adjacencies(router_id, "L2"))
+                store.publish({'router': router_id, 'seq_num': 1, 'attached': attached,
+                               'adjacencies': self._adjacencies(router_id, "L1")})
+        for router_id in self.l2_routers:
+            prefixes = {}
+            if self.levels[router_id] == "L1L2":
+                router = self.routers[router_id]
+                area = self.areas[router_id]
+                table = spf_table(router_id, router.lsdbs["L1"], 'adjacencies', self.l1_routers[area])
+                reachable = {dest: dist for dest, (dist, _) in table.items()
+                             if dist != INF and dest != router_id}
+                if self.summarize and reachable:
+                    prefixes = {area_range(area): max(reachable.values())}
+                elif not self.summarize:
+                    prefixes = reachable
+            self.l2_store.publish({'router': router_id, 'seq_num': 1, 'prefixes': prefixes,
+                                   'adjacencies': self._adjacencies(router_id, "L2")})
+
+    def compute_routes(self, router_id):
+        router = self.routers[router_id]
+        level = self.levels[router_id]
+        table = {}
+        if level != "L2":
+            l1 = router.lsdbs["L1"]
+            table = spf_table(router_id, l1, 'adjacencies', self.l1_routers[self.areas[router_id]])
+            if level == "L1":
+                for dest, (dist, _) in list(table.items()):
+                    lsp = l1.get(dest)
+                    if lsp is not None and lsp['attached']:
+                        _best(table, 'default', dist, dest)
+        if level != "L1":
+            l2 = router.lsdbs["L2"]
+            l2_table = spf_table(router_id, l2, 'adjacencies', self.l2_routers)
+            for dest, entry in l2_table.items():
+                if dest not in table or table[dest][0] == INF:
+                    table[dest] = entry
+            # an L1L2 router reaches its own area over L1
+            own = set(table) | {area_range(self.areas[router_id])} if level == "L1L2" else ()
+            for origin, (dist, _) in l2_table.items():
+                if dist == INF or origin == router_id:
+                    continue
+                for dest, metric in l2[origin]['prefixes'].items():
+                    if dest not in own:
+                        _best(table, dest, dist + metric, origin)
+        router.routing_table = table
+        return table
+
+    def simulate(self, verbose=True):
+        self.originate()
+        for router_id in self.routers:
+            self.compute_routes(router_id)
+        if verbose:
+            sizes = [router.lsdb_size() for router in self.routers.values()]
+            print(f"{len(self.l1_routers)} L1 areas, {len(self.l2_routers)} L2 routers; "
+                  f"LSDB entries per router: {sum(sizes) / len(sizes):.0f} on average, {max(sizes)} at most")
@@ -0,0 +1,262 @@
+from collections.abc import MutableMapping
+from types import MappingProxyType
+
+_MISSING = object()
+
+def freeze(lsa):
+    """Read-only copy of an LSA/PDU dict (nested dicts such as 'links' too)"""
+    return MappingProxyType({k: MappingProxyType(dict(v)) if isinstance(v, (dict, MappingProxyType)) else v
+                             for k, v in lsa.items()})
+
+class LSDBStore:
+    """Link-state database shared by all routers of one simulation.
+    Every LSA instance, keyed by (router, seq_num), is stored once, frozen.
+    A router's LSDB is an LSDBView: the shared `base` (the instance every
+    router holds) plus a small dict of its own overrides while it disagrees,
+    e.g. in the middle of a flood. refs counts the views holding each
+    instance; an instance nobody holds any more is dropped. consolidate()
+    moves instances held by every view into the base, so a converged
+    network needs one LSDB, not one per router.
+
+    Sharing is not free: an install in a view interns the LSA and keeps
+    override counts, which a private dict does not. Floods should hand each
+    Link State Update packet to LSDBView.install_newer and run under
+    defer_refs(), which stops keeping refs exact until the next
+    consolidate() recounts them once (superseded instances live until
+    then). Even so, a hop-by-hop flood runs about 1.3-1.5x slower than with
+    private dicts."""
+    def __init__(self):
+        self.instances = {}  # (router, seq_num) -> frozen LSA
+        self.refs = {}       # (router, seq_num) -> number of views holding it
+        self.base = {}       # router -> LSA held by views without an override
+        self.views = []
+        self.overridden = {}  # router -> number of views with an override for it
+        self.deferred = False  # refs stale until recount()
+
+    def view(self):
+        """New router LSDB, starting out as the current base"""
+        view = LSDBView(self)
+        self.views.append(view)
+        if not self.deferred:
+            for lsa in self.base.values():
+                self.refs[lsa['router'], lsa['seq_num']] += 1
+        return view
+
+    def intern(self, lsa):
+        """The shared frozen instance for this LSA"""
+        key = (lsa['router'], lsa['seq_num'])
+        frozen = self.instances.get(key)
+        if frozen is None:
+            frozen = self.instances[key] = freeze(lsa)
+            self.refs[key] = 0
+        return frozen
+
+    def _acquire(self, lsa, count=1):
+        if not self.deferred:
+            self.refs[lsa['router'], lsa['seq_num']] += count
+
+    def _release(self, lsa, count=1):
+        if self.deferred:
+            return
+        key = (lsa['router'], lsa['seq_num'])
+        self.refs[key] -= count
+        if not self.refs[key] and self.base.get(key[0]) is not lsa:
+            del self.refs[key]
+            del self.instances[key]
+
+    def publish(self, lsa):
+        """Every router installs lsa (its overrides for that router go).
+        Returns the shared instance."""
+        lsa = self.intern(lsa)
+        origin = lsa['router']
+        old = self.base.get(origin)
+        self._acquire(lsa, len(self.views))
+        if origin in self.overridden:
+            for view in self.views:
+                own = view.overrides.pop(origin, _MISSING)
+                if own is not _MISSING and own is not None:
+                    self._release(own)
+        held = len(self.views) - self.overridden.pop(origin, 0)
+        self.base[origin] = lsa
+        if old is not None and old is not lsa:
+            self._release(old, held)
+        elif old is lsa:
+            self._release(lsa, held)
+        return lsa
+
+    def defer_refs(self):
+        """Skip reference counting (e.g. for the length of a flood) until
+        the next recount() or consolidate()"""
+        self.deferred = True
+
+    def recount(self):
+        """Rebuild refs from the base and the overrides and drop instances
+        no view holds"""
+        held = len(self.views)
+        refs = {(lsa['router'], lsa['seq_num']): held - self.overridden.get(origin, 0)
+                for origin, lsa in self.base.items()}
+        for view in self.views:
+            for lsa in view.overrides.values():
+                if lsa is not None:
+                    key = (lsa['router'], lsa['seq_num'])
+                    refs[key] = refs.get(key, 0) + 1
+        self.refs = refs
+        self.instances = {key: self.instances[key] for key in refs}
+        self.deferred = False
+
+    def consolidate(self):
+        """Move every instance that all views hold into the base and drop
+        routers that every view has flushed (after a recount if refs were
+        deferred). Returns the number of overrides removed."""
+        everyone = len(self.views)
+        removed = 0
+        for origin in [o for o, count in self.overridden.items() if count == everyone]:
+            lsa = self.views[0].overrides[origin]
+            if any(view.overrides[origin] is not lsa for view in self.views):
+                continue
+            old = self.base.pop(origin, None)
+            if lsa is not None:
+                self.base[origin] = lsa
+            for view in self.views:
+                del view.overrides[origin]
+            del self.overridden[origin]
+            removed += everyone
+            if old is not None and not self.deferred:
+                key = (old['router'], old['seq_num'])
+                if not self.refs[key]:
+                    del self.refs[key]
+                    del self.instances[key]
+        if removed:
+            for view in self.views:
+                view.overrides = dict(view.overrides)  # dicts never shrink in place
+        if self.deferred:
+            self.recount()  # cheap now that the overrides are (mostly) gone
+        return removed
+
+    def _count_override(self, origin, delta):
+        count = self.overridden.get(origin, 0) + delta
+        if count:
+            self.overridden[origin] = count
+        else:
+            del self.overridden[origin]
+
+    def override_count(self):
+        return sum(self.overridden.values())
+
+class LSDBView(MutableMapping):
+    """One router's LSDB inside an LSDBStore, used like a dict of
+    router -> LSA. Assigned LSAs are interned (stored frozen); deleting an
+    entry leaves a None override until the store consolidates."""
+    __slots__ = ('store', 'overrides')
+
+    def __init__(self, store):
+        self.store = store
+        self.overrides = {}  # router -> LSA, or None once flushed
+
+    def get(self, origin, default=None):
+        overrides = self.overrides
+        if origin in overrides:
+            lsa = overrides[origin]
+            return default if lsa is None else lsa
+        return self.store.base.get(origin, default)
+
+    def __getitem__(self, origin):
+        lsa = self.get(origin, _MISSING)
+        if lsa is _MISSING:
+            raise KeyError(origin)
+        return lsa
+
+    def __contains__(self, origin):
+        return self.get(origin, _MISSING) is not _MISSING
+
+    def _replace(self, origin, lsa):
+        """Point origin at lsa (None: flushed), keeping refs and overrides"""
+        store = self.store
+        old = self.get(origin)
+        if old is lsa:
+            return
+        if lsa is not None:
+            store._acquire(lsa)
+        if old is not None:
+            store._release(old)
+        had_override = origin in self.overrides
+        if lsa is store.base.get(origin):  # back in line with the base
+            if had_override:
+                del self.overrides[origin]
+                store._count_override(origin, -1)
+        else:
+            self.overrides[origin] = lsa
+            if not had_override:
+                store._count_override(origin, 1)
+
+    def __setitem__(self, origin, lsa):
+        store = self.store
+        lsa = store.intern(lsa)
+        if not store.deferred:
+            self._replace(origin, lsa)
+            return
+        # _replace without the refs: just keep overrides and their counts
+        overrides = self.overrides
+        overridden = store.overridden
+        if lsa is store.base.get(origin):
+            if origin in overrides:
+                del overrides[origin]
+                store._count_override(origin, -1)
+        else:
+            if origin not in overrides:
+                overridden[origin] = overridden.get(origin, 0) + 1
+            overrides[origin] = lsa
+
+    def install_newer(self, lsas):
+        """Install each of lsas (e.g. one Link State Update packet) whose
+        sequence number is newer than the held copy; returns the installed
+        instances. Same as a get and a set per LSA, with the lookups done
+        here on the plain dicts."""
+        store = self.store
+        overrides = self.overrides
+        base = store.base
+        instances = store.instances
+        overridden = store.overridden
+        deferred = store.deferred
+        installed = []
+        for lsa in lsas:
+            origin = lsa['router']
+            seq_num = lsa['seq_num']
+            had_override = origin in overrides
+            current = overrides[origin] if had_override else base.get(origin)
+            if current is not None and seq_num <= current.get('seq_num', -1):
+                continue
+            frozen = instances.get((origin, seq_num))
+            if frozen is None:
+                frozen = store.intern(lsa)
+            installed.append(frozen)
+            if not deferred:
+                self._replace(origin, frozen)
+            elif frozen is base.get(origin):
+                if had_override:
+                    del overrides[origin]
+                    store._count_override(origin, -1)
+            else:
+                if not had_override:
+                    overridden[origin] = overridden.get(origin, 0) + 1
+                overrides[origin] = frozen
+        return installed
+
+    def __delitem__(self, origin):
+        if origin not in self:
+            raise KeyError(origin)
+        self._replace(origin, None)
+
+    def __iter__(self):
+        overrides = self.overrides
+        for origin in self.store.base:
+            if overrides.get(origin, True) is not None:
+                yield origin
+        for origin, lsa in overrides.items():
+            if lsa is not None and origin not in self.store.base:
+                yield origin
+
+    def __len__(self):
+        if not self.overrides:
+            return len(self.store.base)
+        return sum(1 for _ in self)
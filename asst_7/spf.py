@@ -0,0 +1,332 @@
+import heapq
+import multiprocessing as mp
+import os
+import zlib
+from array import array
+
+try:
+    import numpy as np
+    from scipy.sparse import csr_matrix
+    from scipy.sparse.csgraph import dijkstra as csgraph_dijkstra
+except ImportError:  # all_pairs_spf needs SciPy; the rest is pure Python
+    np = None
+
+INF = float('inf')
+
+def dijkstra(source, links):
+    """Full SPF. links[u] is u's {neighbor: cost} (the links of u's LSA).
+    Returns (dist, prev) for every node reached."""
+    dist = {source: 0}
+    prev = {source: None}
+    visited = set()
+    pq = [(0, source)]
+    while pq:
+        d, u = heapq.heappop(pq)
+        if u in visited:
+            continue
+        visited.add(u)
+        for v, cost in links.get(u, {}).items():
+            nd = d + cost
+            if nd < dist.get(v, INF):
+                dist[v] = nd
+                prev[v] = u
+                heapq.heappush(pq, (nd, v))
+    return dist, prev
+
+def spf_table(source, lsdb, field, nodes, next_hops=None):
+    """SPF kernel shared by OSPF and IS-IS. lsdb maps router -> LSA/PDU and
+    lsdb[router][field] is that router's {neighbor: cost}. Returns the
+    routing table {node: (distance, previous hop)} for every node in nodes,
+    (inf, None) where unreachable. If next_hops is a dict, the same pass
+    fills it with {node: tuple of first hops} covering every equal-cost
+    shortest path (ECMP); costs must be positive. Equal sets are shared."""
+    dist = {source: 0}
+    prev = {source: None}
+    done = set()
+    pq = [(0, source)]
+    pop, push, get = heapq.heappop, heapq.heappush, dist.get
+    ecmp = next_hops is not None
+    hops = {}     # node -> first hops so far
+    merged = {}   # (hops, hops) -> their union
+    shared = {}   # union -> the one tuple used for it
+    while pq:
+        d, u = pop(pq)
+        if u in done:
+            continue
+        done.add(u)
+        lsa = lsdb.get(u)
+        if lsa is None:
+            continue
+        via = hops.get(u)  # None at the source: the neighbor is the first hop
+        for v, cost in lsa[field].items():
+            nd = d + cost
+            old = get(v, INF)
+            if nd < old:
+                dist[v] = nd
+                prev[v] = u
+                push(pq, (nd, v))
+                if ecmp:
+                    hops[v] = via or (v,)
+            elif ecmp and nd == old:
+                mine = via or (v,)
+                current = hops[v]
+                if mine is not current:
+                    union = merged.get((current, mine))
+                    if union is None:
+                        union = tuple(sorted(set(current).union(mine)))
+                        union = merged[current, mine] = shared.setdefault(union, union)
+                    hops[v] = union
+    if ecmp:
+        next_hops.update(hops)
+    return {r: (get(r, INF), prev.get(r)) for r in nodes}
+
+def flow_hash(flow, salt=0):
+    """32-bit hash of a flow key such as its 5-tuple. CRC32 of the key is
+    mixed with salt and spread by a multiplicative hash, so routers with
+    different salts make independent choices for the same flow."""
+    return (zlib.crc32(repr(flow).encode()) ^ salt) * 0x9E3779B1 & 0xFFFFFFFF
+
+def flow_next_hop(hops, flow, salt=0):
+    """The next hop of a flow among equal-cost hops (a next_hops entry);
+    the same flow always gets the same hop. None if there is no route."""
+    if not hops:
+        return None
+    if len(hops) == 1:
+        return hops[0]
+    return hops[flow_hash(flow, salt) * len(hops) >> 32]
+
+class IncrementalSPF:
+    """Shortest-path tree from one source that is repaired in place when a
+    single router's links change (dynamic SPF in the style of
+    Ramalingam-Reps). Only the part of the tree below links that got worse
+    is invalidated; it and any improved links are then settled by one
+    Dijkstra pass seeded from the unaffected boundary."""
+    def __init__(self, source, links):
+        self.source = source
+        self.links = {u: dict(adj) for u, adj in links.items()}
+        self.rev = {}  # v -> {u: cost} for every link u -> v
+        for u, adj in self.links.items():
+            for v, cost in adj.items():
+                self.rev.setdefault(v, {})[u] = cost
+        self.dist, self.prev = dijkstra(source, self.links)
+        self.children = {}
+        for v, u in self.prev.items():
+            if u is not None:
+                self.children.setdefault(u, set()).add(v)
+        self.touched = 0  # nodes re-examined by update() calls so far
+
+    def _set_parent(self, v, u):
+        old = self.prev.get(v)
+        if old is not None:
+            self.children[old].discard(v)
+        self.prev[v] = u
+        if u is not None:
+            self.children.setdefault(u, set()).add(v)
+
+    def update(self, router, new_links):
+        """router's links are now new_links ({neighbor: cost}). Repairs the
+        tree and returns the set of nodes whose (dist, prev) changed."""
+        old_links = self.links.get(router, {})
+        new_links = dict(new_links)
+        self.links[router] = new_links
+        worse, better = [], []
+        for v in old_links.keys() | new_links.keys():
+            old_cost = old_links.get(v, INF)
+            new_cost = new_links.get(v, INF)
+            if old_cost == new_cost:
+                continue
+            if new_cost == INF:
+                del self.rev[v][router]
+            else:
+                self.rev.setdefault(v, {})[router] = new_cost
+            if new_cost > old_cost:
+                if self.prev.get(v) == router:
+                    worse.append(v)
+            else:
+                better.append((v, new_cost))
+
+        dist, prev = self.dist, self.prev
+        before = {}
+        # 1. invalidate the subtrees hanging off links that got worse
+        affected = []
+        stack = worse
+        while stack:
+            x = stack.pop()
+            if x in before:
+                continue
+            before[x] = (dist[x], prev[x])
+            affected.append(x)
+            stack.extend(self.children.get(x, ()))
+        for x in affected:
+            self._set_parent(x, None)
+            dist[x] = INF
+
+        # 2. seed the heap from unaffected in-neighbors and improved links
+        pq = []
+        for x in affected:
+            best, parent = INF, None
+            for w, cost in self.rev.get(x, {}).items():
+                d = dist.get(w, INF) + cost
+                if d < best:
+                    best, parent = d, w
+            if parent is not None:
+                dist[x] = best
+                self._set_parent(x, parent)
+                heapq.heappush(pq, (best, x))
+        d_router = dist.get(router, INF)
+        for v, cost in better:
+            nd = d_router + cost
+            if nd < dist.get(v, INF):
+                if v not in before:
+                    before[v] = (dist.get(v, INF), prev.get(v))
+                dist[v] = nd
+                self._set_parent(v, router)
+                heapq.heappush(pq, (nd, v))
+
+        # 3. Dijkstra from the frontier
+        while pq:
+            d, u = heapq.heappop(pq)
+            if d > dist[u]:
+                continue
+            for v, cost in self.links.get(u, {}).items():
+                nd = d + cost
+                if nd < dist.get(v, INF):
+                    if v not in before:
+                        before[v] = (dist.get(v, INF), prev.get(v))
+                    dist[v] = nd
+                    self._set_parent(v, u)
+                    heapq.heappush(pq, (nd, v))
+
+        for x in affected:
+            if dist[x] == INF:
+                del dist[x]
+                del prev[x]
+        changed = {x for x, old in before.items() if old != (dist.get(x, INF), prev.get(x))}
+        self.touched += len(before)
+        return changed
+
+    def entry(self, node):
+        """(distance, previous hop) in the routing_table format"""
+        return (self.dist.get(node, INF), self.prev.get(node))
+
+def csr_from_links(links, nodes):
+    """CSR adjacency matrix over nodes (index = position in nodes) for a
+    {router: {neighbor: cost}} mapping such as Network.graph"""
+    index = {node: i for i, node in enumerate(nodes)}
+    rows, cols, costs = [], [], []
+    for u, adj in links.items():
+        i = index[u]
+        for v, cost in adj.items():
+            rows.append(i)
+            cols.append(index[v])
+            costs.append(cost)
+    n = len(nodes)
+    return csr_matrix((costs, (rows, cols)), shape=(n, n))
+
+def all_pairs_spf(links, nodes=None, sources=None, block=512):
+    """Routing tables for many routers at once with SciPy's compiled
+    Dijkstra. Returns {source: {dest: (distance, previous hop)}} in the
+    same format as OSPFRouter.compute_shortest_paths, including
+    (inf, None) for unreachable nodes. Sources are processed block at a
+    time so memory stays at block x len(nodes)."""
+    if np is None:
+        raise ImportError("all_pairs_spf requires numpy and scipy")
+    nodes = sorted(links) if nodes is None else list(nodes)
+    sources = nodes if sources is None else list(sources)
+    graph = csr_from_links(links, nodes)
+    index = {node: i for i, node in enumerate(nodes)}
+    names = np.array(list(nodes) + [None], dtype=object)  # -9999 -> None
+    integral = all(float(c).is_integer() for c in graph.data)
+
+    tables = {}
+    for start in range(0, len(sources), block):
+        chunk = sources[start:start + block]
+        dist, pred = csgraph_dijkstra(graph, directed=True, return_predecessors=True,
+                                      indices=[index[s] for s in chunk])
+        pred[pred < 0] = len(nodes)
+        for source, drow, prow in zip(chunk, dist, pred):
+            unreachable = np.isinf(drow)
+            if integral:
+                drow = np.where(unreachable, 0, drow).astype(np.int64)
+            distances = drow.tolist()
+            for i in np.flatnonzero(unreachable).tolist():
+                distances[i] = INF
+            tables[source] = dict(zip(nodes, zip(distances, names[prow].tolist())))
+    return tables
+
+def pack_links(links, nodes):
+    """Compact CSR serialization of a {router: {neighbor: cost}} mapping:
+    (nodes, offsets, targets, costs) with the three arrays as raw bytes.
+    Costs are int64 when all are integral, else float64."""
+    index = {node: i for i, node in enumerate(nodes)}
+    offsets, targets, costs = array('I', [0]), array('I'), []
+    for node in nodes:
+        for v, cost in links.get(node, {}).items():
+            targets.append(index[v])
+            costs.append(cost)
+        offsets.append(len(targets))
+    typecode = 'q' if all(float(c).is_integer() for c in costs) else 'd'
+    return list(nodes), offsets.tobytes(), targets.tobytes(), array(typecode, costs).tobytes(), typecode
+
+_adjacency = None  # per worker: adjacency list of (target, cost) per node index
+_typecode = 'q'
+
+def _init_spf_worker(packed):
+    global _adjacency, _typecode
+    nodes, offsets, targets, costs, _typecode = packed
+    offsets, targets = array('I', offsets), array('I', targets)
+    costs = array(_typecode, costs).tolist()
+    _adjacency = [list(zip(targets[offsets[i]:offsets[i + 1]], costs[offsets[i]:offsets[i + 1]]))
+                  for i in range(len(nodes))]
+
+def _spf_rows(sources):
+    """Dijkstra from each source index; dist rows use -1 for unreachable
+    (int costs) and prev rows -1 for no previous hop."""
+    adjacency = _adjacency
+    n = len(adjacency)
+    rows = []
+    for source in sources:
+        dist = [INF] * n
+        prev = [-1] * n
+        done = bytearray(n)
+        dist[source] = 0
+        pq = [(0, source)]
+        while pq:
+            d, u = heapq.heappop(pq)
+            if done[u]:
+                continue
+            done[u] = 1
+            for v, cost in adjacency[u]:
+                nd = d + cost
+                if nd < dist[v]:
+                    dist[v] = nd
+                    prev[v] = u
+                    heapq.heappush(pq, (nd, v))
+        if _typecode == 'q':
+            dist = [-1 if d == INF else d for d in dist]
+        rows.append((source, array(_typecode, dist).tobytes(), array('i', prev).tobytes()))
+    return rows
+
+def parallel_spf(links, nodes=None, sources=None, workers=None, chunk=32):
+    """Per-router SPF fanned out over a process pool. The topology is packed
+    once (pack_links) and handed to each worker at start-up, so tasks carry
+    only source indices. Returns {source: routing_table} like all_pairs_spf."""
+    nodes = sorted(links) if nodes is None else list(nodes)
+    sources = nodes if sources is None else list(sources)
+    index = {node: i for i, node in enumerate(nodes)}
+    packed = pack_links(links, nodes)
+    typecode = packed[4]
+    names = nodes + [None]  # prev index -1 -> None
+    source_ids = [index[s] for s in sources]
+    tasks = [source_ids[i:i + chunk] for i in range(0, len(source_ids), chunk)]
+
+    tables = {}
+    with mp.Pool(workers or os.cpu_count() or 1, _init_spf_worker, (packed,)) as pool:
+        for rows in pool.imap_unordered(_spf_rows, tasks):
+            for source, dist, prev in rows:
+                distances = array(typecode, dist).tolist()
+                if typecode == 'q' and -1 in distances:
+                    distances = [INF if d == -1 else d for d in distances]
+                previous = [names[i] for i in array('i', prev)]
+                tables[nodes[source]] = dict(zip(nodes, zip(distances, previous)))
+    return tables
@@ -0,0 +1,229 @@
+# aqm.py
+import math
+import random
+from collections import deque
+from typing import Iterable, Optional
+
+from scheduler import ClassStats, Packet
+
+class TailDropQueue:
+    """
+    Bounded FIFO queue that drops arrivals once `capacity` packets are queued.
+    Packet.timestamp is the arrival time; the sojourn time (dequeue time minus
+    arrival) of every delivered packet is recorded in stats.latencies.
+    """
+    def __init__(self, capacity: int):
+        if capacity <= 0:
+            raise ValueError(f"Invalid queue capacity: {capacity}")
+        self.capacity = capacity
+        self.stats = ClassStats()
+        self.tail_drops = 0
+        self._queue = deque()
+        self._bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._queue)
+
+    @property
+    def drops(self) -> int:
+        return self.tail_drops
+
+    def enqueue(self, packet: Packet) -> bool:
+        """Queue a packet; returns False if it was dropped."""
+        if len(self._queue) >= self.capacity:
+            self.tail_drops += 1
+            return False
+        self._queue.append(packet)
+        self._bytes += len(packet.payload)
+        return True
+
+    def _pop(self) -> Packet:
+        packet = self._queue.popleft()
+        self._bytes -= len(packet.payload)
+        return packet
+
+    def _deliver(self, packet: Packet, now: float) -> Packet:
+        st = self.stats
+        st.packets += 1
+        st.bytes += len(packet.payload)
+        st.latencies.append(now - packet.timestamp)
+        return packet
+
+    def dequeue(self, now: float) -> Optional[Packet]:
+        """Next packet to transmit at simulated time now, or None if empty."""
+        if not self._queue:
+            return None
+        return self._deliver(self._pop(), now)
+
+class REDQueue(TailDropQueue):
+    """
+    Random Early Detection (Floyd & Jacobson). An EWMA of the queue length
+    (weight w) is kept; between min_th and max_th arrivals are dropped with a
+    probability rising linearly to max_p, spread out by the count of packets
+    since the last drop; above max_th every arrival is dropped. mean_tx_time
+    (typical transmission time) lets the average decay while the queue idles.
+    """
+    def __init__(self, capacity: int, min_th: float, max_th: float, max_p: float = 0.1,
+                 w: float = 0.002, mean_tx_time: float = 0.0, seed: Optional[int] = None):
+        super().__init__(capacity)
+        if not 0 <= min_th < max_th:
+            raise ValueError(f"Invalid RED thresholds: min_th={min_th}, max_th={max_th}")
+        self.min_th = min_th
+        self.max_th = max_th
+        self.max_p = max_p
+        self.w = w
+        self.mean_tx_time = mean_tx_time
+        self.early_drops = 0
+        self.avg = 0.0
+        self._count = -1
+        self._idle_since = None
+        self._rng = random.Random(seed)
+
+    @property
+    def drops(self) -> int:
+        return self.tail_drops + self.early_drops
+
+    def enqueue(self, packet: Packet) -> bool:
+        qlen = len(self._queue)
+        if qlen == 0 and self._idle_since is not None and self.mean_tx_time > 0:
+            idle_packets = (packet.timestamp - self._idle_since) / self.mean_tx_time
+            self.avg *= (1 - self.w) ** idle_packets
+        else:
+            self.avg += self.w * (qlen - self.avg)
+        self._idle_since = None
+
+        avg = self.avg
+        if avg >= self.max_th:
+            self._count = 0
+            self.early_drops += 1
+            return False
+        if avg >= self.min_th:
+            self._count += 1
+            pb = self.max_p * (avg - self.min_th) / (self.max_th - self.min_th)
+            pa = pb / (1 - self._count * pb) if self._count * pb < 1 else 1.0
+            if self._rng.random() < pa:
+                self._count = 0
+                self.early_drops += 1
+                return False
+        else:
+            self._count = -1
+        return super().enqueue(packet)
+
+    def dequeue(self, now: float) -> Optional[Packet]:
+        packet = super().dequeue(now)
+        if not self._queue:
+            self._idle_since = now
+        return packet
+
+class CoDelQueue(TailDropQueue):
+    """
+    Controlled Delay AQM (RFC 8289). Packets are dropped at dequeue once the
+    sojourn time has stayed above `target` for a full `interval`; while in
+    that state the next drop is scheduled interval / sqrt(count) later.
+    `capacity` is only the hard buffer limit.
+    """
+    def __init__(self, capacity: int, target: float = 0.005, interval: float = 0.100,
+                 mtu: int = 1500):
+        super().__init__(capacity)
+        self.target = target
+        self.interval = interval
+        self.mtu = mtu
+        self.codel_drops = 0
+        self._first_above_time = 0.0
+        self._drop_next = 0.0
+        self._count = 0
+        self._last_count = 0
+        self._dropping = False
+
+    @property
+    def drops(self) -> int:
+        return self.tail_drops + self.codel_drops
+
+    def _control_law(self, t: float) -> float:
+        return t + self.interval / math.sqrt(self._count)
+
+    def _do_dequeue(self, now: float):
+        """Pop the head packet and decide whether it may be dropped."""
+        if not self._queue:
+            self._first_above_time = 0.0
+            return None, False
+        packet = self._pop()
+        sojourn = now - packet.timestamp
+        if sojourn < self.target or self._bytes <= self.mtu:
+            self._first_above_time = 0.0
+            return packet, False
+        if self._first_above_time == 0.0:
+            self._first_above_time = now + self.interval
+            return packet, False
+        return packet, now >= self._first_above_time
+
+    def dequeue(self, now: float) -> Optional[Packet]:
+        packet, ok_to_drop = self._do_dequeue(now)
+        if packet is None:
+            self._dropping = False
+            return None
+        if self._dropping:
+            if not ok_to_drop:
+                self._dropping = False
+            while self._dropping and now >= self._drop_next:
+                self.codel_drops += 1
+                self._count += 1
+                packet, ok_to_drop = self._do_dequeue(now)
+                if packet is None:
+                    self._dropping = False
+                    return None
+                if not ok_to_drop:
+                    self._dropping = False
+                else:
+                    self._drop_next = self._control_law(self._drop_next)
+        elif ok_to_drop:
+            self.codel_drops += 1
+            packet, _ = self._do_dequeue(now)
+            self._dropping = True
+            delta = self._count - self._last_count
+            if delta > 1 and now - self._drop_next < 16 * self.interval:
+                self._count = delta
+            else:
+                self._count = 1
+            self._drop_next = self._control_law(now)
+            self._last_count = self._count
+            if packet is None:
+                return None
+        return self._deliver(packet, now)
+
+def simulate_queue(queue: TailDropQueue, packets: Iterable[Packet], link_rate: float):
+    """
+    Feed packets (sorted by timestamp) through an AQM queue drained by a link
+    of link_rate bytes per second. Results accumulate on the queue: stats
+    (delivered packets, bytes, sojourn times) and its drop counters.
+    """
+    pending = iter(packets)
+    nxt = next(pending, None)
+    now = 0.0
+    while nxt is not None or len(queue):
+        if not len(queue) and nxt.timestamp > now:
+            now = nxt.timestamp  # link idle until the next arrival
+        while nxt is not None and nxt.timestamp <= now:
+            queue.enqueue(nxt)
+            nxt = next(pending, None)
+        packet = queue.dequeue(now)
+        if packet is not None:
+            now += len(packet.payload) / link_rate
+    queue.stats.throughput = queue.stats.bytes / now if now else 0.0
+    return queue
+
+if __name__ == "__main__":
+    # 1000 B packets into a 1 MB/s link: 125% load for 1 s, then 60% for 2 s
+    times = [i * 0.0008 for i in range(1250)] + [1.0 + i / 600 for i in range(1200)]
+    packets = [Packet("10.0.0.1", "10.0.0.2", "x" * 1000, 0, timestamp=t) for t in times]
+    queues = [
+        ("tail-drop", TailDropQueue(capacity=200)),
+        ("RED", REDQueue(capacity=200, min_th=5, max_th=15, mean_tx_time=0.001, seed=1)),
+        ("CoDel", CoDelQueue(capacity=200)),
+    ]
+    for name, q in queues:
+        simulate_queue(q, packets, link_rate=1_000_000)
+        st = q.stats
+        print(f"{name:>9}: delivered {st.packets}, dropped {q.drops}, "
+              f"mean sojourn {st.mean_latency * 1000:.1f} ms, "
+              f"p99 {st.latency_percentile(99) * 1000:.1f} ms")
@@ -0,0 +1,620 @@
+# benchmarks.py
+import argparse
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+from dataclasses import replace
+from typing import List, Tuple
+
+from aqm import CoDelQueue, REDQueue, TailDropQueue, simulate_queue
+from ip_utils import PREFIX_MASKS_V6, int_to_ip, int_to_ipv6, ip_to_int, ipv6_to_int
+from pipeline import SCHEDULERS, Pipeline, run_pipeline
+from router import ENGINES, Router
+import scheduler as scheduler_mod
+from shaping import Policer, Shaper, TrafficConditioner
+from scheduler import (CompactPacket, DRRScheduler, FIFOScheduler, Packet, PacketBatch,
+                       PriorityScheduler, WFQScheduler, priority_scheduler, simulate_link)
+
+# Rough shape of a global routing table: mostly /24s, a long tail of /16-/23.
+PREFIX_LENGTH_WEIGHTS = {8: 1, 12: 1, 16: 4, 18: 3, 19: 5, 20: 8, 21: 8, 22: 14, 23: 12, 24: 120}
+
+
+def random_routes(n: int, seed: int = 1, links: int = 64) -> List[Tuple[str, str]]:
+    """Generate n distinct random IPv4 routes as (cidr, link) tuples over `links` next hops."""
+    rng = random.Random(seed)
+    lengths = list(PREFIX_LENGTH_WEIGHTS)
+    weights = list(PREFIX_LENGTH_WEIGHTS.values())
+    seen = set()
+    routes = []
+    while len(routes) < n:
+        plen = rng.choices(lengths, weights)[0]
+        network = rng.getrandbits(plen) << (32 - plen)
+        if (network, plen) in seen:
+            continue
+        seen.add((network, plen))
+        routes.append((f"{int_to_ip(network)}/{plen}", f"Link {len(routes) % links}"))
+    return routes
+
+
+# IPv6 tables are dominated by /48 and /32 allocations with a tail of others.
+V6_PREFIX_LENGTH_WEIGHTS = {19: 1, 28: 2, 29: 8, 32: 30, 36: 5, 40: 10, 44: 12, 46: 2,
+                            47: 3, 48: 100, 56: 4, 64: 6}
+
+
+def random_routes_v6(n: int, seed: int = 5) -> List[Tuple[str, str]]:
+    """Generate n distinct random IPv6 routes inside 2000::/3."""
+    rng = random.Random(seed)
+    lengths = list(V6_PREFIX_LENGTH_WEIGHTS)
+    weights = list(V6_PREFIX_LENGTH_WEIGHTS.values())
+    seen = set()
+    routes = []
+    while len(routes) < n:
+        plen = rng.choices(lengths, weights)[0]
+        network = ((0b001 << 125) | rng.getrandbits(125)) & PREFIX_MASKS_V6[plen]
+        if (network, plen) in seen:
+            continue
+        seen.add((network, plen))
+        routes.append((f"{int_to_ipv6(network)}/{plen}", f"Link {len(routes) % 64}"))
+    return routes
+
+
+def random_addresses(n: int, seed: int = 2) -> List[str]:
+    rng = random.Random(seed)
+    return [int_to_ip(rng.getrandbits(32)) for _ in range(n)]
+
+
+def zipf_addresses(n: int, distinct: int = 100_000, s: float = 1.1, seed: int = 4) -> List[str]:
+    """Draw n destinations from `distinct` random hosts with Zipf(s) popularity."""
+    hosts = random_addresses(distinct, seed)
+    weights = [1.0 / (rank ** s) for rank in range(1, distinct + 1)]
+    return random.Random(seed).choices(hosts, weights, k=n)
+
+
+def time_lookups(router: Router, addresses: List[str]) -> float:
+    """Return the mean time per route_packet call in microseconds."""
+    start = time.perf_counter()
+    for ip in addresses:
+        router.route_packet(ip)
+    return (time.perf_counter() - start) / len(addresses) * 1e6
+
+
+def bench_engines(sizes=(10_000, 100_000, 1_000_000), lookups=20_000, linear_lookups=50):
+    """
+    Compare the linear-scan and trie forwarding engines.
+    The linear scan is O(routes) per packet, so it gets fewer lookups.
+    """
+    print("=" * 72)
+    print("Forwarding engines: linear scan vs path-compressed trie")
+    print("=" * 72)
+    print(f"{'prefixes':>10} {'engine':>8} {'build (s)':>10} {'lookup (us)':>12} {'speedup':>9}")
+    addresses = random_addresses(lookups)
+    for n in sizes:
+        routes = random_routes(n)
+        results = {}
+        for engine, count in (("linear", linear_lookups), ("trie", lookups)):
+            start = time.perf_counter()
+            router = Router(routes, engine=engine)
+            build = time.perf_counter() - start
+            results[engine] = (build, time_lookups(router, addresses[:count]))
+            del router
+        for engine, (build, per_lookup) in results.items():
+            speedup = results["linear"][1] / per_lookup
+            print(f"{n:>10} {engine:>8} {build:>10.2f} {per_lookup:>12.2f} {speedup:>8.1f}x")
+
+
+def bench_batch(n_routes=100_000, n_addresses=1_000_000, engine="trie"):
+    """Compare route_batch against looping route_packet over the same batch."""
+    import router as router_mod
+
+    print("=" * 72)
+    print(f"Batch LPM: {n_addresses} addresses, {n_routes} prefixes, engine={engine}")
+    print("=" * 72)
+    router = Router(random_routes(n_routes), engine=engine)
+    addresses = random_addresses(n_addresses)
+    ints = [ip_to_int(ip) for ip in addresses]
+    router.route_batch(addresses[:1])  # build the batch index outside the timing
+
+    start = time.perf_counter()
+    expected = [router.route_packet(ip) for ip in addresses]
+    loop = time.perf_counter() - start
+    print(f"route_packet loop:          {loop:8.2f} s")
+
+    if router_mod.np is not None:
+        array = router_mod.np.array(ints, dtype=router_mod.np.uint32)
+        start = time.perf_counter()
+        got = router.route_batch(array)
+        batch = time.perf_counter() - start
+        assert got == expected
+        print(f"route_batch (NumPy uint32): {batch:8.2f} s  ({loop / batch:.1f}x)")
+    else:
+        print("route_batch (NumPy uint32):  skipped, NumPy not installed")
+
+    start = time.perf_counter()
+    got = router.route_batch(ints)
+    batch = time.perf_counter() - start
+    assert got == expected
+    print(f"route_batch (list of ints): {batch:8.2f} s  ({loop / batch:.1f}x)")
+
+
+def bench_churn(n_routes=100_000, n_updates=50_000, lookups_per_update=4, engine="trie"):
+    """
+    BGP churn: interleave add_route/withdraw_route with lookups on a loaded
+    table, and compare against rebuilding the table for every update.
+    """
+    print("=" * 72)
+    print(f"Route churn: {n_routes} prefixes, {n_updates} updates, engine={engine}")
+    print("=" * 72)
+    routes = random_routes(n_routes + n_updates)
+    installed, spare = routes[:n_routes], routes[n_routes:]
+    router = Router(installed, engine=engine)
+    addresses = random_addresses(n_updates * lookups_per_update)
+    rng = random.Random(3)
+
+    update_time = lookup_time = 0.0
+    for i in range(n_updates):
+        start = time.perf_counter()
+        if i % 2 == 0:
+            router.add_route(*spare[i])
+        else:
+            router.withdraw_route(installed[rng.randrange(n_routes)][0])
+        mid = time.perf_counter()
+        for ip in addresses[i * lookups_per_update:(i + 1) * lookups_per_update]:
+            router.route_packet(ip)
+        lookup_time += time.perf_counter() - mid
+        update_time += mid - start
+
+    start = time.perf_counter()
+    router.build_forwarding_table(installed)
+    rebuild = time.perf_counter() - start
+
+    n_lookups = n_updates * lookups_per_update
+    print(f"incremental update:     {update_time / n_updates * 1e6:10.2f} us/update "
+          f"({n_updates / update_time:,.0f} updates/s)")
+    print(f"interleaved lookups:    {lookup_time / n_lookups * 1e6:10.2f} us/lookup")
+    print(f"full rebuild (1 table): {rebuild * 1e6:10.0f} us/update "
+          f"({rebuild / (update_time / n_updates):,.0f}x slower)")
+
+
+def bench_cache(n_routes=100_000, n_packets=1_000_000, cache_sizes=(1_000, 10_000, 100_000), engine="trie"):
+    """Zipf-distributed traffic through the LRU flow cache at several sizes."""
+    print("=" * 72)
+    print(f"Flow cache: {n_packets} Zipf(1.1) packets, {n_routes} prefixes, engine={engine}")
+    print("=" * 72)
+    routes = random_routes(n_routes)
+    traffic = zipf_addresses(n_packets)
+    baseline = time_lookups(Router(routes, engine=engine), traffic)
+    print(f"{'cache size':>10} {'hit rate':>9} {'lookup (us)':>12} {'speedup':>9}")
+    print(f"{'none':>10} {'-':>9} {baseline:>12.2f} {1.0:>8.1f}x")
+    for size in cache_sizes:
+        router = Router(routes, engine=engine, cache_size=size)
+        per_lookup = time_lookups(router, traffic)
+        print(f"{size:>10} {router.flow_cache.hit_rate:>9.1%} {per_lookup:>12.2f} "
+              f"{baseline / per_lookup:>8.1f}x")
+
+
+def bench_memory(sizes=(10_000, 100_000, 1_000_000), lookups=20_000):
+    """Forwarding-table memory and lookup cost of every engine."""
+    print("=" * 72)
+    print("Forwarding-table memory footprint by engine")
+    print("=" * 72)
+    print(f"{'prefixes':>10} {'engine':>8} {'MB':>9} {'B/route':>8} {'vs tuples':>10} {'lookup (us)':>12}")
+    addresses = random_addresses(lookups)
+    for n in sizes:
+        routes = random_routes(n)
+        for engine in ENGINES:
+            router = Router(routes, engine=engine)
+            report = router.memory_footprint()
+            count = lookups if engine != "linear" else 50
+            per_lookup = time_lookups(router, addresses[:count])
+            print(f"{n:>10} {engine:>8} {report['table_bytes'] / 2**20:>9.1f} "
+                  f"{report['bytes_per_route']:>8.1f} {report['ratio_vs_tuples']:>9.2f}x "
+                  f"{per_lookup:>12.2f}")
+            del router
+
+
+def bench_startup(n_routes=1_000_000, links=64):
+    """
+    Cold-start time from a text route dump vs a binary snapshot. With more
+    than 65536 links the compact table stores 32-bit link ids.
+    """
+    print("=" * 72)
+    print(f"Router start-up from disk: {n_routes} prefixes, {min(links, n_routes)} links")
+    print("=" * 72)
+    routes = random_routes(n_routes, links=links)
+    probe = random_addresses(1_000) + [cidr.split("/")[0] for cidr, _ in random.Random(3).sample(routes, 1_000)]
+    reference = Router(routes, engine="compact")
+    expected = [reference.route_packet(ip) for ip in probe]
+    with tempfile.TemporaryDirectory() as tmp:
+        dump_path = os.path.join(tmp, "routes.txt")
+        snap_path = os.path.join(tmp, "routes.lpm")
+        reference.save_route_dump(dump_path)
+        reference.save_snapshot(snap_path)
+        del reference
+        print(f"text dump: {os.path.getsize(dump_path) / 2**20:.1f} MB, "
+              f"snapshot: {os.path.getsize(snap_path) / 2**20:.1f} MB")
+        loaders = [
+            ("text dump -> compact", lambda: Router.from_route_dump(dump_path, engine="compact")),
+            ("text dump -> trie", lambda: Router.from_route_dump(dump_path, engine="trie")),
+            ("snapshot (read)", lambda: Router.from_snapshot(snap_path, use_mmap=False)),
+            ("snapshot (mmap)", lambda: Router.from_snapshot(snap_path)),
+        ]
+        for name, load in loaders:
+            start = time.perf_counter()
+            router = load()
+            elapsed = time.perf_counter() - start
+            assert [router.route_packet(ip) for ip in probe] == expected
+            print(f"{name:<22} {elapsed * 1000:10.1f} ms")
+            del router
+
+
+def bench_ipv6(n_routes=200_000, lookups=200_000):
+    """
+    IPv6 LPM on a ~200k-prefix table. Half of the destinations fall inside
+    a routed prefix, the rest are random addresses in 2000::/3.
+    """
+    print("=" * 72)
+    print(f"IPv6 lookups: {n_routes} prefixes, {lookups} destinations")
+    print("=" * 72)
+    routes = random_routes_v6(n_routes)
+    rng = random.Random(6)
+    addresses = []
+    for i in range(lookups):
+        if i % 2:
+            network, plen = routes[rng.randrange(n_routes)][0].split("/")
+            host = ipv6_to_int(network) | rng.getrandbits(128 - int(plen))
+        else:
+            host = (0b001 << 125) | rng.getrandbits(125)
+        addresses.append(int_to_ipv6(host))
+
+    start = time.perf_counter()
+    router = Router(routes)
+    print(f"build:                    {time.perf_counter() - start:8.2f} s")
+    print(f"distinct prefix lengths:  {len(router._v6._levels):8d}")
+    per_lookup = time_lookups(router, addresses)
+    print(f"route_packet (v6):        {per_lookup:8.2f} us/lookup")
+    v4_router = Router(random_routes(n_routes), engine="trie")
+    print(f"route_packet (v4 trie):   {time_lookups(v4_router, random_addresses(lookups)):8.2f} us/lookup")
+
+    # Reference point: a naive mask-and-compare scan over the v6 table.
+    table = sorted(((net, plen, link) for net, plen, link in router._v6.items()),
+                   key=lambda t: t[1], reverse=True)
+    sample = [ipv6_to_int(ip) for ip in addresses[:50]]
+    start = time.perf_counter()
+    for dest in sample:
+        for network, plen, link in table:
+            if dest & PREFIX_MASKS_V6[plen] == network:
+                break
+    naive = (time.perf_counter() - start) / len(sample) * 1e6
+    print(f"naive linear scan (v6):   {naive:8.2f} us/lookup ({naive / per_lookup:.0f}x slower)")
+
+
+# Payloads are shared between packets so a million packets stay small.
+_PAYLOADS = ["x" * size for size in range(40, 1501, 20)]
+
+
+def random_packets(n: int, classes: int = 3, seed: int = 7) -> List[Packet]:
+    rng = random.Random(seed)
+    return [Packet("10.0.0.1", "10.0.0.2", rng.choice(_PAYLOADS), rng.randrange(classes))
+            for _ in range(n)]
+
+
+def bench_scheduler(n_packets=1_000_000, backlog=1_000):
+    """Packets/sec of the streaming schedulers and of batch priority sorting."""
+    print("=" * 72)
+    print(f"Scheduler throughput: {n_packets} packets, steady backlog {backlog}")
+    print("=" * 72)
+    packets = random_packets(n_packets)
+    for name, sched in (("FIFOScheduler", FIFOScheduler()), ("PriorityScheduler", PriorityScheduler())):
+        start = time.perf_counter()
+        for pkt in packets[:backlog]:
+            sched.enqueue(pkt)
+        for pkt in packets[backlog:]:
+            sched.enqueue(pkt)
+            sched.dequeue()
+        for _ in sched.drain():
+            pass
+        elapsed = time.perf_counter() - start
+        print(f"{name + ' (stream)':<32} {n_packets / elapsed:>12,.0f} packets/s")
+
+    start = time.perf_counter()
+    indexed = list(enumerate(packets))
+    indexed.sort(key=lambda iv: (iv[1].priority, iv[0]))
+    ordered = [pkt for idx, pkt in indexed]
+    elapsed = time.perf_counter() - start
+    print(f"{'enumerate + sort (old batch)':<32} {n_packets / elapsed:>12,.0f} packets/s")
+    start = time.perf_counter()
+    result = priority_scheduler(packets)
+    elapsed = time.perf_counter() - start
+    assert result == ordered
+    print(f"{'priority_scheduler (batch)':<32} {n_packets / elapsed:>12,.0f} packets/s")
+
+
+def poisson_arrivals(n: int, loads: List[float], link_rate: float, seed: int = 8):
+    """
+    n (time, packet) arrivals where class c offers loads[c] * link_rate
+    bytes/s on average, as a merged Poisson process.
+    """
+    rng = random.Random(seed)
+    mean_size = sum(len(p) for p in _PAYLOADS) / len(_PAYLOADS)
+    total_rate = sum(loads) * link_rate / mean_size  # packets per second
+    classes = list(range(len(loads)))
+    now = 0.0
+    arrivals = []
+    for cls in rng.choices(classes, loads, k=n):
+        now += rng.expovariate(total_rate)
+        arrivals.append((now, Packet("10.0.0.1", "10.0.0.2", rng.choice(_PAYLOADS), cls)))
+    return arrivals
+
+
+def max_min_shares(demands: List[float], capacity: float) -> List[float]:
+    """Max-min fair (water-filling) allocation of capacity to demands."""
+    shares = [0.0] * len(demands)
+    remaining = sorted(range(len(demands)), key=lambda i: demands[i])
+    while remaining:
+        fair = capacity / len(remaining)
+        i = remaining[0]
+        if demands[i] > fair:
+            for j in remaining:
+                shares[j] = fair
+            break
+        shares[i] = demands[i]
+        capacity -= demands[i]
+        remaining.pop(0)
+    return shares
+
+
+def bench_fairness(n_packets=1_000_000, loads=(0.7, 0.3, 0.3), link_rate=1.25e8):
+    """
+    Overloaded link (sum of loads > 1), measured while traffic is arriving:
+    strict priority starves the low classes, DRR and WFQ converge on the
+    max-min fair shares.
+    """
+    print("=" * 72)
+    print(f"Fair queuing: {n_packets} packets, offered loads {list(loads)} of a "
+          f"{link_rate * 8 / 1e9:.0f} Gb/s link")
+    print("=" * 72)
+    arrivals = poisson_arrivals(n_packets, list(loads), link_rate)
+    fair = max_min_shares(list(loads), 1.0)
+    print(f"max-min fair shares: {[round(f, 3) for f in fair]}")
+    factories = [("FIFO", FIFOScheduler), ("Priority", PriorityScheduler),
+                 ("DRR", DRRScheduler), ("WFQ", WFQScheduler)]
+    for name, factory in factories:
+        stats = simulate_link(factory(), arrivals, link_rate, horizon=arrivals[-1][0])
+        shares = [stats[c].throughput / link_rate if c in stats else 0.0 for c in range(len(loads))]
+        ratios = [s / f for s, f in zip(shares, fair)]
+        jain = sum(ratios) ** 2 / (len(ratios) * sum(r * r for r in ratios))
+
+        sched = factory()
+        start = time.perf_counter()
+        for _, pkt in arrivals:
+            sched.enqueue(pkt)
+        for _ in sched.drain():
+            pass
+        cost = (time.perf_counter() - start) / n_packets * 1e9
+
+        print(f"\n{name}: Jain index {jain:.3f}, scheduler cost {cost:.0f} ns/packet")
+        for c in range(len(loads)):
+            st = stats.get(c)
+            if st is None:
+                print(f"  class {c}: starved")
+                continue
+            print(f"  class {c}: share {shares[c]:6.3f}  mean latency {st.mean_latency * 1e3:9.2f} ms  "
+                  f"p99 {st.latency_percentile(99) * 1e3:9.2f} ms")
+
+
+def bench_packet_layouts(n_packets=1_000_000):
+    """Memory and priority-scheduling throughput of the three packet layouts."""
+    print("=" * 72)
+    print(f"Packet layouts: {n_packets} packets with distinct addresses")
+    print("=" * 72)
+    rng = random.Random(9)
+    specs = [(rng.getrandbits(32), rng.getrandbits(32), rng.choice(_PAYLOADS), rng.randrange(3))
+             for _ in range(n_packets)]
+    builders = [
+        ("Packet (dataclass)", lambda: [Packet(int_to_ip(s), int_to_ip(d), p, c) for s, d, p, c in specs]),
+        # Round-trip through text so each packet owns its address ints, as
+        # it would when parsed from a capture.
+        ("CompactPacket", lambda: [CompactPacket(ip_to_int(int_to_ip(s)), ip_to_int(int_to_ip(d)), p, c)
+                                   for s, d, p, c in specs]),
+    ]
+    if scheduler_mod.np is not None:
+        np = scheduler_mod.np
+        builders.append(("PacketBatch", lambda: PacketBatch(
+            np.fromiter((s for s, _, _, _ in specs), dtype=np.uint32, count=n_packets),
+            np.fromiter((d for _, d, _, _ in specs), dtype=np.uint32, count=n_packets),
+            np.fromiter((len(p) for _, _, p, _ in specs), dtype=np.uint32, count=n_packets),
+            np.fromiter((c for _, _, _, c in specs), dtype=np.int16, count=n_packets),
+            [p for _, _, p, _ in specs])))
+    else:
+        print("PacketBatch: skipped, NumPy not installed")
+    print(f"{'layout':<20} {'MB':>8} {'B/packet':>9} {'priority_scheduler':>20}")
+    for name, build in builders:
+        tracemalloc.start()
+        packets = build()
+        used = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        start = time.perf_counter()
+        priority_scheduler(packets)
+        elapsed = time.perf_counter() - start
+        print(f"{name:<20} {used / 2**20:>8.1f} {used / n_packets:>9.1f} "
+              f"{n_packets / elapsed:>12,.0f} pkts/s")
+        del packets
+
+
+def bench_shaping(n_packets=1_000_000, link_rate=1.25e8):
+    """
+    Replay Poisson traffic (offered loads 0.5/0.3/0.3) through per-class
+    policers and shapers on the simulated clock; report packets/sec.
+    """
+    print("=" * 72)
+    print(f"Token-bucket conditioning: {n_packets} packets")
+    print("=" * 72)
+    arrivals = poisson_arrivals(n_packets, [0.5, 0.3, 0.3], link_rate)
+    packets = [replace(pkt, timestamp=t) for t, pkt in arrivals]
+    sim_seconds = packets[-1].timestamp
+    setups = [
+        ("policers (drop/mark)", lambda: {
+            0: Policer(rate=0.4 * link_rate, burst=64_000),
+            1: Policer(rate=0.2 * link_rate, burst=64_000, mark_priority=2),
+            2: Policer(rate=0.2 * link_rate, burst=64_000)}),
+        ("shapers (max_queue 1000)", lambda: {
+            0: Shaper(rate=0.4 * link_rate, burst=64_000, max_queue=1000),
+            1: Shaper(rate=0.2 * link_rate, burst=64_000, max_queue=1000),
+            2: Shaper(rate=0.2 * link_rate, burst=64_000, max_queue=1000)}),
+    ]
+    for name, make_stages in setups:
+        conditioner = TrafficConditioner(make_stages())
+        start = time.perf_counter()
+        out = conditioner.process(packets)
+        elapsed = time.perf_counter() - start
+        print(f"\n{name}: {n_packets / elapsed:,.0f} packets/s, {len(out)} survivors, "
+              f"{sim_seconds:.2f} simulated s in {elapsed:.2f} s")
+        for cls, counters in conditioner.stats().items():
+            counters.pop("depth_histogram", None)
+            print(f"  class {cls}: {counters}")
+
+
+def bench_aqm(n_packets=500_000, link_rate=1.25e7, loads=(1.3, 0.6), period=1.0):
+    """
+    Bursty Poisson traffic (offered load alternating between loads every
+    period seconds) through one bounded FIFO under tail-drop, RED and CoDel;
+    compare drops, throughput and the sojourn-time distribution. The traffic
+    is open loop: nobody backs off after a drop, so CoDel's sqrt control law
+    needs many intervals to catch up with a large overload.
+    """
+    print("=" * 72)
+    print(f"Active queue management: {n_packets} packets, {link_rate * 8 / 1e6:.0f} Mb/s link, "
+          f"load {' / '.join(map(str, loads))} every {period} s")
+    print("=" * 72)
+    mean_size = sum(len(p) for p in _PAYLOADS) / len(_PAYLOADS)
+    packets = []
+    offset = 0.0
+    seed = 0
+    while len(packets) < n_packets:
+        for load in loads:
+            seed += 1
+            burst = poisson_arrivals(int(load * link_rate * period / mean_size), [load], link_rate, seed)
+            packets.extend(replace(pkt, timestamp=offset + t) for t, pkt in burst if t < period)
+            offset += period
+    del packets[n_packets:]
+    sim_seconds = packets[-1].timestamp
+    mean_tx_time = mean_size / link_rate
+    policies = [
+        ("tail-drop (1000 pkts)", lambda: TailDropQueue(capacity=1000)),
+        ("RED (min 50, max 150)", lambda: REDQueue(capacity=1000, min_th=50, max_th=150,
+                                                    mean_tx_time=mean_tx_time, seed=3)),
+        ("CoDel (5 ms / 100 ms)", lambda: CoDelQueue(capacity=1000)),
+    ]
+    print(f"{sim_seconds:.1f} simulated s")
+    print(f"\n{'policy':<24}{'drop %':>8}{'Mb/s':>8}{'mean ms':>9}{'p50 ms':>8}"
+          f"{'p90 ms':>8}{'p99 ms':>8}{'pkts/s':>12}")
+    for name, make_queue in policies:
+        queue = make_queue()
+        start = time.perf_counter()
+        simulate_queue(queue, packets, link_rate)
+        elapsed = time.perf_counter() - start
+        st = queue.stats
+        print(f"{name:<24}{100 * queue.drops / n_packets:>8.2f}{st.throughput * 8 / 1e6:>8.2f}"
+              f"{st.mean_latency * 1000:>9.2f}{st.latency_percentile(50) * 1000:>8.2f}"
+              f"{st.latency_percentile(90) * 1000:>8.2f}{st.latency_percentile(99) * 1000:>8.2f}"
+              f"{n_packets / elapsed:>12,.0f}")
+
+
+def bench_pipeline(n_routes=100_000, n_packets=500_000, max_workers=None, scheduler="priority",
+                   cache_size=10_000):
+    """
+    Route + per-link scheduling of Zipf traffic: in-process loop, then the
+    multi-process Pipeline from 1 worker up to max_workers (default: CPUs).
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+    print("=" * 72)
+    print(f"Forwarding pipeline: {n_packets} packets, {n_routes} prefixes, "
+          f"{scheduler} per link, {os.cpu_count()} CPUs")
+    print("=" * 72)
+    routes = random_routes(n_routes)
+    router = Router(routes, engine="compact", cache_size=cache_size)
+    rng = random.Random(9)
+    packets = [Packet("10.0.0.1", dest, rng.choice(_PAYLOADS), rng.randrange(3))
+               for dest in zipf_addresses(n_packets)]
+
+    start = time.perf_counter()
+    links = {}
+    for packet in packets:
+        link = router.route_packet(packet.dest_ip)
+        queue = links.get(link)
+        if queue is None:
+            queue = links[link] = SCHEDULERS[scheduler]()
+        queue.enqueue(packet)
+    delivered = sum(1 for queue in links.values() for _ in queue.drain())
+    inline = n_packets / (time.perf_counter() - start)
+    assert delivered == n_packets
+    print(f"{'in-process':>10}: {inline:>12,.0f} packets/s")
+
+    # a worker killed mid-run must make run() raise, not hang on its full inbox
+    def kill_midway(pipeline):
+        for i, packet in enumerate(packets):
+            if i == 1_000:
+                pipeline._procs[0].kill()
+                pipeline._procs[0].join()
+            yield packet
+    with Pipeline(router, 1, scheduler, chunk_size=64) as pipeline:
+        try:
+            pipeline.run(kill_midway(pipeline))
+        except RuntimeError:
+            pass
+        else:
+            raise AssertionError("Pipeline.run finished although its worker was killed")
+
+    counts = sorted({1, max_workers} | {w for w in (2, 4, 8, 16, 32) if w < max_workers})
+    single = None
+    for workers in counts:
+        result = run_pipeline(router, packets, workers=workers, scheduler=scheduler,
+                              cache_size=cache_size)
+        assert sum(p for p, _ in result["links"].values()) == n_packets
+        pps = result["packets_per_sec"]
+        single = single or pps
+        busy = max(result["worker_busy"])
+        print(f"{workers:>3} worker{'s' if workers > 1 else ' '}: {pps:>12,.0f} packets/s "
+              f"({pps / single:.2f}x, busiest worker {busy:.2f} s of {result['elapsed']:.2f} s)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="asst_8 performance benchmarks")
+    parser.add_argument("bench", choices=["engines", "batch", "churn", "cache", "memory", "startup", "ipv6",
+                                           "scheduler", "fairness", "packets", "shaping", "aqm",
+                                           "pipeline"])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--workers", type=int, default=None, help="max worker processes (pipeline)")
+    parser.add_argument("--links", type=int, default=64, help="distinct next hops (startup)")
+    args = parser.parse_args()
+
+    if args.bench == "engines":
+        bench_engines(sizes=args.sizes)
+    elif args.bench == "batch":
+        bench_batch()
+    elif args.bench == "churn":
+        bench_churn()
+    elif args.bench == "cache":
+        bench_cache()
+        bench_cache(engine="linear", n_routes=10_000, n_packets=20_000)
+    elif args.bench == "memory":
+        bench_memory(sizes=args.sizes)
+    elif args.bench == "startup":
+        bench_startup(links=args.links)
+    elif args.bench == "ipv6":
+        bench_ipv6()
+    elif args.bench == "scheduler":
+        bench_scheduler()
+    elif args.bench == "fairness":
+        bench_fairness()
+    elif args.bench == "packets":
+        bench_packet_layouts()
+    elif args.bench == "shaping":
+        bench_shaping()
+    elif args.bench == "aqm":
+        bench_aqm()
+        bench_aqm(link_rate=1.25e6, loads=(1.05, 0.8), period=5.0)
+    elif args.bench == "pipeline":
+        bench_pipeline(max_workers=args.workers)
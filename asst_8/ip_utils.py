@@ -1,36 +1,145 @@
 # ip_utils.py
 from typing import Tuple
 
-def ip_to_binary(ip_address: str) -> str:
+# PREFIX_MASKS[n] is the 32-bit netmask with the top n bits set.
+PREFIX_MASKS = [(0xFFFFFFFF << (32 - n)) & 0xFFFFFFFF for n in range(33)]
+# PREFIX_MASKS_V6[n] is the same for 128-bit IPv6 addresses.
+PREFIX_MASKS_V6 = [((1 << 128) - 1) ^ ((1 << (128 - n)) - 1) for n in range(129)]
+_HEX_DIGITS = frozenset("0123456789abcdefABCDEF")
+
+def ip_to_int(ip_address: str) -> int:
     """
-    Convert dotted-decimal IPv4 address to 32-bit binary string.
-    Example: "192.168.1.1" -> "11000000101010000000000100000001"
+    Convert dotted-decimal IPv4 address to a 32-bit unsigned integer.
+    Example: "192.168.1.1" -> 3232235777
     """
     octets = ip_address.strip().split(".")
     if len(octets) != 4:
         raise ValueError(f"Invalid IPv4 address: {ip_address}")
-    bits = []
+    value = 0
     for o in octets:
         n = int(o)
         if n < 0 or n > 255:
             raise ValueError(f"Invalid octet in IP: {o}")
-        bits.append(f"{n:08b}")
-    return "".join(bits)
+        value = (value << 8) | n
+    return value
 
-def get_network_prefix(ip_cidr: str) -> str:
+def int_to_ip(value: int) -> str:
+    """
+    Convert a 32-bit unsigned integer back to dotted-decimal notation.
+    Example: 3232235777 -> "192.168.1.1"
+    """
+    if value < 0 or value > 0xFFFFFFFF:
+        raise ValueError(f"Invalid IPv4 integer: {value}")
+    return f"{value >> 24}.{(value >> 16) & 0xFF}.{(value >> 8) & 0xFF}.{value & 0xFF}"
+
+def parse_cidr(ip_cidr: str) -> Tuple[int, int]:
     """
     Given a CIDR string like "200.23.16.0/23",
-    return the network prefix bits as a string (length = mask length).
-    Example -> "11001000000101110001000" (23 bits)
+    return (network_int, prefix_len) with host bits cleared.
+    Example -> (3356954624, 23)
     """
     ip_part, prefix_len_str = ip_cidr.strip().split("/")
     prefix_len = int(prefix_len_str)
     if prefix_len < 0 or prefix_len > 32:
         raise ValueError(f"Invalid prefix length: {prefix_len}")
-    ip_bits = ip_to_binary(ip_part)
-    return ip_bits[:prefix_len]
+    return ip_to_int(ip_part) & PREFIX_MASKS[prefix_len], prefix_len
+
+def cidr_to_int_mask(ip_cidr: str) -> Tuple[int, int]:
+    """
+    Given a CIDR string like "200.23.16.0/23",
+    return (network_int, mask_int) for mask-and-compare matching:
+    an address a is inside the prefix iff a & mask_int == network_int.
+    """
+    network, prefix_len = parse_cidr(ip_cidr)
+    return network, PREFIX_MASKS[prefix_len]
+
+def ipv6_to_int(ip_address: str) -> int:
+    """
+    Convert an IPv6 address to a 128-bit unsigned integer.
+    Accepts "::" zero compression and a trailing dotted IPv4 part.
+    Example: "2001:db8::1" -> 42540766411282592856903984951653826561
+    """
+    addr = ip_address.strip()
+    if "." in addr:
+        head, _, v4_part = addr.rpartition(":")
+        v4 = ip_to_int(v4_part)
+        addr = f"{head}:{v4 >> 16:x}:{v4 & 0xFFFF:x}"
+    if addr.count("::") > 1:
+        raise ValueError(f"Invalid IPv6 address: {ip_address}")
+    if "::" in addr:
+        left, right = addr.split("::")
+        left_groups = left.split(":") if left else []
+        right_groups = right.split(":") if right else []
+        missing = 8 - len(left_groups) - len(right_groups)
+        if missing < 1:
+            raise ValueError(f"Invalid IPv6 address: {ip_address}")
+        groups = left_groups + ["0"] * missing + right_groups
+    else:
+        groups = addr.split(":")
+    if len(groups) != 8:
+        raise ValueError(f"Invalid IPv6 address: {ip_address}")
+    value = 0
+    for g in groups:
+        if not 0 < len(g) <= 4 or not _HEX_DIGITS.issuperset(g):
+            raise ValueError(f"Invalid group in IPv6 address: {g!r}")
+        value = (value << 16) | int(g, 16)
+    return value
+
+def int_to_ipv6(value: int) -> str:
+    """
+    Convert a 128-bit unsigned integer to compressed IPv6 text (RFC 5952).
+    Example: 42540766411282592856903984951653826561 -> "2001:db8::1"
+    """
+    if value < 0 or value >= 1 << 128:
+        raise ValueError(f"Invalid IPv6 integer: {value}")
+    groups = [(value >> (112 - 16 * i)) & 0xFFFF for i in range(8)]
+    # Find the longest run (length >= 2) of zero groups to replace with "::"
+    best_start, best_len, start = -1, 1, None
+    for i, g in enumerate(groups + [1]):
+        if g == 0 and start is None:
+            start = i
+        elif g != 0 and start is not None:
+            if i - start > best_len:
+                best_start, best_len = start, i - start
+            start = None
+    text = [f"{g:x}" for g in groups]
+    if best_start < 0:
+        return ":".join(text)
+    return ":".join(text[:best_start]) + "::" + ":".join(text[best_start + best_len:])
+
+def parse_cidr6(ip_cidr: str) -> Tuple[int, int]:
+    """
+    Given an IPv6 CIDR string like "2001:db8::/32",
+    return (network_int, prefix_len) with host bits cleared.
+    """
+    ip_part, prefix_len_str = ip_cidr.strip().split("/")
+    prefix_len = int(prefix_len_str)
+    if prefix_len < 0 or prefix_len > 128:
+        raise ValueError(f"Invalid prefix length: {prefix_len}")
+    return ipv6_to_int(ip_part) & PREFIX_MASKS_V6[prefix_len], prefix_len
+
+def ip_to_binary(ip_address: str) -> str:
+    """
+    Convert dotted-decimal IPv4 address to 32-bit binary string.
+    Example: "192.168.1.1" -> "11000000101010000000000100000001"
+    """
+    return f"{ip_to_int(ip_address):032b}"
+
+def get_network_prefix(ip_cidr: str) -> str:
+    """
+    Given a CIDR string like "200.23.16.0/23",
+    return the network prefix bits as a string (length = mask length).
+    Example -> "11001000000101110001000" (23 bits)
+    """
+    network, prefix_len = parse_cidr(ip_cidr)
+    return f"{network:032b}"[:prefix_len]
 
 if __name__ == "__main__":
     # Quick manual test
     print("ip_to_binary('192.168.1.1') =", ip_to_binary("192.168.1.1"))
-    print("get_network_prefix('200.23.16.0/23') =", get_network_prefix("200.23.16.0/23"))
\ No newline at end of file
+    print("get_network_prefix('200.23.16.0/23') =", get_network_prefix("200.23.16.0/23"))
+    print("ip_to_int('192.168.1.1') =", ip_to_int("192.168.1.1"))
+    print("parse_cidr('200.23.16.0/23') =", parse_cidr("200.23.16.0/23"))
+    print("cidr_to_int_mask('200.23.16.0/23') =", cidr_to_int_mask("200.23.16.0/23"))
+    print("ipv6_to_int('2001:db8::1') =", ipv6_to_int("2001:db8::1"))
+    print("parse_cidr6('2001:db8::/32') =", parse_cidr6("2001:db8::/32"))
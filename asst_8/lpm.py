@@ -0,0 +1,434 @@
+# lpm.py
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+from typing import Iterable, Iterator, List, Optional, Tuple
+from ip_utils import PREFIX_MASKS, PREFIX_MASKS_V6
+
+ADDRESS_BITS = 32
+
+# Snapshot layout of a CompactTable (see CompactTable.to_bytes):
+#   header  magic, version, byte order, link-id item size, route count, next-hop bytes
+#   counts  33 x uint32 routes per prefix length
+#   networks, link_ids, plens arrays, then the next hops as "\n"-joined UTF-8
+SNAPSHOT_MAGIC = b"LPM4"
+SNAPSHOT_VERSION = 1
+_SNAPSHOT_HEADER = struct.Struct("<4sBBBxII")
+_SNAPSHOT_COUNTS = struct.Struct(f"<{ADDRESS_BITS + 1}I")
+
+
+class _TrieNode:
+    __slots__ = ("prefix", "plen", "link", "child")
+
+    def __init__(self, prefix: int, plen: int, link: Optional[str] = None):
+        self.prefix = prefix    # network bits, left-aligned in 32 bits
+        self.plen = plen        # number of significant bits in prefix
+        self.link = link        # output link, None for pure branching nodes
+        self.child = [None, None]
+
+
+class BinaryTrie:
+    """
+    Path-compressed binary (Patricia) trie keyed on 32-bit integers.
+    Every node stores the full prefix it represents, so a lookup walks at most
+    one node per distinct prefix length on the path instead of one per bit.
+    """
+
+    def __init__(self):
+        # The root is a permanent /0 node; a default route simply sets its link.
+        self._root = _TrieNode(0, 0)
+        self._size = 0
+
+    @classmethod
+    def build(cls, entries: List[Tuple[int, int, str]]) -> "BinaryTrie":
+        """Build from (prefix, plen, link) entries; the first of duplicates wins."""
+        trie = cls()
+        for prefix, plen, link in reversed(entries):
+            trie.insert(prefix, plen, link)
+        return trie
+
+    def __len__(self) -> int:
+        return self._size
+
+    @staticmethod
+    def _bit(value: int, index: int) -> int:
+        """Return bit `index` (0 = most significant) of a 32-bit value."""
+        return (value >> (ADDRESS_BITS - 1 - index)) & 1
+
+    def insert(self, prefix: int, plen: int, link: str):
+        """
+        Add (or replace) the route prefix/plen -> link.
+        prefix must already be masked to plen bits.
+        """
+        parent, node = None, self._root
+        while True:
+            diff = node.prefix ^ prefix
+            common = min(node.plen, plen, ADDRESS_BITS - diff.bit_length())
+            if common < node.plen:
+                # The new prefix diverges inside this node's compressed path:
+                # build the replacement subtree first, then link it in.
+                if common == plen:
+                    new = _TrieNode(prefix, plen, link)
+                    new.child[self._bit(node.prefix, plen)] = node
+                else:
+                    new = _TrieNode(prefix & PREFIX_MASKS[common], common)
+                    new.child[self._bit(prefix, common)] = _TrieNode(prefix, plen, link)
+                    new.child[self._bit(node.prefix, common)] = node
+                parent.child[self._bit(prefix, parent.plen)] = new
+                self._size += 1
+                return
+            if plen == node.plen:
+                if node.link is None:
+                    self._size += 1
+                node.link = link
+                return
+            b = self._bit(prefix, node.plen)
+            nxt = node.child[b]
+            if nxt is None:
+                node.child[b] = _TrieNode(prefix, plen, link)
+                self._size += 1
+                return
+            parent, node = node, nxt
+
+    def remove(self, prefix: int, plen: int) -> bool:
+        """
+        Withdraw the route prefix/plen. Returns False if it was not present.
+        Nodes left without a route and with fewer than two children are
+        spliced out, so the trie stays path-compressed.
+        """
+        path = []
+        node = self._root
+        while node is not None and node.plen < plen:
+            if prefix & PREFIX_MASKS[node.plen] != node.prefix:
+                return False
+            path.append(node)
+            node = node.child[self._bit(prefix, node.plen)]
+        if node is None or node.plen != plen or node.prefix != prefix or node.link is None:
+            return False
+        node.link = None
+        self._size -= 1
+        # Each fix-up below is a single child-pointer store, so a concurrent
+        # lookup sees either the old or the new shape, never a broken one.
+        while path and node.link is None:
+            parent = path.pop()
+            children = [c for c in node.child if c is not None]
+            if len(children) == 2:
+                break
+            parent.child[self._bit(node.prefix, parent.plen)] = children[0] if children else None
+            if children or parent is self._root:
+                break
+            node = parent
+        return True
+
+    def items(self) -> Iterator[Tuple[int, int, str]]:
+        """Yield every (prefix, plen, link) stored in the trie."""
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            if node.link is not None:
+                yield node.prefix, node.plen, node.link
+            stack.extend(c for c in node.child if c is not None)
+
+    def lookup(self, addr: int) -> Optional[str]:
+        """Longest prefix match for a 32-bit address; None if nothing matches."""
+        masks = PREFIX_MASKS
+        best = None
+        node = self._root
+        while node is not None:
+            if addr & masks[node.plen] != node.prefix:
+                break
+            if node.link is not None:
+                best = node.link
+            if node.plen == ADDRESS_BITS:
+                break
+            node = node.child[(addr >> (ADDRESS_BITS - 1 - node.plen)) & 1]
+        return best
+
+    def memory_footprint(self) -> int:
+        """Approximate bytes held by the trie nodes and their prefix ints."""
+        total = 0
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            total += sys.getsizeof(node) + sys.getsizeof(node.child) + sys.getsizeof(node.prefix)
+            stack.extend(c for c in node.child if c is not None)
+        return total
+
+
+class CompactTable:
+    """
+    Array-backed forwarding table. Routes are kept sorted by
+    (prefix length descending, network ascending) in three parallel arrays:
+        networks  array('I')  network address
+        plens     array('B')  prefix length
+        link_ids  array('H')  index into next_hops (interned output links;
+                              widened to array('I') past 65536 next hops)
+    A lookup binary-searches the slice of each prefix length that is present,
+    longest first. Inserts and removals shift the arrays, so they are O(n).
+    A table loaded with from_buffer(copy=False) reads its arrays straight out
+    of the buffer and copies them into real arrays on the first update.
+    """
+
+    def __init__(self):
+        self.networks = array("I")
+        self.plens = array("B")
+        self.link_ids = array("H")
+        self.next_hops: List[str] = []
+        self._hop_ids = {}
+        self._counts = [0] * (ADDRESS_BITS + 1)
+        self._levels = []
+        self._buffer = None  # keeps a mapped snapshot alive while viewed
+
+    @classmethod
+    def build(cls, entries: Iterable[Tuple[int, int, str]]) -> "CompactTable":
+        """Build from (prefix, plen, link) entries; the first of duplicates wins."""
+        table = cls()
+        unique = {}
+        for prefix, plen, link in entries:
+            unique.setdefault((plen, prefix), link)
+        for (plen, prefix) in sorted(unique, key=lambda k: (-k[0], k[1])):
+            table.networks.append(prefix)
+            table.plens.append(plen)
+            hop_id = table._intern(unique[(plen, prefix)])  # may widen link_ids
+            table.link_ids.append(hop_id)
+            table._counts[plen] += 1
+        table._rebuild_levels()
+        return table
+
+    def to_bytes(self) -> bytes:
+        """Serialize into the flat snapshot layout read by from_buffer."""
+        hops = "\n".join(self.next_hops).encode("utf-8")
+        byteorder = 0 if sys.byteorder == "little" else 1
+        return b"".join((
+            _SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, byteorder,
+                                  self.link_ids.itemsize, len(self.networks), len(hops)),
+            _SNAPSHOT_COUNTS.pack(*self._counts),
+            self.networks.tobytes(), self.link_ids.tobytes(), self.plens.tobytes(), hops,
+        ))
+
+    @classmethod
+    def from_buffer(cls, buf, copy: bool = True) -> "CompactTable":
+        """
+        Load a table from a snapshot held in any buffer (bytes, mmap,
+        shared memory). With copy=False the arrays are memoryviews into buf,
+        so start-up does no per-route work at all.
+        """
+        view = memoryview(buf)
+        magic, version, byteorder, link_size, n, hops_len = _SNAPSHOT_HEADER.unpack_from(view)
+        if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+            raise ValueError("Not a forwarding-table snapshot")
+        if byteorder != (0 if sys.byteorder == "little" else 1):
+            copy = True
+        table = cls()
+        table._counts = list(_SNAPSHOT_COUNTS.unpack_from(view, _SNAPSHOT_HEADER.size))
+        offset = _SNAPSHOT_HEADER.size + _SNAPSHOT_COUNTS.size
+        sections = []
+        for typecode, size in (("I", 4), ("H" if link_size == 2 else "I", link_size), ("B", 1)):
+            chunk = view[offset:offset + n * size]
+            offset += n * size
+            if copy:
+                arr = array(typecode)
+                arr.frombytes(chunk)
+                if byteorder != (0 if sys.byteorder == "little" else 1):
+                    arr.byteswap()
+                sections.append(arr)
+            else:
+                sections.append(chunk.cast(typecode))
+        table.networks, table.link_ids, table.plens = sections
+        hops = bytes(view[offset:offset + hops_len]).decode("utf-8")
+        table.next_hops = hops.split("\n") if hops_len else []
+        table._hop_ids = {hop: i for i, hop in enumerate(table.next_hops)}
+        if not copy:
+            table._buffer = buf
+        table._rebuild_levels()
+        return table
+
+    def _materialize(self):
+        """Swap buffer-backed views for real arrays before modifying them."""
+        if self._buffer is not None:
+            self.networks = array("I", self.networks)
+            self.link_ids = array(self.link_ids.format, self.link_ids)
+            self.plens = array("B", self.plens)
+            self._buffer = None
+
+    def __len__(self) -> int:
+        return len(self.networks)
+
+    def _intern(self, link: str) -> int:
+        hop_id = self._hop_ids.get(link)
+        if hop_id is None:
+            hop_id = self._hop_ids[link] = len(self.next_hops)
+            self.next_hops.append(link)
+            if hop_id > 0xFFFF and self.link_ids.typecode == "H":
+                self.link_ids = array("I", self.link_ids)
+        return hop_id
+
+    def _rebuild_levels(self):
+        """Recompute the (mask, lo, hi) slice of every present prefix length."""
+        levels = []
+        hi = 0
+        for plen in range(ADDRESS_BITS, -1, -1):
+            if self._counts[plen]:
+                lo, hi = hi, hi + self._counts[plen]
+                levels.append((PREFIX_MASKS[plen], lo, hi))
+        self._levels = levels
+
+    def _find(self, prefix: int, plen: int) -> Tuple[int, bool]:
+        lo = sum(self._counts[plen + 1:])
+        hi = lo + self._counts[plen]
+        i = bisect_left(self.networks, prefix, lo, hi)
+        return i, i < hi and self.networks[i] == prefix
+
+    def insert(self, prefix: int, plen: int, link: str):
+        """Add (or replace) the route prefix/plen -> link."""
+        self._materialize()
+        i, found = self._find(prefix, plen)
+        hop_id = self._intern(link)
+        if found:
+            self.link_ids[i] = hop_id
+            return
+        self.networks.insert(i, prefix)
+        self.plens.insert(i, plen)
+        self.link_ids.insert(i, hop_id)
+        self._counts[plen] += 1
+        self._rebuild_levels()
+
+    def remove(self, prefix: int, plen: int) -> bool:
+        """Withdraw the route prefix/plen. Returns False if it was not present."""
+        self._materialize()
+        i, found = self._find(prefix, plen)
+        if not found:
+            return False
+        del self.networks[i]
+        del self.plens[i]
+        del self.link_ids[i]
+        self._counts[plen] -= 1
+        self._rebuild_levels()
+        return True
+
+    def items(self) -> Iterator[Tuple[int, int, str]]:
+        """Yield every (prefix, plen, link), longest prefixes first."""
+        hops = self.next_hops
+        for prefix, plen, hop_id in zip(self.networks, self.plens, self.link_ids):
+            yield prefix, plen, hops[hop_id]
+
+    def lookup(self, addr: int) -> Optional[str]:
+        """Longest prefix match for a 32-bit address; None if nothing matches."""
+        networks = self.networks
+        for mask, lo, hi in self._levels:
+            key = addr & mask
+            i = bisect_left(networks, key, lo, hi)
+            if i < hi and networks[i] == key:
+                return self.next_hops[self.link_ids[i]]
+        return None
+
+    def memory_footprint(self) -> int:
+        """Bytes held by the three arrays plus the next-hop table."""
+        arrays = (self.networks, self.plens, self.link_ids)
+        return (sum(sys.getsizeof(a) if isinstance(a, array) else a.nbytes for a in arrays)
+                + sys.getsizeof(self.next_hops) + sum(sys.getsizeof(h) for h in self.next_hops))
+
+
+class PrefixHashTable:
+    """
+    One hash table per prefix length, probed longest length first.
+    This suits IPv6: addresses are 128 bits wide, which would make a bit-wise
+    trie deep, but real tables use only a handful of distinct prefix lengths
+    (/32, /48, /64, ...), so a lookup costs that many dict probes.
+    """
+
+    def __init__(self, bits: int = 128):
+        if bits not in (32, 128):
+            raise ValueError(f"Unsupported address width: {bits}")
+        self.bits = bits
+        self._masks = PREFIX_MASKS_V6 if bits == 128 else PREFIX_MASKS
+        self._tables = {}   # prefix length -> {network: link}
+        self._levels = []   # (mask, table) for each present length, longest first
+        self._size = 0
+
+    @classmethod
+    def build(cls, entries: Iterable[Tuple[int, int, str]], bits: int = 128) -> "PrefixHashTable":
+        """Build from (prefix, plen, link) entries; the first of duplicates wins."""
+        table = cls(bits)
+        for prefix, plen, link in entries:
+            level = table._tables.setdefault(plen, {})
+            if prefix not in level:
+                level[prefix] = link
+                table._size += 1
+        table._rebuild_levels()
+        return table
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _rebuild_levels(self):
+        self._levels = [(self._masks[plen], self._tables[plen])
+                        for plen in sorted(self._tables, reverse=True)]
+
+    def insert(self, prefix: int, plen: int, link: str):
+        """Add (or replace) the route prefix/plen -> link."""
+        level = self._tables.get(plen)
+        if level is None:
+            level = self._tables[plen] = {}
+            self._rebuild_levels()
+        if prefix not in level:
+            self._size += 1
+        level[prefix] = link
+
+    def remove(self, prefix: int, plen: int) -> bool:
+        """Withdraw the route prefix/plen. Returns False if it was not present."""
+        level = self._tables.get(plen)
+        if level is None or level.pop(prefix, None) is None:
+            return False
+        self._size -= 1
+        if not level:
+            del self._tables[plen]
+            self._rebuild_levels()
+        return True
+
+    def items(self) -> Iterator[Tuple[int, int, str]]:
+        """Yield every (prefix, plen, link), longest prefixes first."""
+        for plen in sorted(self._tables, reverse=True):
+            for prefix, link in self._tables[plen].items():
+                yield prefix, plen, link
+
+    def lookup(self, addr: int) -> Optional[str]:
+        """Longest prefix match; None if nothing matches."""
+        for mask, level in self._levels:
+            link = level.get(addr & mask)
+            if link is not None:
+                return link
+        return None
+
+    def memory_footprint(self) -> int:
+        """Approximate bytes held by the per-length dicts and their keys."""
+        total = sys.getsizeof(self._tables)
+        for level in self._tables.values():
+            total += sys.getsizeof(level) + sum(sys.getsizeof(k) for k in level)
+        return total
+
+
+def tuple_table_footprint(entries: Iterable[Tuple[int, int, str]]) -> int:
+    """
+    Bytes held by a list of (network, plen, link) tuples, i.e. the layout of
+    the linear engine. Objects shared between entries are counted once.
+    """
+    entries = list(entries)
+    seen = set()
+    total = sys.getsizeof(entries)
+    for entry in entries:
+        for obj in (entry, *entry):
+            if id(obj) not in seen:
+                seen.add(id(obj))
+                total += sys.getsizeof(obj)
+    return total
+
+
+if __name__ == "__main__":
+    t = BinaryTrie()
+    t.insert(0xDF010100, 24, "Link 0")   # 223.1.1.0/24
+    t.insert(0xDF010000, 16, "Link 4")   # 223.1.0.0/16
+    print("223.1.1.100 ->", t.lookup(0xDF010164))
+    print("223.1.250.1 ->", t.lookup(0xDF01FA01))
+    print("198.51.100.1 ->", t.lookup(0xC6336401))
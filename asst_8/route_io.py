@@ -0,0 +1,45 @@
+# route_io.py
+import mmap
+from typing import Iterable, Iterator, Tuple
+
+from lpm import CompactTable
+
+def read_route_dump(path: str) -> Iterator[Tuple[str, str]]:
+    """
+    Stream (cidr, next_hop) tuples from a text route dump, one route per line:
+        223.1.1.0/24 Link 0
+    Everything after the first run of whitespace is the next hop, so names
+    such as "Link 4 (ISP)" survive. Blank lines and '#' comments are skipped.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        for lineno, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            parts = line.split(None, 1)
+            if len(parts) != 2:
+                raise ValueError(f"{path}:{lineno}: expected '<cidr> <next hop>'")
+            yield parts[0], parts[1]
+
+def write_route_dump(routes: Iterable[Tuple[str, str]], path: str):
+    """Write (cidr, next_hop) tuples in the format read by read_route_dump."""
+    with open(path, "w", encoding="utf-8") as f:
+        for cidr, link in routes:
+            f.write(f"{cidr} {link}\n")
+
+def save_snapshot(table: CompactTable, path: str):
+    """Write a CompactTable to a binary snapshot file."""
+    with open(path, "wb") as f:
+        f.write(table.to_bytes())
+
+def load_snapshot(path: str, use_mmap: bool = True) -> CompactTable:
+    """
+    Load a binary snapshot. With use_mmap the file is memory-mapped and the
+    table reads its arrays straight from the page cache, so cold start cost
+    does not grow with the number of routes.
+    """
+    with open(path, "rb") as f:
+        if not use_mmap:
+            return CompactTable.from_buffer(f.read())
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return CompactTable.from_buffer(mapped, copy=False)
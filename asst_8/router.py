@@ -1,39 +1,363 @@
 # router.py
-from typing import List, Tuple
-from ip_utils import ip_to_binary, get_network_prefix
+import bisect
+import itertools
+from collections import OrderedDict
+from typing import Dict, List, Sequence, Tuple
+from ip_utils import (PREFIX_MASKS, int_to_ip, int_to_ipv6, ip_to_int, ipv6_to_int,
+                      parse_cidr, parse_cidr6)
+from lpm import BinaryTrie, CompactTable, PrefixHashTable, tuple_table_footprint
+import route_io
+
+try:
+    import numpy as np
+except ImportError:  # route_batch falls back to a pure-Python path
+    np = None
+
+DEFAULT_GATEWAY = "Default Gateway"
+# engine name -> table class; the linear scan lives directly on the Router
+ENGINES = {"linear": None, "trie": BinaryTrie, "compact": CompactTable}
+# Flow-cache keys for IPv6 destinations carry this bit so they never collide
+# with a 32-bit IPv4 key.
+_V6_CACHE_KEY = 1 << 128
+
+class FlowCache:
+    """
+    Bounded LRU cache of destination integer -> output link, with hit/miss
+    counters. The owner must clear() it whenever routes change.
+    """
+    def __init__(self, capacity: int):
+        if capacity <= 0:
+            raise ValueError(f"Invalid cache capacity: {capacity}")
+        self.capacity = capacity
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, dest: int):
+        link = self._entries.get(dest)
+        if link is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(dest)
+        self.hits += 1
+        return link
+
+    def put(self, dest: int, link: str):
+        self._entries[dest] = link
+        if len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
 
 class Router:
-    def __init__(self, routes: List[Tuple[str, str]]):
+    def __init__(self, routes: List[Tuple[str, str]], engine: str = "linear",
+                 cache_size: int = 0):
         """
         routes: list of tuples (cidr_prefix_string, output_link_string)
-        Example: [("223.1.1.0/24", "Link 0"), ...]
+        Example: [("223.1.1.0/24", "Link 0"), ("2001:db8::/32", "Link 5"), ...]
+        engine: IPv4 lookup structure. "linear" scans the sorted table,
+        "trie" uses a path-compressed binary trie, "compact" a sorted
+        array-backed table (see lpm.py). IPv6 routes always go to a
+        per-prefix-length hash table, which suits 128-bit addresses better.
+        cache_size: if > 0, keep an LRU FlowCache of that many destinations
+        in front of the longest prefix match.
         """
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown forwarding engine: {engine}")
+        self.engine = engine
         self._forwarding_table = []
+        self._lpm = None
+        self._v6 = PrefixHashTable(128)
+        self._batch_index = None
+        self.flow_cache = FlowCache(cache_size) if cache_size > 0 else None
         self.build_forwarding_table(routes)
 
+    @classmethod
+    def from_route_dump(cls, path: str, engine: str = "linear", cache_size: int = 0) -> "Router":
+        """Build a router by streaming a text route dump (see route_io)."""
+        return cls(route_io.read_route_dump(path), engine=engine, cache_size=cache_size)
+
+    @classmethod
+    def from_snapshot(cls, path: str, use_mmap: bool = True, cache_size: int = 0) -> "Router":
+        """
+        Cold-start a "compact" router from a binary snapshot written by
+        save_snapshot, skipping CIDR parsing altogether.
+        """
+        router = cls([], engine="compact", cache_size=cache_size)
+        router._lpm = route_io.load_snapshot(path, use_mmap=use_mmap)
+        router._routes_changed()
+        return router
+
+    @classmethod
+    def from_buffer(cls, buf, cache_size: int = 0) -> "Router":
+        """
+        Build a "compact" router directly over a snapshot held in a buffer
+        (e.g. multiprocessing shared memory) without copying the arrays.
+        The buffer must outlive the router.
+        """
+        router = cls([], engine="compact", cache_size=cache_size)
+        router._lpm = CompactTable.from_buffer(buf, copy=False)
+        router._routes_changed()
+        return router
+
+    def _compact_table(self) -> CompactTable:
+        if isinstance(self._lpm, CompactTable):
+            return self._lpm
+        return CompactTable.build(self._routes())
+
+    def snapshot_bytes(self) -> bytes:
+        """The IPv4 forwarding table in the binary snapshot layout (any engine)."""
+        return self._compact_table().to_bytes()
+
+    def save_snapshot(self, path: str):
+        """
+        Write the IPv4 forwarding table as a binary snapshot (any engine).
+        The snapshot format is IPv4-only; use save_route_dump for v6 routes.
+        """
+        route_io.save_snapshot(self._compact_table(), path)
+
+    def save_route_dump(self, path: str):
+        """Write the forwarding table as a text route dump."""
+        v4 = ((f"{int_to_ip(network)}/{plen}", link) for network, plen, link in self._routes())
+        route_io.write_route_dump(itertools.chain(v4, self.ipv6_routes()), path)
+
+    def ipv6_routes(self) -> List[Tuple[str, str]]:
+        """The IPv6 routes as (cidr, link) tuples."""
+        return [(f"{int_to_ipv6(network)}/{plen}", link) for network, plen, link in self._v6.items()]
+
+    def _routes_changed(self):
+        """Drop everything derived from the routes (batch index, flow cache)."""
+        self._batch_index = None
+        if self.flow_cache is not None:
+            self.flow_cache.clear()
+
     def build_forwarding_table(self, routes: List[Tuple[str, str]]):
         """
         Convert human-readable routes into internal table of:
-        (prefix_bits, prefix_length, output_link)
+        (network_int, prefix_length, output_link)
         and sort by prefix_length descending to simplify LPM.
         """
         tbl = []
+        tbl6 = []
         for cidr, link in routes:
-            prefix_bits = get_network_prefix(cidr)
-            tbl.append((prefix_bits, len(prefix_bits), link))
+            if ":" in cidr:
+                tbl6.append(parse_cidr6(cidr) + (link,))
+            else:
+                network, plen = parse_cidr(cidr)
+                tbl.append((network, plen, link))
+        self._v6 = PrefixHashTable.build(tbl6, bits=128)
+        table_cls = ENGINES[self.engine]
+        if table_cls is not None:
+            # The table classes order routes themselves; as with the linear
+            # scan, the first route listed for a duplicate prefix wins.
+            self._lpm = table_cls.build(tbl)
+            tbl = []
         # Sort by prefix length (longest first)
         tbl.sort(key=lambda t: t[1], reverse=True)
         self._forwarding_table = tbl
+        self._routes_changed()
+
+    def add_route(self, cidr: str, link: str):
+        """
+        Insert or replace a single route without rebuilding the table.
+        The trie engine does this in O(prefix length); the linear and
+        compact engines binary-search the position and shift the rest.
+        """
+        if ":" in cidr:
+            self._v6.insert(*parse_cidr6(cidr), link)
+            self._routes_changed()
+            return
+        network, plen = parse_cidr(cidr)
+        if self._lpm is not None:
+            self._lpm.insert(network, plen, link)
+        else:
+            tbl = self._forwarding_table
+            lo = bisect.bisect_left(tbl, -plen, key=lambda t: -t[1])
+            hi = bisect.bisect_right(tbl, -plen, key=lambda t: -t[1], lo=lo)
+            for i in range(lo, hi):
+                if tbl[i][0] == network:
+                    tbl[i] = (network, plen, link)
+                    break
+            else:
+                tbl.insert(hi, (network, plen, link))
+        self._routes_changed()
+
+    def withdraw_route(self, cidr: str) -> bool:
+        """
+        Remove the route for exactly this prefix.
+        Returns False if no such route was installed.
+        """
+        if ":" in cidr:
+            removed = self._v6.remove(*parse_cidr6(cidr))
+            if removed:
+                self._routes_changed()
+            return removed
+        network, plen = parse_cidr(cidr)
+        if self._lpm is not None:
+            removed = self._lpm.remove(network, plen)
+        else:
+            tbl = self._forwarding_table
+            lo = bisect.bisect_left(tbl, -plen, key=lambda t: -t[1])
+            hi = bisect.bisect_right(tbl, -plen, key=lambda t: -t[1], lo=lo)
+            kept = [t for t in tbl[lo:hi] if t[0] != network]
+            removed = len(kept) != hi - lo
+            if removed:
+                tbl[lo:hi] = kept
+        if removed:
+            self._routes_changed()
+        return removed
+
+    def _routes(self):
+        """Iterate (network_int, prefix_len, link) in longest-prefix-first order."""
+        if self._lpm is not None:
+            return sorted(self._lpm.items(), key=lambda t: t[1], reverse=True)
+        return self._forwarding_table
 
     def route_packet(self, dest_ip: str) -> str:
         """
         Longest Prefix Match: return output link string or "Default Gateway".
+        dest_ip may be IPv4 or IPv6.
         """
-        dest_bits = ip_to_binary(dest_ip)
-        for prefix_bits, plen, link in self._forwarding_table:
-            if dest_bits.startswith(prefix_bits):
+        if ":" in dest_ip:
+            dest = ipv6_to_int(dest_ip)
+            lookup, key = self._lookup6, dest | _V6_CACHE_KEY
+        else:
+            dest = ip_to_int(dest_ip)
+            lookup, key = self._lookup, dest
+        cache = self.flow_cache
+        if cache is None:
+            return lookup(dest)
+        link = cache.get(key)
+        if link is None:
+            link = lookup(dest)
+            cache.put(key, link)
+        return link
+
+    def _lookup6(self, dest: int) -> str:
+        link = self._v6.lookup(dest)
+        return DEFAULT_GATEWAY if link is None else link
+
+    def _lookup(self, dest: int) -> str:
+        if self._lpm is not None:
+            link = self._lpm.lookup(dest)
+            return DEFAULT_GATEWAY if link is None else link
+        masks = PREFIX_MASKS
+        for network, plen, link in self._forwarding_table:
+            if dest & masks[plen] == network:
                 return link
-        return "Default Gateway"
+        return DEFAULT_GATEWAY
+
+    def memory_footprint(self) -> Dict[str, object]:
+        """
+        Report the bytes held by this router's forwarding table next to what
+        the same routes cost as a list of (network, plen, link) tuples.
+        """
+        entries = list(self._routes())
+        tuple_bytes = tuple_table_footprint(entries)
+        table_bytes = tuple_bytes if self._lpm is None else self._lpm.memory_footprint()
+        return {
+            "engine": self.engine,
+            "routes": len(entries),
+            "table_bytes": table_bytes,
+            "tuple_layout_bytes": tuple_bytes,
+            "bytes_per_route": table_bytes / len(entries) if entries else 0.0,
+            "ratio_vs_tuples": table_bytes / tuple_bytes,
+            "v6_routes": len(self._v6),
+            "v6_table_bytes": self._v6.memory_footprint(),
+        }
+
+    def _build_batch_index(self):
+        """
+        Group routes by prefix length (longest first). Each level holds the
+        networks of that length; the first route listed for a prefix wins.
+        """
+        levels: Dict[int, Dict[int, str]] = {}
+        for network, plen, link in self._routes():
+            levels.setdefault(plen, {}).setdefault(network, link)
+        lengths = sorted(levels, reverse=True)
+        if np is None:
+            return [(PREFIX_MASKS[plen], levels[plen]) for plen in lengths]
+        links = sorted({link for level in levels.values() for link in level.values()})
+        link_ids = {link: i for i, link in enumerate(links)}
+        index = []
+        for plen in lengths:
+            networks = sorted(levels[plen])
+            index.append((
+                np.uint32(PREFIX_MASKS[plen]),
+                np.array(networks, dtype=np.uint32),
+                np.array([link_ids[levels[plen][n]] for n in networks], dtype=np.int32),
+            ))
+        return links + [DEFAULT_GATEWAY], index
+
+    def route_batch(self, dest_ips: Sequence) -> List[str]:
+        """
+        Longest Prefix Match for many destinations at once.
+        dest_ips: list of address strings / 32-bit IPv4 ints, or a NumPy
+        uint32 array. Returns the output links in the same order.
+        With NumPy each IPv4 prefix length is resolved for the whole batch
+        with one mask and one searchsorted over that length's sorted
+        networks. IPv6 strings in a list are looked up one by one.
+        """
+        if np is None or not isinstance(dest_ips, np.ndarray):
+            v6_positions = {i for i, ip in enumerate(dest_ips) if isinstance(ip, str) and ":" in ip}
+            if v6_positions:
+                v4_links = iter(self.route_batch(
+                    [ip for i, ip in enumerate(dest_ips) if i not in v6_positions]))
+                return [self._lookup6(ipv6_to_int(ip)) if i in v6_positions else next(v4_links)
+                        for i, ip in enumerate(dest_ips)]
+        if self._batch_index is None:
+            self._batch_index = self._build_batch_index()
+        if np is None:
+            return self._route_batch_python(dest_ips)
+
+        if isinstance(dest_ips, np.ndarray):
+            dests = dest_ips.astype(np.uint32, copy=False)
+        else:
+            dests = np.fromiter(
+                (ip_to_int(ip) if isinstance(ip, str) else ip for ip in dest_ips),
+                dtype=np.uint32, count=len(dest_ips))
+        links, index = self._batch_index
+        # Work on the destinations in sorted order: masking keeps them sorted,
+        # which makes every searchsorted pass a cache-friendly merge.
+        order = np.argsort(dests)
+        pending_keys = dests[order]
+        pending = np.arange(len(dests))
+        found = np.full(len(dests), len(links) - 1, dtype=np.int32)
+        for mask, networks, ids in index:
+            if not pending.size:
+                break
+            keys = pending_keys & mask
+            pos = np.searchsorted(networks, keys)
+            pos[pos == len(networks)] = 0
+            hit = networks[pos] == keys
+            found[pending[hit]] = ids[pos[hit]]
+            miss = ~hit
+            pending, pending_keys = pending[miss], pending_keys[miss]
+        result = np.empty(len(dests), dtype=np.int32)
+        result[order] = found
+        return np.array(links, dtype=object)[result].tolist()
+
+    def _route_batch_python(self, dest_ips: Sequence) -> List[str]:
+        out = []
+        for ip in dest_ips:
+            dest = ip_to_int(ip) if isinstance(ip, str) else ip
+            for mask, level in self._batch_index:
+                link = level.get(dest & mask)
+                if link is not None:
+                    break
+            else:
+                link = DEFAULT_GATEWAY
+            out.append(link)
+        return out
 
 if __name__ == "__main__":
     # Test case from assignment
@@ -41,15 +365,29 @@ if __name__ == "__main__":
         ("223.1.1.0/24", "Link 0"),
         ("223.1.2.0/24", "Link 1"),
         ("223.1.3.0/24", "Link 2"),
-        ("223.1.0.0/16", "Link 4 (ISP)")
+        ("223.1.0.0/16", "Link 4 (ISP)"),
+        ("2001:db8::/32", "Link 5"),
+        ("2001:db8:1::/48", "Link 6"),
     ]
-    r = Router(routes)
     tests = [
         ("223.1.1.100", "Link 0"),
         ("223.1.2.5", "Link 1"),
         ("223.1.250.1", "Link 4 (ISP)"),
-        ("198.51.100.1", "Default Gateway")
+        ("198.51.100.1", "Default Gateway"),
+        ("2001:db8:1::7", "Link 6"),
+        ("2001:db8:ffff::1", "Link 5"),
+        ("2001:db9::1", "Default Gateway"),
     ]
-    for ip, expected in tests:
-        out = r.route_packet(ip)
-        print(f"{ip} -> {out}  (expected: {expected})")
\ No newline at end of file
+    for engine in ENGINES:
+        print(f"--- engine: {engine} ---")
+        r = Router(routes, engine=engine)
+        for ip, expected in tests:
+            out = r.route_packet(ip)
+            print(f"{ip} -> {out}  (expected: {expected})")
+        print("route_batch:", r.route_batch([ip for ip, _ in tests]))
+        r.add_route("223.1.250.0/24", "Link 3")
+        r.withdraw_route("223.1.1.0/24")
+        print("after add 223.1.250.0/24, withdraw 223.1.1.0/24:",
+              r.route_batch(["223.1.1.100", "223.1.250.1"]),
+              "(expected: ['Link 4 (ISP)', 'Link 3'])")
+        print("memory_footprint:", r.memory_footprint())
\ No newline at end of file
@@ -1,7 +1,15 @@
 # scheduler.py
-from dataclasses import dataclass
-from typing import List
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
 import copy
+import heapq
+from ip_utils import int_to_ip, int_to_ipv6, ip_to_int, ipv6_to_int
+
+try:
+    import numpy as np
+except ImportError:  # PacketBatch needs NumPy; everything else works without
+    np = None
 
 @dataclass
 class Packet:
@@ -9,24 +17,402 @@ class Packet:
     dest_ip: str
     payload: str
     priority: int  # 0=High, 1=Medium, 2=Low
+    timestamp: float = 0.0  # simulated arrival time in seconds
+
+# Packed IPv6 addresses carry this bit so "::1" and "0.0.0.1" stay distinct.
+_V6_TAG = 1 << 128
+
+def _pack_ip(ip: str) -> int:
+    return ipv6_to_int(ip) | _V6_TAG if ":" in ip else ip_to_int(ip)
+
+def _unpack_ip(value: int) -> str:
+    return int_to_ipv6(value ^ _V6_TAG) if value & _V6_TAG else int_to_ip(value)
+
+@dataclass(frozen=True, slots=True)
+class CompactPacket:
+    """
+    Immutable, slotted packet with the addresses packed as integers (IPv4 as
+    the plain 32-bit value, IPv6 with bit 128 set). It has no per-instance
+    __dict__ and no address strings, and exposes the same source_ip /
+    dest_ip / payload / priority attributes as Packet, so every scheduler
+    accepts it.
+    """
+    source: int
+    dest: int
+    payload: str
+    priority: int
+    timestamp: float = 0.0
+
+    @property
+    def source_ip(self) -> str:
+        return _unpack_ip(self.source)
+
+    @property
+    def dest_ip(self) -> str:
+        return _unpack_ip(self.dest)
+
+    @classmethod
+    def from_packet(cls, packet: Packet) -> "CompactPacket":
+        return cls(_pack_ip(packet.source_ip), _pack_ip(packet.dest_ip), packet.payload,
+                   packet.priority, packet.timestamp)
+
+    def to_packet(self) -> Packet:
+        return Packet(self.source_ip, self.dest_ip, self.payload, self.priority, self.timestamp)
+
+class PacketBatch:
+    """
+    Columnar (struct-of-arrays) packet batch over NumPy arrays:
+        source, dest  uint32  IPv4 addresses
+        size          uint32  payload length
+        priority      int16
+    plus an optional list of payloads. Indexing yields CompactPackets.
+    """
+    def __init__(self, source, dest, size, priority, payloads: Optional[List[str]] = None):
+        if np is None:
+            raise ImportError("PacketBatch requires NumPy")
+        self.source = np.asarray(source, dtype=np.uint32)
+        self.dest = np.asarray(dest, dtype=np.uint32)
+        self.size = np.asarray(size, dtype=np.uint32)
+        self.priority = np.asarray(priority, dtype=np.int16)
+        self.payloads = payloads
+        if not len(self.source) == len(self.dest) == len(self.size) == len(self.priority):
+            raise ValueError("PacketBatch columns must have equal length")
+
+    @classmethod
+    def from_packets(cls, packets: Sequence, keep_payloads: bool = True) -> "PacketBatch":
+        """Build a batch from Packet or CompactPacket objects (IPv4 only)."""
+        if np is None:
+            raise ImportError("PacketBatch requires NumPy")
+        n = len(packets)
+        if n and isinstance(packets[0], CompactPacket):
+            source = np.fromiter((p.source for p in packets), dtype=np.uint32, count=n)
+            dest = np.fromiter((p.dest for p in packets), dtype=np.uint32, count=n)
+        else:
+            source = np.fromiter((ip_to_int(p.source_ip) for p in packets), dtype=np.uint32, count=n)
+            dest = np.fromiter((ip_to_int(p.dest_ip) for p in packets), dtype=np.uint32, count=n)
+        size = np.fromiter((len(p.payload) for p in packets), dtype=np.uint32, count=n)
+        priority = np.fromiter((p.priority for p in packets), dtype=np.int16, count=n)
+        payloads = [p.payload for p in packets] if keep_payloads else None
+        return cls(source, dest, size, priority, payloads)
+
+    def __len__(self) -> int:
+        return len(self.source)
+
+    def __getitem__(self, i: int) -> CompactPacket:
+        payload = self.payloads[i] if self.payloads is not None else ""
+        return CompactPacket(int(self.source[i]), int(self.dest[i]), payload, int(self.priority[i]))
+
+    def __iter__(self) -> Iterator[CompactPacket]:
+        for i in range(len(self)):
+            yield self[i]
+
+    def take(self, indices) -> "PacketBatch":
+        """New batch holding the packets at `indices`, in that order."""
+        payloads = None
+        if self.payloads is not None:
+            payloads = [self.payloads[i] for i in indices.tolist()]
+        return PacketBatch(self.source[indices], self.dest[indices], self.size[indices],
+                           self.priority[indices], payloads)
+
+    def copy(self) -> "PacketBatch":
+        return PacketBatch(self.source.copy(), self.dest.copy(), self.size.copy(),
+                           self.priority.copy(), None if self.payloads is None else list(self.payloads))
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the numeric columns (payload strings not included)."""
+        return self.source.nbytes + self.dest.nbytes + self.size.nbytes + self.priority.nbytes
+
+class FIFOScheduler:
+    """
+    Streaming First-Come, First-Served queue: enqueue/dequeue in O(1).
+    """
+    def __init__(self):
+        self._queue = deque()
+
+    def __len__(self) -> int:
+        return len(self._queue)
+
+    def enqueue(self, packet: Packet):
+        self._queue.append(packet)
+
+    def dequeue(self) -> Packet:
+        """Remove and return the oldest packet; IndexError if empty."""
+        if not self._queue:
+            raise IndexError("dequeue from empty scheduler")
+        return self._queue.popleft()
+
+    def drain(self) -> Iterator[Packet]:
+        """Dequeue packets until the scheduler is empty."""
+        while self._queue:
+            yield self._queue.popleft()
+
+class PriorityScheduler:
+    """
+    Streaming strict-priority queue for an unbounded arrival stream.
+    One deque per priority value keeps arrival order within a priority;
+    a heap holds the priorities that currently have packets. enqueue and
+    dequeue are O(1) plus O(log P) when a priority level becomes
+    (non-)empty, where P is the number of distinct priorities.
+    """
+    def __init__(self):
+        self._queues: Dict[int, deque] = {}
+        self._active: List[int] = []  # heap of priorities with queued packets
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
 
-def fifo_scheduler(packet_list: List[Packet]) -> List[Packet]:
+    def enqueue(self, packet: Packet):
+        queue = self._queues.get(packet.priority)
+        if queue is None:
+            queue = self._queues[packet.priority] = deque()
+        if not queue:
+            heapq.heappush(self._active, packet.priority)
+        queue.append(packet)
+        self._size += 1
+
+    def dequeue(self) -> Packet:
+        """Remove and return the oldest packet of the highest priority; IndexError if empty."""
+        if not self._active:
+            raise IndexError("dequeue from empty scheduler")
+        queue = self._queues[self._active[0]]
+        packet = queue.popleft()
+        if not queue:
+            heapq.heappop(self._active)
+        self._size -= 1
+        return packet
+
+    def drain(self) -> Iterator[Packet]:
+        """Dequeue packets until the scheduler is empty."""
+        while self._active:
+            yield self.dequeue()
+
+def _check_weights(weights: Optional[Dict[int, float]]) -> Dict[int, float]:
+    """Copy of a class -> weight map; weights must be positive."""
+    weights = dict(weights or {})
+    for cls, weight in weights.items():
+        if not weight > 0:
+            raise ValueError(f"Invalid weight for class {cls}: {weight}")
+    return weights
+
+
+class DRRScheduler:
+    """
+    Deficit Round Robin over traffic classes (Packet.priority), using the
+    payload length as the packet size. Each backlogged class earns
+    quantum * weight bytes of credit per round and sends packets while its
+    credit covers them, so no class can starve the others.
+    """
+    def __init__(self, quantum: int = 1500, weights: Optional[Dict[int, float]] = None):
+        if quantum <= 0:
+            raise ValueError(f"Invalid quantum: {quantum}")
+        self.quantum = quantum
+        self.weights = weights
+        self._queues: Dict[int, deque] = {}
+        self._deficit: Dict[int, float] = {}
+        self._active = deque()   # round-robin order of backlogged classes
+        self._in_turn = False    # has the head class been credited this round?
+        self._size = 0
+
+    @property
+    def weights(self) -> Dict[int, float]:
+        return self._weights
+
+    @weights.setter
+    def weights(self, weights: Optional[Dict[int, float]]):
+        # A class with no credit growth would never send, and dequeue would spin
+        self._weights = _check_weights(weights)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def enqueue(self, packet: Packet):
+        cls = packet.priority
+        queue = self._queues.get(cls)
+        if queue is None:
+            queue = self._queues[cls] = deque()
+            self._deficit[cls] = 0
+        if not queue:
+            self._active.append(cls)
+        queue.append(packet)
+        self._size += 1
+
+    def dequeue(self) -> Packet:
+        """Remove and return the next packet in DRR order; IndexError if empty."""
+        if not self._size:
+            raise IndexError("dequeue from empty scheduler")
+        active = self._active
+        while True:
+            cls = active[0]
+            if not self._in_turn:
+                self._deficit[cls] += self.quantum * self.weights.get(cls, 1)
+                self._in_turn = True
+            queue = self._queues[cls]
+            size = len(queue[0].payload)
+            if size <= self._deficit[cls]:
+                self._deficit[cls] -= size
+                self._size -= 1
+                packet = queue.popleft()
+                if not queue:
+                    # An idle class keeps no credit
+                    self._deficit[cls] = 0
+                    active.popleft()
+                    self._in_turn = False
+                return packet
+            active.rotate(-1)
+            self._in_turn = False
+
+    def drain(self) -> Iterator[Packet]:
+        """Dequeue packets until the scheduler is empty."""
+        while self._size:
+            yield self.dequeue()
+
+class WFQScheduler:
+    """
+    Weighted Fair Queuing with virtual finish times, using the payload length
+    as the packet size. Each packet is stamped
+        F = max(F_prev_of_its_class, V) + size / weight
+    and packets leave in increasing F. The virtual time V is the finish tag
+    of the last packet sent (self-clocked fair queuing), which avoids
+    simulating the fluid GPS system. Tags rise within a class, so only the
+    head of each class sits in the heap: O(log classes) per packet.
+    """
+    def __init__(self, weights: Optional[Dict[int, float]] = None):
+        self.weights = weights
+        self._queues: Dict[int, deque] = {}  # class -> deque of (finish_tag, packet)
+        self._last_finish: Dict[int, float] = {}
+        self._heads: List[Tuple[float, int, int]] = []  # (finish_tag, seq, class)
+        self._virtual_time = 0.0
+        self._seq = 0
+        self._size = 0
+
+    @property
+    def weights(self) -> Dict[int, float]:
+        return self._weights
+
+    @weights.setter
+    def weights(self, weights: Optional[Dict[int, float]]):
+        self._weights = _check_weights(weights)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def enqueue(self, packet: Packet):
+        cls = packet.priority
+        queue = self._queues.get(cls)
+        if queue is None:
+            queue = self._queues[cls] = deque()
+        start = max(self._last_finish.get(cls, 0.0), self._virtual_time)
+        finish = start + len(packet.payload) / self.weights.get(cls, 1)
+        self._last_finish[cls] = finish
+        if not queue:
+            heapq.heappush(self._heads, (finish, self._seq, cls))
+            self._seq += 1
+        queue.append((finish, packet))
+        self._size += 1
+
+    def dequeue(self) -> Packet:
+        """Remove and return the packet with the smallest finish tag; IndexError if empty."""
+        if not self._heads:
+            raise IndexError("dequeue from empty scheduler")
+        finish, _, cls = heapq.heappop(self._heads)
+        queue = self._queues[cls]
+        _, packet = queue.popleft()
+        if queue:
+            heapq.heappush(self._heads, (queue[0][0], self._seq, cls))
+            self._seq += 1
+        self._virtual_time = finish
+        self._size -= 1
+        return packet
+
+    def drain(self) -> Iterator[Packet]:
+        """Dequeue packets until the scheduler is empty."""
+        while self._heads:
+            yield self.dequeue()
+
+@dataclass
+class ClassStats:
+    """Per-class result of simulate_link."""
+    packets: int = 0
+    bytes: int = 0
+    throughput: float = 0.0  # bytes per simulated second
+    latencies: List[float] = field(default_factory=list, repr=False)
+
+    @property
+    def mean_latency(self) -> float:
+        return sum(self.latencies) / len(self.latencies) if self.latencies else 0.0
+
+    def latency_percentile(self, pct: float) -> float:
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+def simulate_link(scheduler, arrivals: Iterable[Tuple[float, Packet]],
+                  link_rate: float, horizon: Optional[float] = None) -> Dict[int, ClassStats]:
+    """
+    Replay (arrival_time, packet) pairs, sorted by time, through a scheduler
+    feeding a link of link_rate bytes per second (payload length = size).
+    Latency is departure time minus arrival time, including transmission.
+    With a horizon the simulation stops at that time (packets still queued
+    are not counted), otherwise it runs until every packet has left.
+    Packets of one class must leave in arrival order, which holds for every
+    scheduler in this module.
+    """
+    stats: Dict[int, ClassStats] = {}
+    arrived: Dict[int, deque] = {}
+    pending = iter(arrivals)
+    nxt = next(pending, None)
+    now = 0.0
+    while nxt is not None or len(scheduler):
+        if not len(scheduler) and nxt[0] > now:
+            now = nxt[0]  # link idle until the next arrival
+        if horizon is not None and now >= horizon:
+            break
+        while nxt is not None and nxt[0] <= now:
+            t, pkt = nxt
+            arrived.setdefault(pkt.priority, deque()).append(t)
+            scheduler.enqueue(pkt)
+            nxt = next(pending, None)
+        pkt = scheduler.dequeue()
+        size = len(pkt.payload)
+        now += size / link_rate
+        st = stats.get(pkt.priority)
+        if st is None:
+            st = stats[pkt.priority] = ClassStats()
+        st.packets += 1
+        st.bytes += size
+        st.latencies.append(now - arrived[pkt.priority].popleft())
+    elapsed = now if horizon is None else min(now, horizon)
+    for st in stats.values():
+        st.throughput = st.bytes / elapsed if elapsed else 0.0
+    return dict(sorted(stats.items()))
+
+def fifo_scheduler(packet_list: Union[List[Packet], PacketBatch]) -> Union[List[Packet], PacketBatch]:
     """
     First-Come, First-Served: return packets in arrival order.
-    Return a new list (shallow copies of packet objects).
+    Return a new list (shallow copies of packet objects), or a copied
+    PacketBatch when given one.
     """
+    if isinstance(packet_list, PacketBatch):
+        return packet_list.copy()
     return list(packet_list)  # returns a new list preserving order
 
-def priority_scheduler(packet_list: List[Packet]) -> List[Packet]:
+def priority_scheduler(packet_list: Union[List[Packet], PacketBatch]) -> Union[List[Packet], PacketBatch]:
     """
     Priority scheduler: lower priority value means higher priority.
     Preserve arrival order among same-priority packets.
+    Runs the packets through a PriorityScheduler, i.e. a bucket sort by
+    priority in O(n log P) rather than a full comparison sort.
+    A PacketBatch is reordered with one stable argsort on its priority column.
     """
-    # To ensure stable ordering among equal priority, attach arrival index
-    indexed = list(enumerate(packet_list))
-    # Sort by (priority, arrival_index)
-    indexed.sort(key=lambda iv: (iv[1].priority, iv[0]))
-    return [pkt for idx, pkt in indexed]
+    if isinstance(packet_list, PacketBatch):
+        return packet_list.take(np.argsort(packet_list.priority, kind="stable"))
+    sched = PriorityScheduler()
+    for pkt in packet_list:
+        sched.enqueue(pkt)
+    return list(sched.drain())
 
 if __name__ == "__main__":
     # Build test packets in arrival order
@@ -45,3 +431,37 @@ if __name__ == "__main__":
     print("Expected FIFO: ['Data Packet 1', 'Data Packet 2', 'VOIP Packet 1', 'Video Packet 1', 'VOIP Packet 2']")
     print("Priority payload order:", [p.payload for p in priority_out])
     print("Expected Priority: ['VOIP Packet 1', 'VOIP Packet 2', 'Video Packet 1', 'Data Packet 1', 'Data Packet 2']")
+    compact = [CompactPacket.from_packet(p) for p in packets]
+    print("Priority (CompactPacket):", [p.payload for p in priority_scheduler(compact)])
+    if np is not None:
+        batch = priority_scheduler(PacketBatch.from_packets(packets))
+        print("Priority (PacketBatch):", batch.payloads, "from", batch[0].source_ip)
+
+    # Streaming: packets keep arriving while the link drains the queue
+    sched = PriorityScheduler()
+    sent = []
+    for pkt in packets:
+        sched.enqueue(pkt)
+        if len(sched) == 2:
+            sent.append(sched.dequeue().payload)
+    sent.extend(p.payload for p in sched.drain())
+    print("Streaming priority order:", sent)
+    print("Expected Streaming: ['Data Packet 1', 'VOIP Packet 1', 'Video Packet 1', 'VOIP Packet 2', 'Data Packet 2']")
+
+    # Fair queuing: two saturating classes, class 1 weighted 2:1 over class 0
+    backlog = [Packet("10.0.0.1", "10.0.0.2", "x" * 100, priority=i % 2) for i in range(12)]
+    for sched in (DRRScheduler(quantum=100, weights={1: 2}), WFQScheduler(weights={1: 2})):
+        for pkt in backlog:
+            sched.enqueue(pkt)
+        print(f"{type(sched).__name__} class order:", [p.priority for p in sched.drain()])
+    print("Expected: two class-1 packets per class-0 packet until class 1 runs out")
+    for weight in (0, -1):
+        try:
+            DRRScheduler(weights={1: weight})
+        except ValueError as err:
+            print("Rejected:", err)
+
+    arrivals = [(i * 0.001, pkt) for i, pkt in enumerate(backlog)]
+    for cls, st in simulate_link(DRRScheduler(), arrivals, link_rate=50_000).items():
+        print(f"DRR class {cls}: {st.packets} pkts, {st.throughput:.0f} B/s, "
+              f"mean latency {st.mean_latency * 1000:.1f} ms")
@@ -0,0 +1,194 @@
+# shaping.py
+from collections import deque
+from dataclasses import replace
+from operator import attrgetter
+from typing import Dict, Iterable, List, Optional, Union
+
+from scheduler import CompactPacket, Packet
+
+def _restamp(packet, priority: int, timestamp: float):
+    """Copy of packet with a new class/timestamp; much cheaper than dataclasses.replace."""
+    cls = type(packet)
+    if cls is Packet:
+        return Packet(packet.source_ip, packet.dest_ip, packet.payload, priority, timestamp)
+    if cls is CompactPacket:
+        return CompactPacket(packet.source, packet.dest, packet.payload, priority, timestamp)
+    return replace(packet, priority=priority, timestamp=timestamp)
+
+class TokenBucket:
+    """
+    Token bucket on a simulated clock: refills at `rate` bytes per second up
+    to `burst` bytes, and starts full. Time only moves when a packet's
+    timestamp says so, so hours of traffic replay as fast as the CPU allows.
+    """
+    def __init__(self, rate: float, burst: float):
+        if rate <= 0 or burst <= 0:
+            raise ValueError(f"Invalid token bucket: rate={rate}, burst={burst}")
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.last = 0.0  # simulated time the token count refers to
+
+    def refill(self, now: float):
+        if now > self.last:
+            self.tokens = min(self.burst, self.tokens + (now - self.last) * self.rate)
+            self.last = now
+
+    def consume(self, size: int, now: float) -> bool:
+        """Take size tokens at time now if available."""
+        self.refill(now)
+        if self.tokens >= size:
+            self.tokens -= size
+            return True
+        return False
+
+class Policer(TokenBucket):
+    """
+    Single-rate two-colour policer. Packets within the profile pass
+    untouched; excess packets are dropped, or re-marked to mark_priority
+    (a lower class) when one is given. Never delays anything.
+    """
+    def __init__(self, rate: float, burst: float, mark_priority: Optional[int] = None):
+        super().__init__(rate, burst)
+        self.mark_priority = mark_priority
+        self.passed = 0
+        self.dropped = 0
+        self.marked = 0
+
+    def process(self, packet: Packet) -> Optional[Packet]:
+        # Token refill inlined: this runs once per packet.
+        now = packet.timestamp
+        if now > self.last:
+            tokens = self.tokens + (now - self.last) * self.rate
+            self.tokens = tokens if tokens < self.burst else self.burst
+            self.last = now
+        size = len(packet.payload)
+        if self.tokens >= size:
+            self.tokens -= size
+            self.passed += 1
+            return packet
+        if self.mark_priority is None:
+            self.dropped += 1
+            return None
+        self.marked += 1
+        return _restamp(packet, self.mark_priority, now)
+
+    def stats(self) -> Dict[str, object]:
+        return {"passed": self.passed, "dropped": self.dropped, "marked": self.marked}
+
+class Shaper(TokenBucket):
+    """
+    FIFO token-bucket shaper. A packet leaves as soon as the bucket holds
+    enough tokens; until then it waits, and it is re-stamped with the time it
+    leaves. With max_queue, a packet arriving to max_queue waiting packets is
+    tail-dropped, as is any packet larger than the bucket. depth_histogram
+    counts the queue depth seen by each arriving packet.
+    """
+    def __init__(self, rate: float, burst: float, max_queue: Optional[int] = None):
+        super().__init__(rate, burst)
+        self.max_queue = max_queue
+        self.passed = 0
+        self.delayed = 0
+        self.dropped = 0
+        self._limit = float("inf") if max_queue is None else max_queue
+        self._depth_counts = [0]  # index = queue depth seen on arrival
+        self._releases = deque()  # departure times of packets still waiting
+
+    @property
+    def depth_histogram(self) -> Dict[int, int]:
+        return {depth: n for depth, n in enumerate(self._depth_counts) if n}
+
+    def process(self, packet: Packet) -> Optional[Packet]:
+        now = packet.timestamp
+        releases = self._releases
+        while releases and releases[0] <= now:
+            releases.popleft()
+        depth = len(releases)
+        counts = self._depth_counts
+        if depth >= len(counts):
+            counts.extend([0] * (depth + 1 - len(counts)))
+        counts[depth] += 1
+        size = len(packet.payload)
+        burst = self.burst
+        if size > burst or depth >= self._limit:
+            self.dropped += 1
+            return None
+        # FIFO: a packet cannot leave before the one ahead of it
+        last = self.last
+        start = now if now > last else last
+        tokens = self.tokens + (start - last) * self.rate
+        if tokens > burst:
+            tokens = burst
+        if tokens < size:
+            start += (size - tokens) / self.rate
+            tokens = size
+        self.tokens = tokens - size
+        self.last = start
+        if start > now:
+            releases.append(start)
+            self.delayed += 1
+            return _restamp(packet, packet.priority, start)
+        self.passed += 1
+        return packet
+
+    def stats(self) -> Dict[str, object]:
+        return {"passed": self.passed, "delayed": self.delayed, "dropped": self.dropped,
+                "max_depth": max(self.depth_histogram, default=0),
+                "depth_histogram": self.depth_histogram}
+
+class TrafficConditioner:
+    """
+    Per-class policing/shaping stage in front of a scheduler. stages maps a
+    class (Packet.priority) to a Policer or Shaper; classes without a stage
+    pass straight through. Packets must arrive in timestamp order.
+    """
+    def __init__(self, stages: Dict[int, Union[Policer, Shaper]]):
+        self.stages = stages
+
+    def process(self, packets: Iterable[Packet]) -> List[Packet]:
+        """
+        Condition a stream of packets. Returns the survivors in the order they
+        leave the conditioner (by timestamp, stable), ready for
+        fifo_scheduler / priority_scheduler or any streaming scheduler.
+        """
+        stages = self.stages
+        out = []
+        append = out.append
+        shaped = False
+        for packet in packets:
+            stage = stages.get(packet.priority)
+            if stage is None:
+                append(packet)
+                continue
+            result = stage.process(packet)
+            if result is not None:
+                append(result)
+                if result.timestamp != packet.timestamp:
+                    shaped = True
+        if shaped:
+            out.sort(key=attrgetter("timestamp"))
+        return out
+
+    def stats(self) -> Dict[int, Dict[str, object]]:
+        """Drop/mark/delay counters (and shaper depth histograms) per class."""
+        return {cls: stage.stats() for cls, stage in sorted(self.stages.items())}
+
+if __name__ == "__main__":
+    from scheduler import priority_scheduler
+
+    # 10 packets of 1000 B per class, one every 1 ms (1 MB/s offered per class)
+    packets = []
+    for i in range(10):
+        for cls in (0, 1, 2):
+            packets.append(Packet("10.0.0.1", "10.0.0.2", "x" * 1000, cls, timestamp=i * 0.001))
+
+    conditioner = TrafficConditioner({
+        0: Policer(rate=500_000, burst=2000),                   # drop above 0.5 MB/s
+        1: Policer(rate=500_000, burst=2000, mark_priority=2),  # re-mark excess to class 2
+        2: Shaper(rate=500_000, burst=2000, max_queue=4),       # delay, tail-drop past 4
+    })
+    conditioned = conditioner.process(packets)
+    for cls, counters in conditioner.stats().items():
+        print(f"class {cls}: {counters}")
+    ordered = priority_scheduler(conditioned)
+    print("priority order after conditioning:", [p.priority for p in ordered])